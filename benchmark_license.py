@@ -0,0 +1,1137 @@
+#!/usr/bin/env python3
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Command line tool you can use to benchmark modify_license against synthetic
+source trees.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import sys
+import io
+import json
+import time
+import re
+import random
+import datetime
+import tempfile
+import platform
+import resource
+import subprocess
+import argparse
+import contextlib
+import multiprocessing
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+VERSION = "1.0"
+"""
+The script version number.
+
+"""
+
+DESCRIPTION = """
+Command line tool you can use to benchmark modify_license against synthetic
+source trees.  Each phase is run in a fresh process so that the reported peak
+resident set size reflects only that phase.
+
+"""
+"""
+The command description.
+
+"""
+
+PHASES = ( "startup", "dates", "legacy-dates", "headers", "process" )
+"""
+The benchmark phases, in the order they are run.
+
+"""
+
+IMPORT_TIME_RE = re.compile(
+    r'import time:\s*[0-9]+\s*\|\s*([0-9]+)\s*\|\s*modify_license\s*$',
+    re.MULTILINE
+)
+"""
+Regular expression used to find the cumulative time, in microseconds, spent
+importing modify_license in the output of "python -X importtime".
+
+"""
+
+COMMENT_STYLES = {
+    "#" : {
+        "extension" : ".py",
+        "banner_start" : "#",
+        "banner_character" : "#",
+        "line_start" : "# ",
+        "code" : "value_%d = compute(%d)  # %s"
+    },
+    "*" : {
+        "extension" : ".c",
+        "banner_start" : "/",
+        "banner_character" : "*",
+        "line_start" : " * ",
+        "code" : "int value_%d = compute(%d); /* %s */"
+    },
+    "//" : {
+        "extension" : ".cpp",
+        "banner_start" : "//",
+        "banner_character" : "*",
+        "line_start" : "// ",
+        "code" : "auto value_%d = compute(%d); // %s"
+    }
+}
+"""
+The comment styles used in the synthetic trees.
+
+"""
+
+DEFAULT_NUMBER_FILES = 1000
+"""
+The default number of files in the synthetic tree.
+
+"""
+
+DEFAULT_FILE_SIZES = "1,4,16,64"
+"""
+The default list of file sizes, in KiB.  Sizes are picked at random for each
+file.
+
+"""
+
+DEFAULT_STALE_FRACTION = 0.5
+"""
+The default fraction of files generated with stale headers and dates.
+
+"""
+
+DEFAULT_LICENSES = "gplv3"
+"""
+The default licenses placed in the generated and processed headers.
+
+"""
+
+LAYOUTS = ( "normal", "long-lines", "minified" )
+"""
+The supported source line layouts.  "normal" places one statement on each
+line.  "long-lines" joins statements into lines of about LONG_LINE_LENGTH
+characters.  "minified" joins every statement after the header into a single
+line.
+
+"""
+
+DEFAULT_LAYOUT = "normal"
+"""
+The default source line layout.
+
+"""
+
+LONG_LINE_LENGTH = 4096
+"""
+The approximate length of the lines generated by the "long-lines" layout.
+
+"""
+
+LEGACY_COPYRIGHT_DATE_RE = re.compile(
+    r'(.*)Copyright(\s+)(2[0-9]{3})(\s*-\s*(2[0-9]{3}))?([, ].*)?'
+)
+"""
+The per-line regular expression used by the original copyright date engine.
+
+"""
+
+WORDS = (
+    "alpha", "beta", "gamma", "delta", "buffer", "index", "value", "result",
+    "update", "process", "header", "license", "column", "line"
+)
+"""
+Words used to fill comments in the generated source lines.
+
+"""
+
+COPYRIGHT_LINE_FRACTION = 0.02
+"""
+The fraction of generated source lines holding a copyright string outside of
+the header.
+
+"""
+
+###############################################################################
+# Functions
+#
+
+def legacy_modify_copyright_dates(file_content, wrap_column):
+    """
+    Function holding the original copyright date engine, which matches each
+    line separately and repeats the match after each change.  It is kept so
+    that the "legacy-dates" phase can be compared with the single pass engine
+    used by modify_license.  Only the last copyright string on each line is
+    updated.
+
+    :param file_content:
+        An array of file lines to be modified.
+
+    :param wrap_column:
+        The maximum allowed line width in characters.
+
+    :return:
+        Returns True on success.
+
+    :type file_content: list
+    :type wrap_column:  int
+    :rtype:             bool
+
+    """
+
+    current_year = str(datetime.date.today().year)
+
+    number_lines = len(file_content)
+    i = 0
+    while i < number_lines:
+        l = file_content[i]
+        match = LEGACY_COPYRIGHT_DATE_RE.fullmatch(l)
+        if match:
+            change_made = True
+            actual_change_made = False
+            while change_made:
+                change_made = False
+
+                groups = match.groups()
+                start_year = groups[2]
+                if start_year != current_year:
+                    end_year = groups[4]
+                    if end_year is None or end_year != current_year:
+                        l = (
+                              groups[0]
+                            + 'Copyright'
+                            + groups[1]
+                            + start_year
+                            + ' - '
+                            + current_year
+                            + (groups[5] or '')
+                        )
+
+                        actual_change_made = True
+                        change_made = True
+
+                        match = LEGACY_COPYRIGHT_DATE_RE.fullmatch(l)
+
+            if actual_change_made:
+                file_content[i] = l
+                if len(l) > wrap_column:
+                    sys.stderr.write(
+                        "*** Warning: Line %d exceeds maximum line length.\n"
+                        "    %s"%(
+                            i + 1,
+                            l
+                        )
+                    )
+
+        i += 1
+
+    return True
+
+
+def join_lines(lines, length):
+    """
+    Function that joins source lines into longer lines.
+
+    :param lines:
+        The lines to be joined.
+
+    :param length:
+        The approximate length of each joined line.  A value of None joins
+        every line into a single line.
+
+    :return:
+        Returns the joined lines.
+
+    :type lines:  list
+    :type length: int or None
+    :rtype:       list
+
+    """
+
+    joined_lines = []
+    current_line = []
+    current_length = 0
+    for l in lines:
+        current_line.append(l)
+        current_length += len(l) + 1
+        if length is not None and current_length >= length:
+            joined_lines.append(" ".join(current_line))
+            current_line = []
+            current_length = 0
+
+    if current_line:
+        joined_lines.append(" ".join(current_line))
+
+    return joined_lines
+
+
+def banner_line(style, wrap_column):
+    """
+    Function that creates a banner line marking the start or end of a
+    copyright header.
+
+    :param style:
+        The comment style dictionary.
+
+    :param wrap_column:
+        The maximum line length.
+
+    :return:
+        Returns the banner line.
+
+    :type style:       dict
+    :type wrap_column: int
+    :rtype:            str
+
+    """
+
+    prefix = style["banner_start"]
+    return prefix + style["banner_character"] * (wrap_column - len(prefix))
+
+
+def generate_file_content(
+    style,
+    size,
+    stale,
+    license_list,
+    wrap_column,
+    current_year,
+    rng,
+    layout = DEFAULT_LAYOUT
+    ):
+    """
+    Function that generates the content of a single synthetic source file.
+
+    :param style:
+        The comment style dictionary.
+
+    :param size:
+        The approximate file size, in bytes.
+
+    :param stale:
+        If True, then the header holds out of date licenses and dates.
+        Otherwise the file already complies.
+
+    :param license_list:
+        The licenses placed in compliant headers.
+
+    :param wrap_column:
+        The maximum line length.
+
+    :param current_year:
+        The current year.
+
+    :param rng:
+        The random number generator.
+
+    :param layout:
+        The source line layout.  See LAYOUTS.
+
+    :return:
+        Returns the file content.
+
+    :type style:        dict
+    :type size:         int
+    :type stale:        bool
+    :type license_list: list
+    :type wrap_column:  int
+    :type current_year: int
+    :type rng:          random.Random
+    :type layout:       str
+    :rtype:             str
+
+    """
+
+    line_start = style["line_start"]
+    banner = banner_line(style, wrap_column)
+
+    lines = [ banner ]
+    if stale:
+        lines.append(
+            "%sCopyright %d Inesonic, LLC"%(
+                line_start,
+                current_year - rng.randint(1, 10)
+            )
+        )
+        lines.append(line_start.rstrip())
+        lines.append(line_start + "Obsolete License:")
+        lines.append(line_start + "  Obsolete license terms.")
+    else:
+        lines.append(
+            "%sCopyright %d - %d Inesonic, LLC"%(
+                line_start,
+                current_year - rng.randint(1, 10),
+                current_year
+            )
+        )
+
+        for license in license_list:
+            lines.extend(
+                modify_license.render_license_block(
+                    license,
+                    line_start,
+                    wrap_column
+                )
+            )
+
+    lines.append(banner)
+    lines.append("")
+
+    content_size = sum([ len(l) + 1 for l in lines ])
+    code_lines = []
+    line_number = 0
+    while content_size < size:
+        if rng.random() < COPYRIGHT_LINE_FRACTION:
+            comment = "Copyright %d Inesonic, LLC"%(
+                current_year - 1 if stale else current_year
+            )
+        else:
+            comment = " ".join([ rng.choice(WORDS) for i in range(4) ])
+
+        l = style["code"]%( line_number, line_number, comment )
+        code_lines.append(l)
+        content_size += len(l) + 1
+        line_number += 1
+
+    if layout == "long-lines":
+        code_lines = join_lines(code_lines, LONG_LINE_LENGTH)
+    elif layout == "minified":
+        code_lines = join_lines(code_lines, None)
+
+    lines.extend(code_lines)
+
+    return "".join([ l + "\n" for l in lines ])
+
+
+def generate_tree(
+    directory,
+    number_files,
+    file_sizes,
+    stale_fraction,
+    license_list,
+    wrap_column,
+    seed,
+    layout = DEFAULT_LAYOUT
+    ):
+    """
+    Function that generates a synthetic source tree.  Files are spread across
+    nested directories and mix the available comment styles, sizes and
+    compliant and stale headers.
+
+    :param directory:
+        The directory to hold the tree.
+
+    :param number_files:
+        The number of files to generate.
+
+    :param file_sizes:
+        The list of file sizes, in bytes.
+
+    :param stale_fraction:
+        The fraction of files generated with stale headers.
+
+    :param license_list:
+        The licenses placed in compliant headers.
+
+    :param wrap_column:
+        The maximum line length.
+
+    :param seed:
+        The random number generator seed.
+
+    :param layout:
+        The source line layout.  See LAYOUTS.
+
+    :return:
+        Returns a tuple holding the number of files and the total size of
+        the tree in bytes.
+
+    :type directory:      str
+    :type number_files:   int
+    :type file_sizes:     list
+    :type stale_fraction: float
+    :type license_list:   list
+    :type wrap_column:    int
+    :type seed:           int
+    :type layout:         str
+    :rtype:               tuple
+
+    """
+
+    rng = random.Random(seed)
+    current_year = datetime.date.today().year
+    styles = list(COMMENT_STYLES.values())
+
+    total_size = 0
+    for file_index in range(number_files):
+        style = styles[file_index % len(styles)]
+        subdirectory = os.path.join(
+            directory,
+            "module_%03d"%(file_index // 100),
+            "part_%d"%(file_index % 4)
+        )
+        os.makedirs(subdirectory, exist_ok = True)
+
+        content = generate_file_content(
+            style,
+            rng.choice(file_sizes),
+            rng.random() < stale_fraction,
+            license_list,
+            wrap_column,
+            current_year,
+            rng,
+            layout
+        ).encode("utf-8")
+
+        filename = os.path.join(
+            subdirectory,
+            "file_%06d%s"%(file_index, style["extension"])
+        )
+
+        with open(filename, "wb") as file_handle:
+            file_handle.write(content)
+
+        total_size += len(content)
+
+    return ( number_files, total_size )
+
+
+def load_tree(directory):
+    """
+    Function that loads every file in a tree as a list of lines, matching the
+    form used by process_file.
+
+    :param directory:
+        The tree directory.
+
+    :return:
+        Returns a list of lists of file lines.
+
+    :type directory: str
+    :rtype:          list
+
+    """
+
+    contents = []
+    for filename in modify_license.walk_source_files([ directory ]):
+        with open(filename, "r", encoding = "utf-8") as file_handle:
+            contents.append([ l.rstrip() for l in file_handle ])
+
+    return contents
+
+
+def measure_import_time():
+    """
+    Function that measures the time needed to import modify_license in a new
+    interpreter using "python -X importtime".
+
+    :return:
+        Returns the cumulative import time in seconds.
+
+    :rtype: float
+
+    """
+
+    module_directory = os.path.dirname(
+        os.path.abspath(modify_license.__file__)
+    )
+
+    environment = dict(os.environ)
+    if environment.get("PYTHONPATH"):
+        environment["PYTHONPATH"] = (
+            module_directory + os.pathsep + environment["PYTHONPATH"]
+        )
+    else:
+        environment["PYTHONPATH"] = module_directory
+
+    result = subprocess.run(
+        [ sys.executable, "-X", "importtime", "-c", "import modify_license" ],
+        stdout = subprocess.DEVNULL,
+        stderr = subprocess.PIPE,
+        env = environment,
+        universal_newlines = True,
+        check = True
+    )
+
+    match = IMPORT_TIME_RE.search(result.stderr)
+    if match is None:
+        raise RuntimeError("modify_license import time was not reported")
+
+    return int(match.group(1)) / 1e6
+
+
+def run_phase(phase, directory, license_list, wrap_column, create_backups):
+    """
+    Function that runs and times a single benchmark phase.  This function is
+    intended to run in a fresh process.
+
+    :param phase:
+        The phase to be run.  "startup" reports the time needed to import
+        modify_license in a new interpreter.  "dates" times
+        modify_copyright_dates, "legacy-dates" times
+        legacy_modify_copyright_dates and "headers" times
+        update_license_header, all on content already held in memory.
+        "process" times process_file on every file in the tree, including
+        all file I/O.
+
+    :param directory:
+        The tree directory.  The "process" phase modifies the tree.  The
+        "startup" phase does not use a tree and accepts None.
+
+    :param license_list:
+        The licenses to be placed in each header.
+
+    :param wrap_column:
+        The maximum line length.
+
+    :param create_backups:
+        If True, then the "process" phase creates backups.
+
+    :return:
+        Returns a tuple holding the elapsed time in seconds and the peak
+        resident set size in KiB.  For the "startup" phase, the peak resident
+        set size is that of the new interpreter.
+
+    :type phase:          str
+    :type directory:      str or None
+    :type license_list:   list
+    :type wrap_column:    int
+    :type create_backups: bool
+    :rtype:               tuple
+
+    """
+
+    rusage_who = resource.RUSAGE_SELF
+    with contextlib.redirect_stderr(io.StringIO()):
+        if phase == "startup":
+            elapsed = measure_import_time()
+            rusage_who = resource.RUSAGE_CHILDREN
+        elif phase == "process":
+            filenames = list(modify_license.walk_source_files([ directory ]))
+
+            start_time = time.perf_counter()
+            for filename in filenames:
+                modify_license.process_file(
+                    filename = filename,
+                    verbose = False,
+                    license_list = license_list,
+                    modify_dates = True,
+                    create_backups = create_backups,
+                    wrap_column = wrap_column
+                )
+
+            elapsed = time.perf_counter() - start_time
+        else:
+            contents = load_tree(directory)
+
+            start_time = time.perf_counter()
+            if phase == "dates":
+                for file_content in contents:
+                    modify_license.modify_copyright_dates(
+                        file_content,
+                        wrap_column
+                    )
+            elif phase == "legacy-dates":
+                for file_content in contents:
+                    legacy_modify_copyright_dates(file_content, wrap_column)
+            else:
+                for file_content in contents:
+                    modify_license.update_license_header(
+                        file_content,
+                        wrap_column,
+                        license_list
+                    )
+
+            elapsed = time.perf_counter() - start_time
+
+    peak_rss = resource.getrusage(rusage_who).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+
+    return ( elapsed, peak_rss )
+
+
+def run_benchmark(
+    phases,
+    number_files,
+    file_sizes,
+    stale_fraction,
+    license_list,
+    wrap_column,
+    create_backups,
+    repeat,
+    seed,
+    layout = DEFAULT_LAYOUT
+    ):
+    """
+    Function that generates synthetic trees and runs each benchmark phase.
+    Each repetition of each phase runs in a fresh process against a freshly
+    generated tree.  The fastest repetition is reported.
+
+    :param phases:
+        The phases to be run.
+
+    :param number_files:
+        The number of files in each tree.
+
+    :param file_sizes:
+        The list of file sizes, in bytes.
+
+    :param stale_fraction:
+        The fraction of files generated with stale headers.
+
+    :param license_list:
+        The licenses to be placed in each header.
+
+    :param wrap_column:
+        The maximum line length.
+
+    :param create_backups:
+        If True, then the "process" phase creates backups.
+
+    :param repeat:
+        The number of times each phase is run.
+
+    :param seed:
+        The random number generator seed.
+
+    :param layout:
+        The source line layout.  See LAYOUTS.
+
+    :return:
+        Returns the benchmark report.
+
+    :type phases:         list
+    :type number_files:   int
+    :type file_sizes:     list
+    :type stale_fraction: float
+    :type license_list:   list
+    :type wrap_column:    int
+    :type create_backups: bool
+    :type repeat:         int
+    :type seed:           int
+    :type layout:         str
+    :rtype:               dict
+
+    """
+
+    report = {
+        "benchmark_version" : VERSION,
+        "modify_license_version" : modify_license.VERSION,
+        "python" : platform.python_version(),
+        "platform" : platform.platform(),
+        "parameters" : {
+            "files" : number_files,
+            "file_sizes" : file_sizes,
+            "stale_fraction" : stale_fraction,
+            "licenses" : license_list,
+            "wrap_column" : wrap_column,
+            "backups" : create_backups,
+            "repeat" : repeat,
+            "seed" : seed,
+            "layout" : layout
+        },
+        "phases" : {}
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for phase in phases:
+        best_elapsed = None
+        peak_rss = 0
+        for repetition in range(repeat):
+            with tempfile.TemporaryDirectory() as directory:
+                if phase == "startup":
+                    ( files, total_size ) = ( 0, 0 )
+                else:
+                    ( files, total_size ) = generate_tree(
+                        directory,
+                        number_files,
+                        file_sizes,
+                        stale_fraction,
+                        license_list,
+                        wrap_column,
+                        seed,
+                        layout
+                    )
+
+                with context.Pool(processes = 1) as pool:
+                    ( elapsed, phase_rss ) = pool.apply(
+                        run_phase,
+                        (
+                            phase,
+                            directory,
+                            license_list,
+                            wrap_column,
+                            create_backups
+                        )
+                    )
+
+            if best_elapsed is None or elapsed < best_elapsed:
+                best_elapsed = elapsed
+
+            peak_rss = max(peak_rss, phase_rss)
+
+        # Throughput is not reported for phases that process no files.
+        if files:
+            files_per_second = files / best_elapsed
+            mb_per_second = total_size / best_elapsed / 1e6
+        else:
+            files_per_second = None
+            mb_per_second = None
+
+        report["phases"][phase] = {
+            "seconds" : best_elapsed,
+            "files" : files,
+            "bytes" : total_size,
+            "files_per_second" : files_per_second,
+            "mb_per_second" : mb_per_second,
+            "peak_rss_kib" : peak_rss
+        }
+
+    return report
+
+
+def format_report(report, baseline = None):
+    """
+    Function that formats a benchmark report as a text table.
+
+    :param report:
+        The benchmark report.
+
+    :param baseline:
+        An optional earlier report.  If provided, then the change in
+        throughput relative to the baseline is included.  For phases that
+        process no files, the change in speed is included instead.
+
+    :return:
+        Returns the formatted report.
+
+    :type report:   dict
+    :type baseline: dict or None
+    :rtype:         str
+
+    """
+
+    parameters = report["parameters"]
+    lines = [
+        "modify_license %s, Python %s"%(
+            report["modify_license_version"],
+            report["python"]
+        ),
+        "%d files, %d stale, sizes %s KiB, licenses %s, %s layout"%(
+            parameters["files"],
+            round(parameters["files"] * parameters["stale_fraction"]),
+            ",".join([ str(s // 1024) for s in parameters["file_sizes"] ]),
+            ",".join(parameters["licenses"]),
+            parameters.get("layout", DEFAULT_LAYOUT)
+        ),
+        "",
+        "%-12s %10s %12s %10s %12s%s"%(
+            "Phase",
+            "Seconds",
+            "Files/sec",
+            "MB/sec",
+            "Peak RSS KiB",
+            "  vs baseline" if baseline else ""
+        )
+    ]
+
+    for phase, result in report["phases"].items():
+        comparison = ""
+        if baseline and phase in baseline.get("phases", {}):
+            baseline_result = baseline["phases"][phase]
+            if result["files_per_second"] is not None:
+                change = (
+                      result["files_per_second"]
+                    / baseline_result["files_per_second"]
+                )
+            else:
+                change = baseline_result["seconds"] / result["seconds"]
+
+            comparison = "  %+11.1f%%"%(100.0 * (change - 1.0))
+
+        if result["files_per_second"] is not None:
+            throughput = "%12.1f %10.2f"%(
+                result["files_per_second"],
+                result["mb_per_second"]
+            )
+        else:
+            throughput = "%12s %10s"%( "-", "-" )
+
+        lines.append(
+            "%-12s %10.3f %s %12d%s"%(
+                phase,
+                result["seconds"],
+                throughput,
+                result["peak_rss_kib"],
+                comparison
+            )
+        )
+
+    return "\n".join(lines) + "\n"
+
+###############################################################################
+# Main:
+#
+
+def main(argv = None):
+    """
+    Function that parses the command line and runs the benchmark.
+
+    :param argv:
+        The command line arguments.  If None, then sys.argv is used.
+
+    :return:
+        Returns the exit status.
+
+    :type argv: list or None
+    :rtype:     int
+
+    """
+
+    command_line_parser = argparse.ArgumentParser(description = DESCRIPTION)
+    command_line_parser.add_argument(
+        "-V",
+        "--version",
+        help = "You can use this switch to obtain the software release "
+               "version.",
+        action = "version",
+        version = VERSION
+    )
+
+    command_line_parser.add_argument(
+        "-n",
+        "--files",
+        help = "You can use this switch to specify the number of files in "
+               "each synthetic tree.",
+        type = int,
+        default = DEFAULT_NUMBER_FILES,
+        dest = "number_files"
+    )
+
+    command_line_parser.add_argument(
+        "-s",
+        "--sizes",
+        help = "You can use this switch to specify a comma separated list of "
+               "file sizes, in KiB.  Each file picks one size at random.",
+        type = str,
+        default = DEFAULT_FILE_SIZES,
+        dest = "file_sizes"
+    )
+
+    command_line_parser.add_argument(
+        "-t",
+        "--stale",
+        help = "You can use this switch to specify the fraction of files "
+               "generated with stale headers and dates.",
+        type = float,
+        default = DEFAULT_STALE_FRACTION,
+        dest = "stale_fraction"
+    )
+
+    command_line_parser.add_argument(
+        "-l",
+        "--licenses",
+        help = "You can use this switch to specify a comma separated list of "
+               "licenses to be placed in each header.",
+        type = str,
+        default = DEFAULT_LICENSES,
+        dest = "licenses"
+    )
+
+    command_line_parser.add_argument(
+        "-w",
+        "--wrap",
+        help = "You can use this switch to specify the maximum column width.",
+        type = int,
+        default = modify_license.DEFAULT_COLUMN_WIDTH,
+        dest = "wrap"
+    )
+
+    command_line_parser.add_argument(
+        "-y",
+        "--layout",
+        help = "You can use this switch to specify the source line layout.  "
+               "\"normal\" places one statement on each line, "
+               "\"long-lines\" joins statements into lines of about %d "
+               "characters and \"minified\" places every statement on a "
+               "single line."%LONG_LINE_LENGTH,
+        choices = LAYOUTS,
+        default = DEFAULT_LAYOUT,
+        dest = "layout"
+    )
+
+    command_line_parser.add_argument(
+        "-p",
+        "--phases",
+        help = "You can use this switch to specify a comma separated list of "
+               "phases to run.  Supported phases are %s."%", ".join(PHASES),
+        type = str,
+        default = ",".join(PHASES),
+        dest = "phases"
+    )
+
+    command_line_parser.add_argument(
+        "-b",
+        "--backup",
+        help = "You can use this switch to create backups during the "
+               "\"process\" phase.",
+        action = "store_true",
+        default = False,
+        dest = "create_backups"
+    )
+
+    command_line_parser.add_argument(
+        "-r",
+        "--repeat",
+        help = "You can use this switch to specify how many times each phase "
+               "is run.  The fastest run is reported.",
+        type = int,
+        default = 1,
+        dest = "repeat"
+    )
+
+    command_line_parser.add_argument(
+        "--seed",
+        help = "You can use this switch to specify the random number "
+               "generator seed used to generate the trees.",
+        type = int,
+        default = 0,
+        dest = "seed"
+    )
+
+    command_line_parser.add_argument(
+        "-o",
+        "--output",
+        help = "You can use this switch to write the report, as JSON, to a "
+               "file so that it can be compared against later runs.",
+        type = str,
+        default = None,
+        dest = "output"
+    )
+
+    command_line_parser.add_argument(
+        "--max-startup",
+        help = "You can use this switch to fail, with a non-zero exit status, "
+               "if the \"startup\" phase takes longer than this many "
+               "milliseconds.  This lets CI catch import time regressions.",
+        type = float,
+        default = None,
+        dest = "max_startup"
+    )
+
+    command_line_parser.add_argument(
+        "-B",
+        "--baseline",
+        help = "You can use this switch to compare the results against a "
+               "JSON report written by an earlier run.",
+        type = str,
+        default = None,
+        dest = "baseline"
+    )
+
+    arguments = command_line_parser.parse_args(argv)
+
+    phases = [ p.strip() for p in arguments.phases.split(",") if p.strip() ]
+    for phase in phases:
+        if phase not in PHASES:
+            command_line_parser.error("unknown phase %s"%phase)
+
+    license_list = [
+        l.strip() for l in arguments.licenses.split(",") if l.strip()
+    ]
+    for license in license_list:
+        if license not in modify_license.LICENSE_TEXT:
+            command_line_parser.error("unknown license %s"%license)
+
+    try:
+        file_sizes = [
+            int(s) * 1024 for s in arguments.file_sizes.split(",") if s.strip()
+        ]
+    except ValueError:
+        command_line_parser.error("invalid file sizes")
+
+    if arguments.number_files <= 0 or arguments.repeat <= 0 or not file_sizes:
+        command_line_parser.error("files, repeat and sizes must be positive")
+
+    if arguments.max_startup is not None and "startup" not in phases:
+        command_line_parser.error("--max-startup requires the startup phase")
+
+    baseline = None
+    if arguments.baseline is not None:
+        try:
+            with open(arguments.baseline, "r", encoding = "utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            sys.stderr.write(
+                "*** Could not read baseline %s: %s\n"%(
+                    arguments.baseline,
+                    str(e)
+                )
+            )
+            return 1
+
+    report = run_benchmark(
+        phases,
+        arguments.number_files,
+        file_sizes,
+        arguments.stale_fraction,
+        license_list,
+        arguments.wrap,
+        arguments.create_backups,
+        arguments.repeat,
+        arguments.seed,
+        arguments.layout
+    )
+
+    sys.stdout.write(format_report(report, baseline))
+
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding = "utf-8") as file_handle:
+            json.dump(report, file_handle, indent = 4)
+            file_handle.write("\n")
+
+    if arguments.max_startup is not None:
+        startup_ms = report["phases"]["startup"]["seconds"] * 1000.0
+        if startup_ms > arguments.max_startup:
+            sys.stderr.write(
+                "*** Startup took %.1f ms, more than the %.1f ms allowed.\n"%(
+                    startup_ms,
+                    arguments.max_startup
+                )
+            )
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
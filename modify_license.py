@@ -18,7 +18,9 @@
 ###############################################################################
 
 """
-Command line tool you can use to update source file licensing terms.
+Command line tool you can use to update source file licensing terms.  The
+LicenseProcessor class can also be imported to update files from other Python
+tools.
 
 """
 
@@ -26,13 +28,30 @@ Command line tool you can use to update source file licensing terms.
 # Import:
 #
 
+# Modules only needed by some code paths, such as textwrap3, shutil, zlib,
+# multiprocessing and asyncio, are imported by the functions that use them so
+# that short runs, for example from a pre-commit hook, start quickly.
+
 import os
-import shutil
+import stat
+import errno
 import sys
-import datetime
+import mmap
+import json
+import time
+import functools
 import re
-import textwrap3
-import argparse
+import io
+import codecs
+import contextlib
+import threading
+import collections
+import fnmatch
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 ###############################################################################
 # Globals:
@@ -59,6 +78,12 @@ The default column width.
 
 """
 
+DEFAULT_JOBS = 1
+"""
+The default number of worker processes used to process files.
+
+"""
+
 LICENSE_TEXT = {
     "commercial" : {
         "header" : "Inesonic Commercial License",
@@ -160,593 +185,9042 @@ Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 """
     }
 }
+"""
+The licenses built into this script, keyed by name.  Each value holds the
+"header" naming the license and the license "text".  Blank lines separate
+paragraphs of the text.
 
-BACKUP_DIRECTORY = "backup_license"
 """
-The backup directory name.
+
+LICENSE_SPDX_IDS = {
+    "LicenseRef-Inesonic-Commercial" : "commercial",
+    "LicenseRef-Inesonic-Aion-EULA" : "aion",
+    "MIT" : "mit",
+    "GPL-2.0-or-later" : "gplv2",
+    "LGPL-2.1-or-later" : "lgplv2",
+    "GPL-3.0-or-later" : "gplv3",
+    "LGPL-3.0-or-later" : "lgplv3"
+}
+"""
+The names of the licenses in LICENSE_TEXT, keyed by SPDX identifier.
+Licenses without an SPDX identifier use "LicenseRef-" identifiers.
 
 """
 
-COPYRIGHT_DATE_RE = re.compile(
-    r'(.*)Copyright(\s+)(2[0-9]{3})(\s*-\s*(2[0-9]{3}))?([, ].*)?'
+LICENSE_TEMPLATE_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "licenses"
 )
 """
-Regular expression used to update copyright dates.
+The directory holding the license templates shipped with this script.
 
 """
 
-COPYRIGHT_DATE_HEADER = re.compile(r'\s*([#*]?|//)\s+Copyright\s+[0-9]{4}.*')
+LICENSE_TEMPLATE_EXTENSION = ".txt"
 """
-Regular expression used to identify copyright dates.  The first of these lines
-are preserved and placed at the top of the copyright region.
+The extension of license template files.  Each template is named after the
+SPDX identifier of its license.
 
 """
 
-LINE_START_RE = re.compile(r'(\s*([*#]|//)*[^*#]).*')
+SPDX_ID_RE = re.compile(r'[A-Za-z0-9][A-Za-z0-9.+-]*')
 """
-Regular expression used to identify how each line should be started.
+Regular expression used to validate SPDX license identifiers before they are
+used as file names.
 
 """
 
-###############################################################################
-# Functions
-#
+REGISTERED_LICENSES = {}
+"""
+The licenses loaded from templates, keyed by SPDX identifier.  Each value
+holds the "header" and "text" of the license, as in LICENSE_TEXT.
 
-def modify_copyright_dates(file_content, wrap_column):
-    """
-    Function that scans a file for copyright strings, modifying them as needed.
+"""
 
-    :param file_content:
-        An array of file lines to be modified.
+BACKUP_DIRECTORY = "backup_license"
+"""
+The backup directory name used by the "directory" backup layout.
 
-    :param wrap_column:
-        The maximum allowed line width in characters.
+"""
 
-    :return:
-        Returns True on success.  Returns false on error.
+BACKUP_LAYOUTS = ( "store", "directory" )
+"""
+The supported backup layouts.  "store" keeps compressed, deduplicated copies
+of the original files in a single backup store.  "directory" copies each file
+into a backup directory next to it.
 
-    :type file_content: list
-    :type wrap_count: int
-    :rtype: bool
+"""
 
-    """
+DEFAULT_BACKUP_LAYOUT = "store"
+"""
+The default backup layout.
 
-    current_year = str(datetime.date.today().year)
+"""
 
-    number_lines = len(file_content)
-    i = 0;
-    while i < number_lines:
-        l = file_content[i]
-        match = COPYRIGHT_DATE_RE.fullmatch(l)
-        if match:
-            change_made = True
-            actual_change_made = False
-            while change_made:
-                change_made = False
-
-                groups = match.groups();
-                start_year = groups[2]
-                if start_year != current_year:
-                    end_year = groups[4]
-                    if end_year is None or end_year != current_year:
-                        pre_string = groups[0]
-                        post_string = groups[5]
-                        space_between = groups[1]
-
-                        if post_string is None:
-                            post_string = ''
-
-                        l = (
-                              pre_string
-                            + 'Copyright'
-                            + space_between
-                            + start_year
-                            + ' - '
-                            + current_year
-                            + post_string
-                        )
+DEFAULT_BACKUP_STORE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "modify_license",
+    "backups"
+)
+"""
+The default backup store directory.
 
-                        actual_change_made = True
-                        change_made = True
+"""
 
-                        match = COPYRIGHT_DATE_RE.fullmatch(l)
+FICLONE = 0x40049409
+"""
+The Linux ioctl request that clones the extents of one file into another.
 
-            if actual_change_made:
-                file_content[i] = l
-                if len(l) > wrap_column:
-                    sys.stderr.write(
-                        "*** Warning: Line %d exceeds maximum line length.\n"
-                        "    %s"%(
-                            i + 1,
-                            l
-                        )
-                    )
+"""
 
-        i += 1
+REFLINK_UNSUPPORTED_DEVICES = set()
+"""
+The devices found not to support cloning file extents.  Clones are not
+attempted again on these devices.
 
-    return True
+"""
 
+BACKUP_COMPRESSION_LEVEL = 6
+"""
+The zlib compression level used for files in the backup store.
 
-def interesting_line(l, wrap_column):
-    """
-    Method that determines if a line is interesting as a copyright start or end.
+"""
 
-    :param l:
-        The line to be tested.
+BACKUP_RUN_ID_RE = re.compile(r'[0-9A-Za-z][0-9A-Za-z_-]*')
+"""
+Regular expression used to validate backup run identifiers.
 
-    :param wrap_column:
-        The maximum line length.  Interesting lines must be at least 90% of this
-        value.
+"""
 
-    :return:
-        Returns True if this line marks the start/end of a copyright header.
-        Returns False otherwise.
+BACKUP_PRUNE_GRACE_PERIOD = 60 * 60
+"""
+The time, in seconds, for which stored content is kept after it was last
+backed up, even if no run references it.  This protects content being backed
+up by a run that is still in progress when the store is pruned.
 
-    :type l:           str
-    :type wrap_column: int
-    :rtype:            bool
+"""
 
-    """
+GITIGNORE_FILENAME = ".gitignore"
+"""
+The name of the files holding git ignore rules.
 
-    result = (
-            (len(l) >= 0.5 * wrap_column)
-        and (   (l.count('*') >= 0.7 * len(l))
-             or (l.count('#') >= 0.7 * len(l))
-            )
-    )
+"""
 
-    return result
+SKIPPED_DIRECTORIES = frozenset(( BACKUP_DIRECTORY, ".git", ".hg", ".svn" ))
+"""
+Directories that are never entered when walking a directory tree.
 
+"""
 
-def update_license_header(
-    file_content,
-    wrap_column,
-    license_list
-    ):
-    """
-    Function that updates the license header data.
+DEFAULT_MAXIMUM_FILE_SIZE = 16 * 1024 * 1024
+"""
+The default size, in bytes, of the largest file processed.  Larger files are
+skipped without being read.  A value of 0 disables the limit.
 
-    :param file_content:
-        List of file lines.
+"""
 
-    :param wrap_column:
-        The maximum line length in characters.
+CLASSIFY_SCAN_SIZE = 8192
+"""
+The number of bytes read from the start of a file to decide if the file holds
+source text.
 
-    :param license_list:
-        A list of licenses to include in the file header.
+"""
 
-    :return:
-        Returns the updated file content or None on error.
+BINARY_MAGIC_NUMBERS = (
+    b'\x7fELF',                                 # ELF executables
+    b'\xca\xfe\xba\xbe',                        # Java classes, fat Mach-O
+    b'\xcf\xfa\xed\xfe',                        # Mach-O, 64-bit
+    b'\xce\xfa\xed\xfe',                        # Mach-O, 32-bit
+    b'\x00asm',                                 # WebAssembly
+    b'!<arch>\n',                               # Static libraries
+    b'%PDF-',
+    b'\x89PNG\r\n\x1a\n',
+    b'\xff\xd8\xff',                            # JPEG
+    b'GIF87a',
+    b'GIF89a',
+    b'RIFF',                                    # WAV, AVI, WebP
+    b'OggS',
+    b'fLaC',
+    b'ID3',                                     # MP3
+    b'wOFF',
+    b'wOF2',
+    b'PK\x03\x04',                              # Zip, jar, docx
+    b'PK\x05\x06',                              # Empty zip
+    b'\x1f\x8b',                                # gzip
+    b'BZh',
+    b'\xfd7zXZ\x00',                            # xz
+    b'\x28\xb5\x2f\xfd',                        # zstd
+    b'7z\xbc\xaf\x27\x1c',
+    b'Rar!\x1a\x07',
+    b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',        # Legacy Microsoft Office
+    b'SQLite format 3\x00'
+)
+"""
+Prefixes identifying common binary file formats.  Files starting with one of
+these prefixes are never processed.
 
-    :type file_content: list
-    :type wrap_column:  int
-    :type license_list: list
-    :rtype:             list or None
+"""
 
-    """
+GENERATED_MARKER_SCAN_SIZE = 2048
+"""
+The number of bytes at the start of a file searched for markers identifying
+generated files.
 
-    i = 0;
-    number_lines = len(file_content)
-    while i < number_lines                                   and \
-          not interesting_line(file_content[i], wrap_column)     :
-        i += 1
+"""
 
-    start_line = file_content[i]
+GENERATED_MARKER_RE = re.compile(
+    rb'@generated|DO NOT EDIT|(?i:auto-?generated|automatically generated)'
+)
+"""
+Regular expression used to find markers identifying generated files, such as
+"Code generated by protoc-gen-go. DO NOT EDIT." or "@generated".
 
-    i += 1
-    copyright_region_start = i;
+"""
 
-    copyright_date_line = None
-    line_start = None
-    while i < number_lines                                   and \
-          not interesting_line(file_content[i], wrap_column)     :
-        l = file_content[i]
-        if not copyright_date_line and COPYRIGHT_DATE_HEADER.match(l):
-            copyright_date_line = l
+HEADER_SCAN_SIZE = 16384
+"""
+The number of bytes at the start of a file that are searched for the copyright
+header in header-only mode.
 
-        if not line_start:
-            match = LINE_START_RE.match(l)
-            if match:
-                line_start = match.group(1)
+"""
 
-        i += 1
+HEADER_SCAN_LINES = 200
+"""
+The number of lines at the start of a file that are searched for the copyright
+header.  The whole header must lie within these lines.
 
-    copyright_region_end = i - 1
+"""
 
-    file_pre = file_content[:copyright_region_start]
-    file_post = file_content[i:]
+DEFAULT_BANNER_CHARACTERS = "*#"
+"""
+The characters that can make up the banner lines marking the start and end of
+a copyright header in any file.
 
-    if copyright_date_line is not None:
-        copyright_content = [ copyright_date_line ]
-    else:
-        copyright_content = []
+"""
 
-    indented_line_start = line_start + '  '
-    maximum_text_width = wrap_column - len(indented_line_start)
+COMMENT_SYNTAXES = {
+    "c" : {
+        "start_banner" : ( "/", "*", "" ),
+        "end_banner" : ( " ", "*", "/" ),
+        "line_marker" : "*",
+        "line_start" : " * "
+    },
+    "hash" : {
+        "start_banner" : ( "", "#", "" ),
+        "end_banner" : ( "", "#", "" ),
+        "line_marker" : "#",
+        "line_start" : "# "
+    },
+    "slash" : {
+        "start_banner" : ( "//", "*", "" ),
+        "end_banner" : ( "//", "*", "" ),
+        "line_marker" : "//",
+        "line_start" : "// "
+    },
+    "dash" : {
+        "start_banner" : ( "", "-", "" ),
+        "end_banner" : ( "", "-", "" ),
+        "line_marker" : "--",
+        "line_start" : "-- "
+    },
+    "semicolon" : {
+        "start_banner" : ( "", ";", "" ),
+        "end_banner" : ( "", ";", "" ),
+        "line_marker" : ";",
+        "line_start" : ";; "
+    },
+    "rst" : {
+        "start_banner" : ( ".. ", "#", "" ),
+        "end_banner" : ( ".. ", "#", "" ),
+        "line_marker" : "",
+        "line_start" : "   "
+    },
+    "markdown" : {
+        "start_banner" : ( "<!--", "#", "" ),
+        "end_banner" : ( "", "#", "-->" ),
+        "line_marker" : "",
+        "line_start" : "  "
+    }
+}
+"""
+The supported comment syntaxes.  Banners are described by a tuple holding the
+banner prefix, the character repeated to fill the banner and the banner
+suffix.  The line marker is the comment marker expected at the start of each
+line within the header.  The line start is used for each line of a header
+inserted into a file that lacks one.
 
-    for license in license_list:
-        copyright_content.append(line_start.rstrip())
-        header = LICENSE_TEXT[license]['header']
-        text = LICENSE_TEXT[license]['text']
+"""
 
-        copyright_content.append(line_start + header + ':')
+COMMENT_SYNTAX_FILENAMES = {
+    "makefile" : "hash",
+    "gnumakefile" : "hash",
+    "dockerfile" : "hash",
+    "cmakelists.txt" : "hash"
+}
+"""
+Comment syntaxes for file names that are recognized in full, keyed by the
+lower case file name.
 
-        text_lines = [ l.strip() for l in text.split("\n") ]
-        while text_lines[0] == '':
-            text_lines = text_lines[1:]
+"""
 
-        while text_lines[-1] == '':
-            text_lines = text_lines[:-1]
+COMMENT_SYNTAX_EXTENSIONS = {
+    ".c" : "c",
+    ".h" : "c",
+    ".cc" : "c",
+    ".cpp" : "c",
+    ".cxx" : "c",
+    ".hh" : "c",
+    ".hpp" : "c",
+    ".hxx" : "c",
+    ".m" : "c",
+    ".mm" : "c",
+    ".java" : "c",
+    ".css" : "c",
+    ".js" : "slash",
+    ".ts" : "slash",
+    ".go" : "slash",
+    ".rs" : "slash",
+    ".swift" : "slash",
+    ".kt" : "slash",
+    ".scala" : "slash",
+    ".cs" : "slash",
+    ".py" : "hash",
+    ".pyx" : "hash",
+    ".sh" : "hash",
+    ".bash" : "hash",
+    ".zsh" : "hash",
+    ".pl" : "hash",
+    ".pm" : "hash",
+    ".rb" : "hash",
+    ".r" : "hash",
+    ".tcl" : "hash",
+    ".cmake" : "hash",
+    ".mk" : "hash",
+    ".yml" : "hash",
+    ".yaml" : "hash",
+    ".toml" : "hash",
+    ".cfg" : "hash",
+    ".sql" : "dash",
+    ".lua" : "dash",
+    ".hs" : "dash",
+    ".adb" : "dash",
+    ".ads" : "dash",
+    ".vhd" : "dash",
+    ".vhdl" : "dash",
+    ".lisp" : "semicolon",
+    ".el" : "semicolon",
+    ".clj" : "semicolon",
+    ".scm" : "semicolon",
+    ".asm" : "semicolon",
+    ".ini" : "semicolon",
+    ".rst" : "rst",
+    ".md" : "markdown",
+    ".markdown" : "markdown"
+}
+"""
+Comment syntaxes keyed by lower case file extension.
 
-        paragraph = ''
-        for l in text_lines:
-            if l != "":
-                if paragraph == '':
-                    paragraph = l
-                else:
-                    paragraph += ' ' + l
-            else:
-                if paragraph != '':
-                    wrapped = textwrap3.wrap(paragraph, maximum_text_width)
-                    for l in wrapped:
-                        copyright_content.append(
-                            indented_line_start + l.strip()
-                        )
+"""
 
-                    copyright_content.append(indented_line_start)
+COMMENT_SYNTAX_INTERPRETERS = {
+    "sh" : "hash",
+    "bash" : "hash",
+    "zsh" : "hash",
+    "ksh" : "hash",
+    "python" : "hash",
+    "perl" : "hash",
+    "ruby" : "hash",
+    "tclsh" : "hash",
+    "Rscript" : "hash",
+    "lua" : "dash",
+    "node" : "slash"
+}
+"""
+Comment syntaxes keyed by the interpreter named on a "#!" line.  Version
+numbers are removed from interpreter names before they are looked up.
 
-                    paragraph = ''
+"""
 
-        if paragraph != '':
-            wrapped = textwrap3.wrap(paragraph, maximum_text_width)
-            for l in wrapped:
-                copyright_content.append(indented_line_start + l.strip())
+HEADER_PREAMBLE_RE = re.compile(
+    r'#!.*|[ \t\f]*#.*?coding[:=].*|<\?xml.*|<\?php.*'
+)
+"""
+Regular expression used to identify lines that must stay at the top of a file
+when a copyright header is inserted.
 
-    file_content = (
-          file_pre
-        + copyright_content
-        + file_post
-    )
+"""
 
-    return file_content
+CACHE_VERSION = 1
+"""
+The version of the cache file format.  Cache files with a different version
+are discarded.
 
+"""
 
-def process_file(
-    file_handle,
-    verbose,
-    license_list,
-    modify_dates,
-    create_backups,
-    wrap_column
-    ):
-    """
-    Function you can use to parse a single file.
+CACHE_MAXIMUM_AGE = 30 * 24 * 60 * 60
+"""
+The time, in seconds, after which cache entries for files that have not been
+seen are evicted.
 
-    :param file_handle:
-        The file handle to the file to be processed.
+"""
 
-    :param verbose:
-        If True, then verbose reporting will be generated.
+CACHE_MAXIMUM_ENTRIES = 1000000
+"""
+The maximum number of entries kept in the cache.  The entries for the files
+seen least recently are evicted first.
 
-    :param license_list:
-        An ordered list of licenses to be inserted into the source file header.
+"""
 
-    :param modify_dates:
-        If True, then copyright dates in the file should be updated.
+CACHE_MAXIMUM_HEADERS = 64
+"""
+The maximum number of compliant copyright headers remembered by the cache.
+The headers seen least recently are forgotten first.
 
-    :param create_backups:
-        If True, then a backup of the file should be created.
+"""
 
-    :param wrap_column:
-        The maximum column width for the file.
+LICENSE_BLOCK_CACHE_SIZE = 256
+"""
+The maximum number of rendered license blocks kept in memory.
 
-    :return:
-        Returns True if the operation was successful.  Returns False on error.
+"""
 
-    :type file_handle:    file
-    :type verbose:        bool
-    :type license_list:   list
-    :type modify_dates:   bool
-    :type create_backups: bool
-    :type wrap_column:    int
-    :rtype:               bool
+PENDING_JOBS_PER_WORKER = 4
+"""
+The number of files that can be queued for each worker process.  This bounds
+the memory used when files are supplied from a directory walk.
 
-    """
+"""
 
-    success = True
+MANIFEST_SETTINGS = {
+    "licenses" : ( "license_list", list ),
+    "wrap" : ( "wrap_column", int ),
+    "dates" : ( "modify_dates", bool ),
+    "header_only" : ( "header_only", bool ),
+    "copyright_holder" : ( "copyright_holder", str ),
+    "preserve" : ( "preserve_content", bool ),
+    "max_size" : ( "maximum_size", int ),
+    "skip_generated" : ( "skip_generated", bool ),
+    "cleanup" : ( "cleanup_tab_size", int ),
+    "include" : ( "include_patterns", list ),
+    "exclude" : ( "exclude_patterns", list ),
+    "cache" : ( "cache_filename", str )
+}
+"""
+The settings that can be used in a manifest, keyed by manifest key.  Each
+value holds the name of the setting and the expected type.  Lists must hold
+strings.
 
-    filename = os.path.abspath(file_handle.name)
-    if verbose:
-        sys.stdout.write("Processing %s:\n"%filename)
+"""
 
-    if create_backups:
-        ( filepath, basename ) = os.path.split(filename)
+COPYRIGHT_DATE_MARKER = "Copyright"
+"""
+The text that starts every copyright date.  Raw file content is searched for
+this text to find the lines that may hold copyright dates.
 
-        backup_path = os.path.join(filepath, BACKUP_DIRECTORY)
+"""
 
-        if not os.path.exists(backup_path):
-            if verbose:
-                sys.stdout.write(
-                    "    Creating backup directory %s\n"%backup_path
-                )
+COPYRIGHT_DATE_RE = re.compile(
+      COPYRIGHT_DATE_MARKER
+    + r'([^\S\n]+)(2[0-9]{3})'
+    + r'(?:[^\S\n]*-[^\S\n]*(2[0-9]{3}))?(?=[, ]|$)',
+    re.MULTILINE
+)
+"""
+Regular expression used to update copyright dates.  The expression is applied
+to the whole file content at once and never matches across lines.
 
-            try:
-                os.mkdir(backup_path)
-            except:
-                success = False
+"""
 
-            if not success:
-                sys.stderr.write(
-                    "*** Could not create backup directory %s\n"
-                    "    exiting...\n"%backup_path
-                )
-        elif not os.path.isdir(backup_path):
-            sys.stderr.write(
-                "*** Could not create backup directory %s, already exists "
-                "as file\n"
-                "    exiting...\n"%backup_path
-            )
-            success = False
+COPYRIGHT_DATE_HEADER = re.compile(r'\s*([#*]?|//)\s+Copyright\s+[0-9]{4}.*')
+"""
+Regular expression used to identify copyright dates.  The first of these lines
+are preserved and placed at the top of the copyright region.
 
-        if success:
-            backup_file = os.path.join(backup_path, basename)
-            if verbose:
-                sys.stdout.write("    Copying to %s\n"%backup_file)
+"""
 
-            try:
-                shutil.copyfile(filename, backup_file)
-            except:
-                success = False
+LINE_START_RE = re.compile(r'(\s*([*#]|//)*[^*#]).*')
+"""
+Regular expression used to identify how each line should be started.
 
-            if not success:
-                sys.stderr.write(
-                    "*** Could not copy file %s to %s\n"%(
-                        filename,
-                        backup_file
-                    )
-                )
+"""
 
-    if success:
-        if verbose:
-            sys.stdout.write("    Reading.\n")
-        try:
-            file_lines = file_handle.readlines()
-        except:
-            success = False
+TRAILING_WHITESPACE_RE = re.compile(r'[^\S\n]\n')
+"""
+Regular expression used to find lines that end with whitespace.
 
-        if success:
-            file_content = [ l.rstrip() for l in file_lines ]
-        else:
-            sys.stderr.write("*** Could not read file %s\n"%filename)
+"""
 
-    if success and modify_dates:
-        if verbose:
-            sys.stdout.write("    Updating copyright dates.\n")
+SOURCE_ENCODING_RE = re.compile(rb'coding[:=][ \t]*([-\w.]+)')
+"""
+Regular expression used to find coding declarations, such as
+"# -*- coding: latin-1 -*-", in the first two lines of a file.
 
-        success = modify_copyright_dates(file_content, wrap_column)
+"""
+
+DEFAULT_TAB_SIZE = 4
+"""
+The default distance between tab stops used when tabs are expanded.
+
+"""
+
+WHITESPACE_CLEANUP_RE = re.compile(
+    rb'^[^\n]*?(?:\t|[ \t\f\v]\r?$)[^\n]*',
+    re.MULTILINE
+)
+"""
+Regular expression used to find lines holding tabs or ending with whitespace
+in raw file content.  A carriage return ending a line is included in the
+match.
+
+"""
+
+FALLBACK_ENCODING = "latin-1"
+"""
+The encoding used when content preserved byte for byte can not be decoded
+using the encoding of the file.  Every byte maps to one character so the
+content is always written back unchanged.
+
+"""
+
+STREAM_READ_SIZE = 65536
+"""
+The maximum number of bytes read from an input stream at once.
+
+"""
+
+STREAM_DOCUMENT_DELIMITER = b'\0'
+"""
+The delimiter separating documents when several documents are read from one
+stream.
+
+"""
+
+DEFAULT_DEBOUNCE_DELAY = 0.25
+"""
+The default time, in seconds, to wait after the last change to a watched file
+before files are processed.  Editors often write a file several times when it
+is saved.
+
+"""
+
+DEFAULT_POLL_INTERVAL = 1.0
+"""
+The default time, in seconds, between scans of watched directories when
+inotify is not available.
+
+"""
+
+WATCH_WAKE_INTERVAL = 0.5
+"""
+The maximum time, in seconds, spent waiting for changes to watched files
+before checking if the watch should end.
+
+"""
+
+INOTIFY_CLOSE_WRITE = 0x00000008
+"""
+The inotify event reported when a file opened for writing is closed.
+
+"""
+
+INOTIFY_MOVED_TO = 0x00000080
+"""
+The inotify event reported when a file is moved into a watched directory.
+Files updated by replacing them are reported with this event.
+
+"""
+
+INOTIFY_CREATE = 0x00000100
+"""
+The inotify event reported when a file or directory is created.
+
+"""
+
+INOTIFY_QUEUE_OVERFLOW = 0x00004000
+"""
+The inotify event reported when events were discarded by the kernel.
+
+"""
+
+INOTIFY_IGNORED = 0x00008000
+"""
+The inotify event reported when a watch is removed, for example because the
+watched directory was deleted.
+
+"""
+
+INOTIFY_IS_DIRECTORY = 0x40000000
+"""
+The inotify flag indicating that an event applies to a directory.
+
+"""
+
+INOTIFY_WATCH_MASK = INOTIFY_CLOSE_WRITE | INOTIFY_MOVED_TO | INOTIFY_CREATE
+"""
+The inotify events requested for each watched directory.
+
+"""
+
+INOTIFY_EVENT_SIZE = 16
+"""
+The size, in bytes, of the fixed part of each inotify event.  The event is
+followed by the file name, padded with NUL characters.
+
+"""
+
+INOTIFY_READ_SIZE = 65536
+"""
+The maximum number of bytes of inotify events read at once.
+
+"""
+
+STATISTICS_PHASES = {
+    "read" : "Seconds spent reading and mapping files.",
+    "scan" : "Seconds spent scanning file content and calculating digests.",
+    "decode" : "Seconds spent decoding file content into lines.",
+    "dates" : "Seconds spent updating copyright dates.",
+    "header" : "Seconds spent rewriting license headers.",
+    "cleanup" : "Seconds spent expanding tabs and removing whitespace.",
+    "backup" : "Seconds spent creating backups.",
+    "write" : "Seconds spent writing updated files.",
+    "total" : "Wall clock seconds spent processing files."
+}
+"""
+The phases timed by the statistics.  Times for phases other than "total" are
+summed across worker processes and threads, so with several workers they can
+exceed the wall clock time.
+
+"""
+
+STATISTICS_WALL_CLOCK_PHASES = ( "total", )
+"""
+The phases that record wall clock time rather than time summed across
+workers.  Reports keep these phases separate from the other phases.
+
+"""
+
+STATISTICS_COUNTERS = {
+    "files_processed" : "Files read and processed.",
+    "files_cached" : "Files skipped because the cache shows they comply.",
+    "headers_cached" : "Files whose header the cache shows complies.",
+    "files_changed" : "Files that were, or in check mode would be, changed.",
+    "files_unchanged" : "Files processed that required no changes.",
+    "files_skipped" : "Binary, generated or oversized files skipped.",
+    "files_failed" : "Files that could not be processed.",
+    "bytes_read" : "Bytes read from files.",
+    "bytes_written" : "Bytes written to files.",
+    "lines_scanned" : "Lines scanned for copyright dates.",
+    "regex_matches" : "Copyright dates matching the date expression.",
+    "dates_updated" : "Copyright dates updated.",
+    "lines_cleaned" : "Lines with tabs expanded or whitespace removed.",
+    "backups_created" : "Backup files created.",
+    "backups_cloned" : "Backup files created by cloning file extents.",
+    "backups_linked" : "Backup files created as hard links.",
+    "backups_copied" : "Backup files created by copying file content."
+}
+"""
+The counters reported by the statistics.
+
+"""
+
+STATISTICS_METRIC_PREFIX = "modify_license"
+"""
+The prefix applied to metric names in Prometheus text reports.
+
+"""
+
+###############################################################################
+# Functions
+#
+
+def modify_copyright_dates(file_content, wrap_column, line_numbers = None):
+    """
+    Function that scans a file for copyright strings, modifying them as needed.
+    The whole file is searched in a single pass so every copyright date is
+    found, including lines holding several copyright strings.
+
+    :param file_content:
+        An array of file lines to be modified.
+
+    :param wrap_column:
+        The maximum allowed line width in characters.
+
+    :param line_numbers:
+        The one based line number of each line within the file, used to
+        report warnings.  If None, then the lines are numbered from 1.
+
+    :return:
+        Returns True on success.  Returns false on error.
+
+    :type file_content: list
+    :type wrap_column:  int
+    :type line_numbers: list or None
+    :rtype:             bool
+
+    """
+
+    current_year = str(time.localtime().tm_year)
+
+    text = "\n".join(file_content)
+
+    number_matches = 0
+    number_updates = 0
+    updated_lines = []
+    chunks = []
+    position = 0
+    line_number = 0
+    for match in COPYRIGHT_DATE_RE.finditer(text):
+        number_matches += 1
+
+        ( space_between, start_year, end_year ) = match.groups()
+        if start_year != current_year and end_year != current_year:
+            line_number += text.count("\n", position, match.start())
+            if not updated_lines or updated_lines[-1] != line_number:
+                updated_lines.append(line_number)
+
+            chunks.append(text[position:match.start()])
+            chunks.append(
+                  'Copyright'
+                + space_between
+                + start_year
+                + ' - '
+                + current_year
+            )
+
+            position = match.end()
+            number_updates += 1
+
+    if number_updates:
+        chunks.append(text[position:])
+        file_content[:] = "".join(chunks).split("\n")
+
+        for i in updated_lines:
+            l = file_content[i]
+            if len(l) > wrap_column:
+                sys.stderr.write(
+                    "*** Warning: Line %d exceeds maximum line length.\n"
+                    "    %s"%(
+                        line_numbers[i] if line_numbers is not None else i + 1,
+                        l
+                    )
+                )
+
+    STATISTICS.count("lines_scanned", len(file_content))
+    STATISTICS.count("regex_matches", number_matches)
+    STATISTICS.count("dates_updated", number_updates)
+
+    return True
+
+
+def interesting_line(
+    l,
+    wrap_column,
+    banner_characters = DEFAULT_BANNER_CHARACTERS
+    ):
+    """
+    Method that determines if a line is interesting as a copyright start or end.
+
+    :param l:
+        The line to be tested.
+
+    :param wrap_column:
+        The maximum line length.  Interesting lines must be at least 50% of
+        this value.
+
+    :param banner_characters:
+        The characters that can make up a banner line.
+
+    :return:
+        Returns True if this line marks the start/end of a copyright header.
+        Returns False otherwise.
+
+    :type l:                 str
+    :type wrap_column:       int
+    :type banner_characters: str
+    :rtype:                  bool
+
+    """
+
+    result = False
+    if len(l) >= 0.5 * wrap_column:
+        minimum_count = 0.7 * len(l)
+        for c in banner_characters:
+            if l.count(c) >= minimum_count:
+                result = True
+                break
+
+    return result
+
+
+def find_comment_syntax(filename, first_line = None):
+    """
+    Function that determines the comment syntax used by a file from the file
+    name or, for scripts, from the interpreter named on the first line.
+
+    :param filename:
+        The name of the file.  A value of None indicates that the file name is
+        unknown.
+
+    :param first_line:
+        The first line of the file.  A value of None indicates that the first
+        line is unknown.
+
+    :return:
+        Returns the name of the comment syntax, a key into COMMENT_SYNTAXES.
+        Returns None if the comment syntax is unknown.
+
+    :type filename:   str or None
+    :type first_line: str or None
+    :rtype:           str or None
+
+    """
+
+    syntax = None
+    if filename is not None:
+        basename = os.path.basename(filename).lower()
+        syntax = COMMENT_SYNTAX_FILENAMES.get(basename)
+        if syntax is None:
+            extension = os.path.splitext(basename)[1]
+            syntax = COMMENT_SYNTAX_EXTENSIONS.get(extension)
+
+    if syntax is None and first_line is not None and first_line[:2] == "#!":
+        arguments = first_line[2:].split()
+        if arguments and os.path.basename(arguments[0]) == "env":
+            arguments = [ a for a in arguments[1:] if a[:1] != "-" ]
+
+        if arguments:
+            interpreter = os.path.basename(arguments[0]).rstrip("0123456789.")
+            syntax = COMMENT_SYNTAX_INTERPRETERS.get(interpreter)
+
+    return syntax
+
+
+def find_banner_characters(syntax):
+    """
+    Function that determines the characters that can make up the banner lines
+    of a copyright header.
+
+    :param syntax:
+        The name of the comment syntax used by the file.  A value of None
+        indicates that the comment syntax is unknown.
+
+    :return:
+        Returns the characters that can make up a banner line.
+
+    :type syntax: str or None
+    :rtype:       str
+
+    """
+
+    result = DEFAULT_BANNER_CHARACTERS
+    if syntax is not None:
+        character = COMMENT_SYNTAXES[syntax]["start_banner"][1]
+        if character not in result:
+            result += character
+
+    return result
+
+
+@functools.lru_cache(maxsize = None)
+def header_line_patterns(syntax):
+    """
+    Function that determines the regular expressions used to parse the lines
+    within a copyright header.
+
+    :param syntax:
+        The name of the comment syntax used by the file.  A value of None
+        indicates that the comment syntax is unknown.
+
+    :return:
+        Returns a tuple holding the regular expressions used, in order, to
+        identify how each line should be started and a regular expression
+        used to identify the copyright date line.  If no line start
+        expression matches, then the line start of the comment syntax is
+        used.
+
+    :type syntax: str or None
+    :rtype:       tuple
+
+    """
+
+    if syntax is None:
+        result = ( ( LINE_START_RE, ), COPYRIGHT_DATE_HEADER )
+    else:
+        line_marker = COMMENT_SYNTAXES[syntax]["line_marker"]
+        if line_marker:
+            line_marker_re = r'(?:%s)+'%re.escape(line_marker)
+            line_start_res = (
+                re.compile(r'(\s*%s ?)(?=.)'%line_marker_re),
+                LINE_START_RE
+            )
+        else:
+            # Headers without a line marker are only identified by their
+            # indentation.
+            line_marker_re = r''
+            line_start_res = ()
+
+        copyright_date_re = re.compile(
+            r'\s*%s\s+Copyright\s+[0-9]{4}.*|%s'%(
+                line_marker_re,
+                COPYRIGHT_DATE_HEADER.pattern
+            )
+        )
+
+        result = ( line_start_res, copyright_date_re )
+
+    return result
+
+
+def render_banner(banner, wrap_column):
+    """
+    Function that renders a banner line marking the start or end of an inserted
+    copyright header.
+
+    :param banner:
+        Tuple holding the banner prefix, fill character and suffix.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :return:
+        Returns the rendered banner line.
+
+    :type banner:      tuple
+    :type wrap_column: int
+    :rtype:            str
+
+    """
+
+    ( prefix, character, suffix ) = banner
+    fill_length = max(wrap_column - len(prefix) - len(suffix), 1)
+
+    return prefix + character * fill_length + suffix
+
+
+def load_license_template(filename):
+    """
+    Function that reads a license template.  The first line of a template
+    holds the name of the license placed in headers.  The second line must be
+    blank.  The remaining lines hold the license text.  Blank lines separate
+    paragraphs of the text.
+
+    :param filename:
+        The name of the template file.
+
+    :return:
+        Returns a dictionary holding the "header" and "text" of the license.
+        An OSError is raised if the template can not be read.  A ValueError
+        is raised if the template is invalid.
+
+    :type filename: str
+    :rtype:         dict
+
+    """
+
+    with open(filename, "r", encoding = "utf-8") as file_handle:
+        lines = file_handle.read().split("\n")
+
+    header = lines[0].strip()
+    text = "\n".join(lines[2:])
+    if not header or len(lines) < 3 or lines[1].strip() or not text.strip():
+        raise ValueError("Invalid license template %s"%filename)
+
+    return { "header" : header, "text" : text }
+
+
+def resolve_license(license, template_directories = ()):
+    """
+    Function that finds the license selected by a license name or SPDX
+    identifier.  Licenses built into this script are selected by their name
+    in LICENSE_TEXT or their identifier in LICENSE_SPDX_IDS.  Other licenses
+    are loaded from the template named after the identifier in the first
+    template directory holding one, then added to REGISTERED_LICENSES.  Only
+    the selected template is read, so the number of templates available does
+    not affect start up time.
+
+    :param license:
+        The license name or SPDX identifier.
+
+    :param template_directories:
+        The directories searched for templates before
+        LICENSE_TEMPLATE_DIRECTORY.
+
+    :return:
+        Returns the name used to select the license in license lists.  A
+        ValueError is raised if the license is unknown or its template can
+        not be loaded.
+
+    :type license:              str
+    :type template_directories: list
+    :rtype:                     str
+
+    """
+
+    if license in LICENSE_TEXT or license in REGISTERED_LICENSES:
+        return license
+
+    if license in LICENSE_SPDX_IDS:
+        return LICENSE_SPDX_IDS[license]
+
+    if SPDX_ID_RE.fullmatch(license):
+        directories = list(template_directories)
+        directories.append(LICENSE_TEMPLATE_DIRECTORY)
+        for directory in directories:
+            filename = os.path.join(
+                directory,
+                license + LICENSE_TEMPLATE_EXTENSION
+            )
+
+            try:
+                REGISTERED_LICENSES[license] = load_license_template(filename)
+            except FileNotFoundError:
+                continue
+            except (OSError, UnicodeDecodeError) as e:
+                raise ValueError(
+                    "Could not load license template %s: %s"%(
+                        filename,
+                        str(e)
+                    )
+                )
+
+            return license
+
+    raise ValueError("Unknown license %s"%license)
+
+
+def resolve_licenses(licenses, template_directories = ()):
+    """
+    Function that finds the licenses selected by a list of license names and
+    SPDX identifiers.  A license selected more than once, for example as
+    "mit" and as "MIT", is only kept where it first appears.  See
+    resolve_license.
+
+    :param licenses:
+        The license names or SPDX identifiers.
+
+    :param template_directories:
+        The directories searched for templates before
+        LICENSE_TEMPLATE_DIRECTORY.
+
+    :return:
+        Returns the names used to select the licenses in license lists, in
+        order.  A ValueError is raised if a license is unknown or its
+        template can not be loaded.
+
+    :type licenses:             list
+    :type template_directories: list
+    :rtype:                     list
+
+    """
+
+    return list(
+        dict.fromkeys(
+            [ resolve_license(l, template_directories) for l in licenses ]
+        )
+    )
+
+
+def register_licenses(licenses):
+    """
+    Function that adds licenses loaded from templates to
+    REGISTERED_LICENSES.  Used to pass the registered licenses to worker
+    processes.
+
+    :param licenses:
+        The licenses to add, keyed by SPDX identifier.
+
+    :type licenses: dict
+
+    """
+
+    REGISTERED_LICENSES.update(licenses)
+
+
+def license_terms(license):
+    """
+    Function that finds the header and text of a license.
+
+    :param license:
+        The name of a license in LICENSE_TEXT or the SPDX identifier of a
+        license in REGISTERED_LICENSES.
+
+    :return:
+        Returns a dictionary holding the "header" and "text" of the license.
+
+    :type license: str
+    :rtype:        dict
+
+    """
+
+    if license in LICENSE_TEXT:
+        terms = LICENSE_TEXT[license]
+    else:
+        terms = REGISTERED_LICENSES[license]
+
+    return terms
+
+
+def render_license_block(license, line_start, wrap_column):
+    """
+    Function that renders the lines used to include a single license in a
+    copyright header.  See render_license_text.
+
+    :param license:
+        The name of the license to be rendered.
+
+    :param line_start:
+        The string used to start each line in the copyright header.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :return:
+        Returns a tuple holding the rendered lines.
+
+    :type license:     str
+    :type line_start:  str
+    :type wrap_column: int
+    :rtype:            tuple
+
+    """
+
+    terms = license_terms(license)
+    return render_license_text(
+        terms['header'],
+        terms['text'],
+        line_start,
+        wrap_column
+    )
+
+
+@functools.lru_cache(maxsize = LICENSE_BLOCK_CACHE_SIZE)
+def render_license_text(header, text, line_start, wrap_column):
+    """
+    Function that renders the header and text of a license.  Results are
+    cached as most files in a tree share the same few combinations of
+    license, line start and wrap column.  The cache is keyed by the license
+    terms rather than the license name so a license loaded again from a
+    different template is never rendered from stale text.
+
+    :param header:
+        The license header, placed on the first line.
+
+    :param text:
+        The license text, wrapped into paragraphs.
+
+    :param line_start:
+        The string used to start each line in the copyright header.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :return:
+        Returns a tuple holding the rendered lines.
+
+    :type header:      str
+    :type text:        str
+    :type line_start:  str
+    :type wrap_column: int
+    :rtype:            tuple
+
+    """
+
+    import textwrap3
+
+    indented_line_start = line_start + '  '
+    maximum_text_width = wrap_column - len(indented_line_start)
+
+    rendered = [ line_start.rstrip(), line_start + header + ':' ]
+
+    text_lines = [ l.strip() for l in text.split("\n") ]
+    while text_lines[0] == '':
+        text_lines = text_lines[1:]
+
+    while text_lines[-1] == '':
+        text_lines = text_lines[:-1]
+
+    paragraph = ''
+    for l in text_lines:
+        if l != "":
+            if paragraph == '':
+                paragraph = l
+            else:
+                paragraph += ' ' + l
+        else:
+            if paragraph != '':
+                wrapped = textwrap3.wrap(paragraph, maximum_text_width)
+                for l in wrapped:
+                    rendered.append(indented_line_start + l.strip())
+
+                rendered.append(indented_line_start)
+
+                paragraph = ''
+
+    if paragraph != '':
+        wrapped = textwrap3.wrap(paragraph, maximum_text_width)
+        for l in wrapped:
+            rendered.append(indented_line_start + l.strip())
+
+    return tuple(rendered)
+
+
+def insert_license_header(
+    file_content,
+    wrap_column,
+    license_list,
+    syntax,
+    copyright_holder
+    ):
+    """
+    Function that inserts a new copyright header into a file that lacks one.
+    The header is placed after any lines, such as a "#!" line, that must stay
+    at the top of the file.
+
+    :param file_content:
+        List of file lines.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :param license_list:
+        A list of licenses to include in the file header.
+
+    :param syntax:
+        The name of the comment syntax used by the file.
+
+    :param copyright_holder:
+        The copyright holder named in the header.
+
+    :return:
+        Returns the updated file content.
+
+    :type file_content:     list
+    :type wrap_column:      int
+    :type license_list:     list
+    :type syntax:           str
+    :type copyright_holder: str
+    :rtype:                 list
+
+    """
+
+    comment_syntax = COMMENT_SYNTAXES[syntax]
+    line_start = comment_syntax["line_start"]
+
+    i = 0
+    number_lines = len(file_content)
+    while i < number_lines and HEADER_PREAMBLE_RE.match(file_content[i]):
+        i += 1
+
+    header = [
+        render_banner(comment_syntax["start_banner"], wrap_column),
+        "%sCopyright %d %s"%(
+            line_start,
+            time.localtime().tm_year,
+            copyright_holder
+        )
+    ]
+
+    for license in license_list:
+        header.extend(render_license_block(license, line_start, wrap_column))
+
+    header.append(render_banner(comment_syntax["end_banner"], wrap_column))
+
+    if i < number_lines and file_content[i] != "":
+        header.append("")
+
+    return file_content[:i] + header + file_content[i:]
+
+
+def update_license_header(
+    file_content,
+    wrap_column,
+    license_list,
+    filename = None,
+    copyright_holder = None
+    ):
+    """
+    Function that updates the license header data.  Only the first
+    HEADER_SCAN_LINES lines are searched for the header.  Files without a
+    header are left unchanged unless the comment syntax of the file is known
+    and a copyright holder is provided, in which case a new header is
+    inserted.
+
+    :param file_content:
+        List of file lines.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :param license_list:
+        A list of licenses to include in the file header.
+
+    :param filename:
+        The name of the file, used to determine the comment syntax.  A value
+        of None indicates that the file name is unknown.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  A value of None
+        prevents headers from being inserted.
+
+    :return:
+        Returns the updated file content or None on error.
+
+    :type file_content:     list
+    :type wrap_column:      int
+    :type license_list:     list
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :rtype:                 list or None
+
+    """
+
+    syntax = find_comment_syntax(
+        filename,
+        file_content[0] if file_content else None
+    )
+    characters = find_banner_characters(syntax)
+
+    ( line_start_res, copyright_date_re ) = header_line_patterns(syntax)
+
+    i = 0
+    number_lines = min(len(file_content), HEADER_SCAN_LINES)
+    while i < number_lines                                               and \
+          not interesting_line(file_content[i], wrap_column, characters)     :
+        i += 1
+
+    if i >= number_lines:
+        if syntax is not None and copyright_holder:
+            return insert_license_header(
+                file_content,
+                wrap_column,
+                license_list,
+                syntax,
+                copyright_holder
+            )
+
+        if filename is not None:
+            sys.stderr.write(
+                "*** Warning: No copyright header found in %s.\n"%filename
+            )
+
+        return file_content
+
+    i += 1
+    copyright_region_start = i;
+
+    copyright_date_line = None
+    line_start = None
+    while i < number_lines                                               and \
+          not interesting_line(file_content[i], wrap_column, characters)     :
+        l = file_content[i]
+        if not copyright_date_line and copyright_date_re.match(l):
+            copyright_date_line = l
+
+        if not line_start:
+            for line_start_re in line_start_res:
+                match = line_start_re.match(l)
+                if match:
+                    line_start = match.group(1)
+                    break
+
+        i += 1
+
+    if i >= number_lines:
+        if filename is not None:
+            sys.stderr.write(
+                "*** Warning: Incomplete copyright header in %s.\n"%filename
+            )
+
+        return file_content
+
+    if not line_start:
+        if syntax is not None:
+            line_start = COMMENT_SYNTAXES[syntax]["line_start"]
+        else:
+            line_start = "# "
+
+    file_pre = file_content[:copyright_region_start]
+    file_post = file_content[i:]
+
+    if copyright_date_line is not None:
+        copyright_content = [ copyright_date_line ]
+    else:
+        copyright_content = []
+
+    for license in license_list:
+        copyright_content.extend(
+            render_license_block(license, line_start, wrap_column)
+        )
+
+    file_content = (
+          file_pre
+        + copyright_content
+        + file_post
+    )
+
+    return file_content
+
+
+def gitignore_pattern_re(pattern):
+    """
+    Function that converts a single .gitignore glob pattern into a regular
+    expression.
+
+    :param pattern:
+        The glob pattern, with any leading "!", leading "/" and trailing "/"
+        already removed.
+
+    :return:
+        Returns the compiled regular expression.  The expression should be
+        matched against "/" separated paths.
+
+    :type pattern: str
+    :rtype:        re.Pattern
+
+    """
+
+    expression = ''
+    i = 0
+    pattern_length = len(pattern)
+    while i < pattern_length:
+        if pattern.startswith('**/', i):
+            expression += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == pattern_length:
+            expression += '/.*'
+            i += 3
+        elif pattern.startswith('**', i):
+            expression += '.*'
+            i += 2
+        else:
+            c = pattern[i]
+            if c == '*':
+                expression += '[^/]*'
+            elif c == '?':
+                expression += '[^/]'
+            elif c == '[':
+                end = pattern.find(']', i + 2)
+                if end < 0:
+                    expression += re.escape(c)
+                else:
+                    character_class = pattern[i + 1:end].replace('\\', '\\\\')
+                    if character_class[0] == '!':
+                        character_class = '^' + character_class[1:]
+
+                    expression += '[' + character_class + ']'
+                    i = end
+            elif c == '\\' and i + 1 < pattern_length:
+                i += 1
+                expression += re.escape(pattern[i])
+            else:
+                expression += re.escape(c)
+
+            i += 1
+
+    return re.compile(expression)
+
+
+def load_gitignore(directory, relative_directory):
+    """
+    Function that loads the .gitignore rules held in a directory.
+
+    :param directory:
+        The directory to check for a .gitignore file.
+
+    :param relative_directory:
+        The path of the directory relative to the root of the walk, using "/"
+        as a separator.  An empty string indicates the root.
+
+    :return:
+        Returns a list of rules.  Each rule is a tuple holding the relative
+        directory, the compiled pattern, a flag indicating if the rule is
+        negated, a flag indicating if the rule only applies to directories
+        and a flag indicating if the pattern applies to the full relative
+        path rather than just the basename.
+
+    :type directory:          str
+    :type relative_directory: str
+    :rtype:                   list
+
+    """
+
+    rules = []
+    try:
+        with open(
+                os.path.join(directory, GITIGNORE_FILENAME),
+                "r",
+                encoding = "utf-8",
+                errors = "replace"
+            ) as file_handle:
+            lines = file_handle.read().splitlines()
+    except OSError:
+        lines = []
+
+    for l in lines:
+        l = l.rstrip()
+        if l and not l.startswith('#'):
+            negated = l.startswith('!')
+            if negated:
+                l = l[1:]
+            elif l.startswith('\\'):
+                l = l[1:]
+
+            directory_only = l.endswith('/')
+            l = l.rstrip('/')
+
+            anchored = '/' in l
+            l = l.lstrip('/')
+
+            if l:
+                rules.append(
+                    (
+                        relative_directory,
+                        gitignore_pattern_re(l),
+                        negated,
+                        directory_only,
+                        anchored
+                    )
+                )
+
+    return rules
+
+
+def gitignore_matches(relative_path, is_directory, rules):
+    """
+    Function that determines if a path is ignored by a list of .gitignore
+    rules.  As with git, the last matching rule wins.
+
+    :param relative_path:
+        The path relative to the root of the walk, using "/" as a separator.
+
+    :param is_directory:
+        If True, then the path is a directory.
+
+    :param rules:
+        The rules to apply, as returned by load_gitignore.
+
+    :return:
+        Returns True if the path should be ignored.  Returns False otherwise.
+
+    :type relative_path: str
+    :type is_directory:  bool
+    :type rules:         list
+    :rtype:              bool
+
+    """
+
+    ignored = False
+    basename = relative_path.rsplit('/', 1)[-1]
+    for base, pattern, negated, directory_only, anchored in rules:
+        if not directory_only or is_directory:
+            if base:
+                if not relative_path.startswith(base + '/'):
+                    continue
+
+                path = relative_path[len(base) + 1:]
+            else:
+                path = relative_path
+
+            if pattern.fullmatch(path if anchored else basename):
+                ignored = not negated
+
+    return ignored
+
+
+def glob_matches(relative_path, patterns):
+    """
+    Function that determines if a path matches any of a list of include or
+    exclude globs.  Globs containing a "/" are matched against the path
+    relative to the root of the walk.  Other globs are matched against the
+    basename.
+
+    :param relative_path:
+        The path relative to the root of the walk, using "/" as a separator.
+
+    :param patterns:
+        The list of glob patterns.
+
+    :return:
+        Returns True if any pattern matches.  Returns False otherwise.
+
+    :type relative_path: str
+    :type patterns:      list
+    :rtype:              bool
+
+    """
+
+    basename = relative_path.rsplit('/', 1)[-1]
+    for pattern in patterns:
+        if '/' in pattern:
+            if fnmatch.fnmatchcase(relative_path, pattern.strip('/')):
+                return True
+        elif fnmatch.fnmatchcase(basename, pattern):
+            return True
+
+    return False
+
+
+def walk_directory(
+    root,
+    include_patterns,
+    exclude_patterns,
+    honour_gitignore
+    ):
+    """
+    Generator that walks a directory tree, yielding the files to be
+    processed.  Directories are visited depth first in sorted order.  Only a
+    single directory listing is held in memory for each level of the tree.
+
+    :param root:
+        The directory to walk.
+
+    :param include_patterns:
+        A list of globs.  If not empty, then only files matching one of these
+        globs will be yielded.
+
+    :param exclude_patterns:
+        A list of globs.  Files and directories matching these globs will be
+        skipped.
+
+    :param honour_gitignore:
+        If True, then .gitignore files found during the walk will be honoured.
+
+    :return:
+        Yields the path of each file to be processed.
+
+    :type root:             str
+    :type include_patterns: list
+    :type exclude_patterns: list
+    :type honour_gitignore: bool
+    :rtype:                 generator
+
+    """
+
+    pending = [ ( root, '', [] ) ]
+    while pending:
+        ( directory, relative_directory, rules ) = pending.pop()
+
+        if honour_gitignore:
+            rules = rules + load_gitignore(directory, relative_directory)
+
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key = lambda e: e.name)
+        except OSError as e:
+            sys.stderr.write(
+                "*** Could not read directory %s: %s\n"%(directory, str(e))
+            )
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if relative_directory:
+                relative_path = relative_directory + '/' + entry.name
+            else:
+                relative_path = entry.name
+
+            try:
+                is_directory = entry.is_dir(follow_symlinks = False)
+                is_file = entry.is_file(follow_symlinks = False)
+            except OSError:
+                continue
+
+            if is_directory:
+                if     entry.name not in SKIPPED_DIRECTORIES                  \
+                   and not glob_matches(relative_path, exclude_patterns)      \
+                   and not gitignore_matches(relative_path, True, rules)     :
+                    subdirectories.append(
+                        ( entry.path, relative_path, rules )
+                    )
+            elif is_file:
+                if     (   not include_patterns
+                        or glob_matches(relative_path, include_patterns)
+                       )                                                     \
+                   and not glob_matches(relative_path, exclude_patterns)      \
+                   and not gitignore_matches(relative_path, False, rules)    :
+                    yield entry.path
+
+        pending.extend(reversed(subdirectories))
+
+
+def walk_source_files(
+    paths,
+    include_patterns = (),
+    exclude_patterns = (),
+    honour_gitignore = True
+    ):
+    """
+    Generator that yields the files to be processed.  Paths that name
+    directories are walked recursively.  Other paths are yielded as is.
+
+    :param paths:
+        The list of files and directories provided by the user.
+
+    :param include_patterns:
+        A list of globs.  If not empty, then only files found in directories
+        matching one of these globs will be yielded.
+
+    :param exclude_patterns:
+        A list of globs used to skip files and directories found in
+        directories.
+
+    :param honour_gitignore:
+        If True, then .gitignore files found in directories will be honoured.
+
+    :return:
+        Yields the path of each file to be processed.
+
+    :type paths:            list
+    :type include_patterns: list
+    :type exclude_patterns: list
+    :type honour_gitignore: bool
+    :rtype:                 generator
+
+    """
+
+    for path in paths:
+        if os.path.isdir(path):
+            yield from walk_directory(
+                path,
+                include_patterns,
+                exclude_patterns,
+                honour_gitignore
+            )
+        else:
+            yield path
+
+
+def path_selected(
+    root,
+    path,
+    is_directory,
+    include_patterns,
+    exclude_patterns,
+    honour_gitignore
+    ):
+    """
+    Function that determines if a path within a directory tree would be
+    selected by walk_directory.  This allows single files reported as changed
+    to be checked without walking the tree.
+
+    :param root:
+        The root of the directory tree.
+
+    :param path:
+        The path to check.  The path must be within the root.
+
+    :param is_directory:
+        If True, then the path is a directory.  A directory is selected if
+        walk_directory would descend into it.
+
+    :param include_patterns:
+        A list of globs.  If not empty, then only files matching one of these
+        globs are selected.
+
+    :param exclude_patterns:
+        A list of globs.  Files and directories matching these globs are not
+        selected.
+
+    :param honour_gitignore:
+        If True, then .gitignore files between the root and the path will be
+        honoured.
+
+    :return:
+        Returns True if the path is selected.  Returns False otherwise.
+
+    :type root:             str
+    :type path:             str
+    :type is_directory:     bool
+    :type include_patterns: list
+    :type exclude_patterns: list
+    :type honour_gitignore: bool
+    :rtype:                 bool
+
+    """
+
+    relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+    if relative_path == '..' or relative_path.startswith('../'):
+        return False
+
+    if relative_path == '.':
+        return is_directory
+
+    directory = root
+    relative_directory = ''
+    rules = []
+    for name in relative_path.split('/'):
+        if honour_gitignore:
+            rules = rules + load_gitignore(directory, relative_directory)
+
+        if relative_directory:
+            relative_directory = relative_directory + '/' + name
+        else:
+            relative_directory = name
+
+        if relative_directory == relative_path and not is_directory:
+            return (
+                    (   not include_patterns
+                     or glob_matches(relative_path, include_patterns)
+                    )
+                and not glob_matches(relative_path, exclude_patterns)
+                and not gitignore_matches(relative_path, False, rules)
+            )
+
+        if    name in SKIPPED_DIRECTORIES                                   \
+           or glob_matches(relative_directory, exclude_patterns)            \
+           or gitignore_matches(relative_directory, True, rules)           :
+            return False
+
+        directory = os.path.join(directory, name)
+
+    return True
+
+
+def git_changed_files(
+    since,
+    staged,
+    pathspecs = (),
+    include_patterns = (),
+    exclude_patterns = ()
+    ):
+    """
+    Function that obtains the files changed in the local git repository.
+    Deleted files are not reported.
+
+    :param since:
+        The git reference to compare against.  A value of None compares
+        against the index, or against HEAD if staged is True.
+
+    :param staged:
+        If True, then only changes staged in the index are reported.
+
+    :param pathspecs:
+        An optional list of paths used to limit the files reported.
+
+    :param include_patterns:
+        A list of globs.  If not empty, then only files matching one of these
+        globs will be reported.  Globs are matched against paths relative to
+        the top of the repository.
+
+    :param exclude_patterns:
+        A list of globs used to skip files.
+
+    :return:
+        Returns a list of absolute filenames.  Returns None on error.
+
+    :type since:            str or None
+    :type staged:           bool
+    :type pathspecs:        list
+    :type include_patterns: list
+    :type exclude_patterns: list
+    :rtype:                 list or None
+
+    """
+
+    import subprocess
+
+    try:
+        top_level = os.fsdecode(
+            subprocess.run(
+                [ "git", "rev-parse", "--show-toplevel" ],
+                check = True,
+                capture_output = True
+            ).stdout.strip()
+        )
+
+        command = [ "git", "diff", "--name-only", "-z", "--diff-filter=ACMR" ]
+        if staged:
+            command.append("--cached")
+
+        if since is not None:
+            command.append(since)
+
+        command.append("--")
+        command.extend(pathspecs)
+
+        output = subprocess.run(
+            command,
+            check = True,
+            capture_output = True
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        sys.stderr.write(
+            "*** Could not read changed files from git:\n    %s\n"%(
+                e.stderr.decode("utf-8", "replace").strip()
+            )
+        )
+        filenames = None
+    except OSError as e:
+        sys.stderr.write("*** Could not run git: %s\n"%str(e))
+        filenames = None
+    else:
+        filenames = []
+        for relative_path in os.fsdecode(output).split('\0'):
+            if     relative_path                                          \
+               and BACKUP_DIRECTORY not in relative_path.split('/')[:-1]  \
+               and (   not include_patterns
+                    or glob_matches(relative_path, include_patterns)
+                   )                                                      \
+               and not glob_matches(relative_path, exclude_patterns)     :
+                filename = os.path.join(top_level, relative_path)
+                if os.path.isfile(filename):
+                    filenames.append(filename)
+
+    return filenames
+
+
+def clone_file(filename, backup_file):
+    """
+    Function that creates a backup copy of a file as cheaply as possible.
+    The file's extents are cloned where the filesystem supports it.
+    Otherwise a hard link is used.  A hard link is a safe backup because
+    files are always updated by replacing them, leaving the original inode
+    untouched.  The file is only copied if neither is possible.  Any existing
+    backup file is replaced.
+
+    :param filename:
+        The name of the file to be backed up.
+
+    :param backup_file:
+        The name of the backup file.  The backup must be on the same
+        filesystem as the file for it to be cloned or linked.
+
+    :return:
+        Returns the method used, either "cloned", "linked" or "copied".
+
+    :type filename:    str
+    :type backup_file: str
+    :rtype:            str
+
+    """
+
+    import shutil
+
+    ( backup_path, backup_basename ) = os.path.split(backup_file)
+    temporary_filename = os.path.join(
+        backup_path,
+        ".%s.%s.tmp"%(backup_basename, os.urandom(4).hex())
+    )
+
+    backup_method = None
+    file_device = os.stat(filename).st_dev
+    if fcntl is not None and file_device not in REFLINK_UNSUPPORTED_DEVICES:
+        try:
+            with open(filename, "rb") as source_handle, \
+                 open(temporary_filename, "xb") as backup_handle :
+                fcntl.ioctl(
+                    backup_handle.fileno(),
+                    FICLONE,
+                    source_handle.fileno()
+                )
+
+            os.replace(temporary_filename, backup_file)
+            backup_method = "cloned"
+        except OSError:
+            REFLINK_UNSUPPORTED_DEVICES.add(file_device)
+            try:
+                os.unlink(temporary_filename)
+            except OSError:
+                pass
+
+    if backup_method is None:
+        try:
+            os.link(filename, temporary_filename)
+            os.replace(temporary_filename, backup_file)
+            backup_method = "linked"
+        except OSError:
+            try:
+                os.unlink(temporary_filename)
+            except OSError:
+                pass
+
+    if backup_method is None:
+        shutil.copyfile(filename, backup_file)
+        backup_method = "copied"
+
+    return backup_method
+
+
+def create_backup(filename, verbose):
+    """
+    Function that copies a file into the backup directory next to it.
+
+    :param filename:
+        The absolute path of the file to be backed up.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type filename: str
+    :type verbose:  bool
+    :rtype:         bool
+
+    """
+
+    success = True
+
+    ( filepath, basename ) = os.path.split(filename)
+
+    backup_path = os.path.join(filepath, BACKUP_DIRECTORY)
+
+    if not os.path.exists(backup_path):
+        if verbose:
+            sys.stdout.write(
+                "    Creating backup directory %s\n"%backup_path
+            )
+
+        try:
+            os.mkdir(backup_path)
+        except FileExistsError:
+            # Another worker process may have created the directory.
+            pass
+        except:
+            success = False
+
+        if not success:
+            sys.stderr.write(
+                "*** Could not create backup directory %s\n"
+                "    exiting...\n"%backup_path
+            )
+    elif not os.path.isdir(backup_path):
+        sys.stderr.write(
+            "*** Could not create backup directory %s, already exists "
+            "as file\n"
+            "    exiting...\n"%backup_path
+        )
+        success = False
+
+    if success:
+        backup_file = os.path.join(backup_path, basename)
+        if verbose:
+            sys.stdout.write("    Copying to %s\n"%backup_file)
+
+        try:
+            with STATISTICS.phase("backup"):
+                backup_method = clone_file(filename, backup_file)
+        except:
+            success = False
+        else:
+            STATISTICS.count("backups_created")
+            STATISTICS.count("backups_%s"%backup_method)
+
+        if not success:
+            sys.stderr.write(
+                "*** Could not copy file %s to %s\n"%(
+                    filename,
+                    backup_file
+                )
+            )
+
+    return success
+
+
+def backup_file(filename, raw_content, file_mode, verbose, backup_store):
+    """
+    Function that backs up a file before it is modified.
+
+    :param filename:
+        The absolute path of the file to be backed up.
+
+    :param raw_content:
+        The original file content.
+
+    :param file_mode:
+        The original file mode.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param backup_store:
+        The backup store to place the backup in.  If None, then the file is
+        copied into the backup directory next to it.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type filename:     str
+    :type raw_content:  bytes-like
+    :type file_mode:    int
+    :type verbose:      bool
+    :type backup_store: BackupStore or None
+    :rtype:             bool
+
+    """
+
+    if backup_store is None:
+        success = create_backup(filename, verbose)
+    else:
+        success = backup_store.backup(
+            filename,
+            raw_content,
+            file_mode,
+            verbose
+        )
+
+    return success
+
+
+def copyright_line_spans(raw_content, offset = 0):
+    """
+    Generator that finds the lines of raw file content holding
+    COPYRIGHT_DATE_MARKER.  As COPYRIGHT_DATE_RE never matches across lines,
+    only these lines can hold copyright dates.
+
+    :param raw_content:
+        The raw file content.
+
+    :param offset:
+        The offset, at the start of a line, from which lines are searched.
+
+    :return:
+        Yields a tuple holding the offsets of the start and end of each line.
+        The end excludes the line ending, including the carriage return of a
+        CRLF line ending.
+
+    :type raw_content: bytes
+    :type offset:      int
+    :rtype:            generator
+
+    """
+
+    marker = COPYRIGHT_DATE_MARKER.encode("ascii")
+    position = raw_content.find(marker, offset)
+    while position >= 0:
+        line_start = max(raw_content.rfind(b'\n', 0, position) + 1, offset)
+        line_end = raw_content.find(b'\n', position)
+        if line_end < 0:
+            line_end = len(raw_content)
+
+        position = raw_content.find(marker, line_end)
+        if raw_content.endswith(b'\r', line_start, line_end):
+            line_end -= 1
+
+        yield ( line_start, line_end )
+
+
+def copyright_line_current(line, current_year):
+    """
+    Function that determines if every copyright date in a line includes the
+    current year.
+
+    :param line:
+        The decoded line.
+
+    :param current_year:
+        The current year.
+
+    :return:
+        Returns True if modify_copyright_dates would leave the line
+        unchanged.  Returns False otherwise.
+
+    :type line:         str
+    :type current_year: str
+    :rtype:             bool
+
+    """
+
+    for match in COPYRIGHT_DATE_RE.finditer(line):
+        ( space_between, start_year, end_year ) = match.groups()
+        if start_year != current_year and end_year != current_year:
+            return False
+
+    return True
+
+
+def copyright_dates_current(raw_content, current_year):
+    """
+    Function that performs a fast scan of raw file content to determine if
+    every copyright date already includes the current year.  Only the lines
+    found by copyright_line_spans are decoded.  Each is checked with
+    COPYRIGHT_DATE_RE as seen by update_raw_copyright_dates and, with any
+    lone carriage returns treated as line breaks and trailing whitespace
+    removed, as seen by update_raw_lines.  A file is therefore never reported
+    as current when either would change a date.
+
+    :param raw_content:
+        The raw file content.
+
+    :param current_year:
+        The current year.
+
+    :return:
+        Returns True if no copyright date needs to be updated.  Returns False
+        if the file contains dates that need to be updated.
+
+    :type raw_content:  bytes
+    :type current_year: str
+    :rtype:             bool
+
+    """
+
+    result = True
+    encoding = None
+    for line_start, line_end in copyright_line_spans(raw_content):
+        if encoding is None:
+            encoding = find_content_encoding(raw_content)
+
+        ( line, line_encoding ) = decode_raw_text(
+            raw_content[line_start:line_end],
+            encoding
+        )
+
+        if    not copyright_line_current(line, current_year)                 \
+           or not all(
+                  [
+                      copyright_line_current(l.rstrip(), current_year)
+                      for l in line.split("\r")
+                  ]
+              )                                                               :
+            result = False
+            break
+
+    return result
+
+
+def content_normalized(raw_content, offset = 0):
+    """
+    Function that determines if raw file content is already stored the way
+    update_raw_content writes it: UTF-8 with Unix line endings, no trailing
+    whitespace and a final line ending.
+
+    :param raw_content:
+        The raw file content.
+
+    :param offset:
+        The offset of the first line checked for trailing whitespace.  Lines
+        before this offset, such as a rendered copyright header, may end with
+        whitespace.
+
+    :return:
+        Returns True if the content is normalized.  Returns False otherwise.
+
+    :type raw_content: bytes
+    :type offset:      int
+    :rtype:            bool
+
+    """
+
+    try:
+        content = raw_content[offset:].decode("utf-8")
+        raw_content[:offset].decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+
+    result = (
+            b'\r' not in raw_content
+        and (raw_content == b'' or raw_content[-1:] == b'\n')
+        and TRAILING_WHITESPACE_RE.search(content) is None
+    )
+
+    return result
+
+
+def find_line_ending(raw_content):
+    """
+    Function that determines the line ending used by raw file content from
+    its first line.
+
+    :param raw_content:
+        The raw file content.
+
+    :return:
+        Returns "\\r\\n" if the first line ends with a carriage return and line
+        feed.  Returns "\\n" otherwise.
+
+    :type raw_content: bytes
+    :rtype:            str
+
+    """
+
+    first_line_end = raw_content.find(b'\n')
+    if first_line_end > 0 and raw_content[first_line_end - 1] == ord('\r'):
+        result = "\r\n"
+    else:
+        result = "\n"
+
+    return result
+
+
+def find_content_encoding(raw_content):
+    """
+    Function that determines the encoding of raw file content from a coding
+    declaration in the first two lines.  Only encodings that store ASCII
+    characters as single bytes are accepted.
+
+    :param raw_content:
+        The raw file content.
+
+    :return:
+        Returns the name of the encoding.  Returns "utf-8" if no supported
+        coding declaration was found.
+
+    :type raw_content: bytes
+    :rtype:            str
+
+    """
+
+    encoding = "utf-8"
+    line_start = 0
+    for line_number in range(2):
+        line_end = raw_content.find(b'\n', line_start, HEADER_SCAN_SIZE)
+        if line_end < 0:
+            line_end = min(len(raw_content), HEADER_SCAN_SIZE)
+
+        match = SOURCE_ENCODING_RE.search(raw_content, line_start, line_end)
+        if match is not None:
+            try:
+                codec = codecs.lookup(match.group(1).decode("ascii"))
+            except LookupError:
+                pass
+            else:
+                if "\n#".encode(codec.name) == b'\n#':
+                    encoding = codec.name
+
+            break
+
+        line_start = line_end + 1
+
+    return encoding
+
+
+def decode_raw_text(raw_content, encoding):
+    """
+    Function that decodes raw content that must be written back byte for
+    byte.  Content that is not valid in the requested encoding is decoded
+    using FALLBACK_ENCODING.
+
+    :param raw_content:
+        The raw content to be decoded.
+
+    :param encoding:
+        The encoding of the file holding the content.
+
+    :return:
+        Returns a tuple holding the decoded text and the encoding that must
+        be used to encode it again.
+
+    :type raw_content: bytes
+    :type encoding:    str
+    :rtype:            tuple
+
+    """
+
+    try:
+        result = ( raw_content.decode(encoding), encoding )
+    except UnicodeDecodeError:
+        result = ( raw_content.decode(FALLBACK_ENCODING), FALLBACK_ENCODING )
+
+    return result
+
+
+def header_digest(raw_content, filename, wrap_column):
+    """
+    Function that calculates a digest identifying the copyright header of a
+    file, along with everything before it, without decoding or parsing the
+    file.  Files with identical digests have headers that are updated
+    identically.
+
+    :param raw_content:
+        The raw file content.
+
+    :param filename:
+        The name of the file, used to determine the comment syntax.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :return:
+        Returns a tuple holding the digest, as a hexadecimal string, and the
+        offset just past the end of the header.  Both values are None if no
+        complete header was found within the first HEADER_SCAN_LINES lines.
+
+    :type raw_content: bytes
+    :type filename:    str
+    :type wrap_column: int
+    :rtype:            tuple
+
+    """
+
+    first_line_end = raw_content.find(b'\n', 0, HEADER_SCAN_SIZE)
+    if first_line_end < 0:
+        first_line_end = min(len(raw_content), HEADER_SCAN_SIZE)
+
+    syntax = find_comment_syntax(
+        filename,
+        raw_content[:first_line_end].decode("utf-8", "replace")
+    )
+
+    header_end = find_header_region(
+        raw_content,
+        wrap_column,
+        HEADER_SCAN_SIZE,
+        find_banner_characters(syntax)
+    )
+
+    if header_end is not None                                          and \
+       raw_content.count(b'\n', 0, header_end) <= HEADER_SCAN_LINES       :
+        digest = file_digest(
+            str(syntax).encode("utf-8") + b'\0' + raw_content[:header_end]
+        )
+    else:
+        ( digest, header_end ) = ( None, None )
+
+    return ( digest, header_end )
+
+
+def file_requires_update(
+    raw_content,
+    license_list,
+    modify_dates,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that decides, from the raw file content, if a file needs to be
+    parsed and rewritten.
+
+    :param raw_content:
+        The raw file content.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates in the file should be updated.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs should be expanded and trailing
+        whitespace removed.
+
+    :return:
+        Returns True if the file must be fully processed.  Returns False if
+        the file is known to already comply.
+
+    :type raw_content:      bytes
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type cleanup_tab_size: int
+    :rtype:                 bool
+
+    """
+
+    if license_list:
+        result = True
+    elif cleanup_tab_size and WHITESPACE_CLEANUP_RE.search(raw_content):
+        result = True
+    elif modify_dates:
+        current_year = str(time.localtime().tm_year)
+        result = not copyright_dates_current(raw_content, current_year)
+    else:
+        result = False
+
+    return result
+
+
+def replace_file_content(filename, content_chunks):
+    """
+    Function that atomically replaces the content of a file.  The new content
+    is written to a temporary file in the same directory which is then moved
+    over the original file so that the file is never left partially written.
+    The original file's permissions, owner and group are preserved.  If the
+    file name is a symbolic link, then the file the link points to is
+    replaced and the link is left intact.
+
+    :param filename:
+        The name of the file to be replaced.
+
+    :param content_chunks:
+        The new file content, as a list of bytes-like objects to be written in
+        order.
+
+    :type filename:       str
+    :type content_chunks: list
+
+    """
+
+    import tempfile
+
+    filename = os.path.realpath(filename)
+    ( filepath, basename ) = os.path.split(filename)
+
+    with STATISTICS.phase("write"):
+        file_stat = os.stat(filename)
+
+        ( file_descriptor, temporary_filename ) = tempfile.mkstemp(
+            prefix = "." + basename + ".",
+            suffix = ".tmp",
+            dir = filepath
+        )
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_handle:
+                for chunk in content_chunks:
+                    file_handle.write(chunk)
+                    STATISTICS.count("bytes_written", len(chunk))
+
+            try:
+                os.chown(
+                    temporary_filename,
+                    file_stat.st_uid,
+                    file_stat.st_gid
+                )
+            except PermissionError:
+                pass
+
+            os.chmod(temporary_filename, stat.S_IMODE(file_stat.st_mode))
+            os.replace(temporary_filename, filename)
+        except:
+            try:
+                os.unlink(temporary_filename)
+            except OSError:
+                pass
+
+            raise
+
+
+def cleanup_whitespace(file_content, tab_size):
+    """
+    Function that expands tabs and removes trailing whitespace from a file.
+
+    :param file_content:
+        The list of file lines, without line endings.  The list is modified.
+
+    :param tab_size:
+        The distance between tab stops.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type file_content: list
+    :type tab_size:     int
+    :rtype:             bool
+
+    """
+
+    cleaned_content = [
+        l.expandtabs(tab_size).rstrip() if '\t' in l else l.rstrip()
+        for l in file_content
+    ]
+
+    lines_cleaned = 0
+    for old_line, new_line in zip(file_content, cleaned_content):
+        if old_line != new_line:
+            lines_cleaned += 1
+
+    file_content[:] = cleaned_content
+    STATISTICS.count("lines_cleaned", lines_cleaned)
+
+    return True
+
+
+def cleanup_raw_whitespace(raw_content, tab_size, encoding):
+    """
+    Function that expands tabs and removes trailing whitespace from raw file
+    content without decoding the whole file.  Only lines holding tabs or
+    ending with whitespace are decoded.  Line endings and every other byte
+    are kept unchanged.
+
+    :param raw_content:
+        The raw content.
+
+    :param tab_size:
+        The distance between tab stops.
+
+    :param encoding:
+        The encoding of the file.  See find_content_encoding.
+
+    :return:
+        Returns the cleaned up raw content.
+
+    :type raw_content: bytes
+    :type tab_size:    int
+    :type encoding:    str
+    :rtype:            bytes
+
+    """
+
+    def cleanup_line(match):
+        raw_line = match.group(0)
+        if raw_line.endswith(b'\r'):
+            ( raw_line, line_ending ) = ( raw_line[:-1], b'\r' )
+        else:
+            line_ending = b''
+
+        ( l, line_encoding ) = decode_raw_text(raw_line, encoding)
+        return (
+              l.expandtabs(tab_size).rstrip().encode(line_encoding)
+            + line_ending
+        )
+
+    ( new_raw_content, lines_cleaned ) = WHITESPACE_CLEANUP_RE.subn(
+        cleanup_line,
+        raw_content
+    )
+
+    STATISTICS.count("lines_cleaned", lines_cleaned)
+
+    return new_raw_content
+
+
+def update_file_content(
+    file_content,
+    verbose,
+    license_list,
+    modify_dates,
+    wrap_column,
+    filename = None,
+    copyright_holder = None,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that applies the copyright date and license updates to the
+    content of a file held in memory.
+
+    :param file_content:
+        The list of file lines, without line endings.  The list may be
+        modified.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates should be updated.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param filename:
+        The name of the file, used to determine the comment syntax.  A value
+        of None indicates that the file name is unknown.
+
+    :param copyright_holder:
+        The copyright holder named in headers inserted into files that lack
+        one.  A value of None prevents headers from being inserted.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs are expanded using this distance between
+        tab stops and trailing whitespace is removed.  See
+        cleanup_whitespace.
+
+    :return:
+        Returns the updated list of file lines.  Returns None on error.
+
+    :type file_content:     list
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :type cleanup_tab_size: int
+    :rtype:                 list or None
+
+    """
+
+    success = True
+
+    if modify_dates:
+        if verbose:
+            sys.stdout.write("    Updating copyright dates.\n")
+
+        with STATISTICS.phase("dates"):
+            success = modify_copyright_dates(file_content, wrap_column)
+
+    if success and license_list:
+        if verbose:
+            sys.stdout.write("    Updating licenses.\n")
+
+        with STATISTICS.phase("header"):
+            file_content = update_license_header(
+                file_content,
+                wrap_column,
+                license_list,
+                filename,
+                copyright_holder
+            )
+
+    if success and cleanup_tab_size:
+        if verbose:
+            sys.stdout.write("    Cleaning up whitespace.\n")
+
+        with STATISTICS.phase("cleanup"):
+            success = cleanup_whitespace(file_content, cleanup_tab_size)
+
+    if not success:
+        file_content = None
+
+    return file_content
+
+
+def update_raw_lines(
+    raw_content,
+    verbose,
+    license_list,
+    modify_dates,
+    wrap_column,
+    filename = None,
+    copyright_holder = None,
+    preserve_content = False,
+    cleanup_tab_size = 0,
+    newline = "\n"
+    ):
+    """
+    Function that applies the copyright date and license updates to raw
+    content by decoding every line.  Unless the content is preserved, it is
+    decoded as UTF-8 and the result uses the requested line endings with
+    trailing whitespace removed.
+
+    :param raw_content:
+        The raw content.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates should be updated.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param filename:
+        The name of the file.  See update_file_content.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See
+        update_file_content.
+
+    :param preserve_content:
+        If True, then the content is decoded using the encoding of the file
+        and written back using its encoding, byte order mark and line
+        endings.  Content that requires no changes is returned unchanged.
+
+    :param cleanup_tab_size:
+        If greater than 0, then whitespace is cleaned up.  See
+        update_file_content.
+
+    :param newline:
+        The line ending used when the content is not preserved.
+
+    :return:
+        Returns the updated raw content.  Returns None if the content could
+        not be decoded, updated or encoded.
+
+    :type raw_content:      bytes
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type cleanup_tab_size: int
+    :type newline:          str
+    :rtype:                 bytes or None
+
+    """
+
+    success = True
+    original_content = raw_content
+    prefix = b''
+    encoding = "utf-8"
+
+    if preserve_content:
+        if raw_content.startswith(codecs.BOM_UTF8):
+            prefix = codecs.BOM_UTF8
+            raw_content = raw_content[len(prefix):]
+
+        newline = find_line_ending(raw_content)
+        encoding = find_content_encoding(raw_content)
+
+    try:
+        with STATISTICS.phase("decode"):
+            if preserve_content:
+                ( text, encoding ) = decode_raw_text(raw_content, encoding)
+            else:
+                text = raw_content.decode(encoding)
+
+            file_lines = io.StringIO(text, newline = None).readlines()
+    except:
+        success = False
+
+    if success:
+        if preserve_content and cleanup_tab_size:
+            # Lines that only need trailing whitespace removed must not be
+            # mistaken for lines requiring no changes.
+            original_lines = [ l.rstrip("\n") for l in file_lines ]
+
+        file_lines = [ l.rstrip() for l in file_lines ]
+        if preserve_content and not cleanup_tab_size:
+            original_lines = list(file_lines)
+
+        file_content = update_file_content(
+            file_lines,
+            verbose,
+            license_list,
+            modify_dates,
+            wrap_column,
+            filename,
+            copyright_holder,
+            cleanup_tab_size
+        )
+
+        success = file_content is not None
+
+    if success and preserve_content and file_content == original_lines:
+        new_raw_content = original_content
+    elif success:
+        try:
+            new_raw_content = prefix + "".join(
+                [ l + newline for l in file_content ]
+            ).encode(encoding)
+        except UnicodeEncodeError:
+            new_raw_content = None
+    else:
+        new_raw_content = None
+
+    return new_raw_content
+
+
+def update_raw_copyright_dates(raw_content, offset, wrap_column, encoding):
+    """
+    Function that updates the copyright dates in raw file content without
+    decoding the whole file.  Only the lines found by copyright_line_spans
+    are decoded.  Every other byte, including line
+    endings and trailing whitespace, is kept unchanged.
+
+    :param raw_content:
+        The raw file content.
+
+    :param offset:
+        The offset of the first line to be updated.
+
+    :param wrap_column:
+        The maximum allowed line width in characters.
+
+    :param encoding:
+        The encoding of the file.  See find_content_encoding.
+
+    :return:
+        Returns a list of bytes-like chunks holding the updated content
+        starting at the offset.
+
+    :type raw_content: bytes
+    :type offset:      int
+    :type wrap_column: int
+    :type encoding:    str
+    :rtype:            list
+
+    """
+
+    line_spans = []
+    line_numbers = []
+    line_number = raw_content.count(b'\n', 0, offset) + 1
+    position = offset
+    for line_start, line_end in copyright_line_spans(raw_content, offset):
+        line_number += raw_content.count(b'\n', position, line_start)
+        position = line_start
+
+        line_spans.append(( line_start, line_end ))
+        line_numbers.append(line_number)
+
+    chunks = []
+    if line_spans:
+        with STATISTICS.phase("decode"):
+            decoded_lines = [
+                decode_raw_text(raw_content[line_start:line_end], encoding)
+                for line_start, line_end in line_spans
+            ]
+
+        file_content = [ l for l, line_encoding in decoded_lines ]
+        modify_copyright_dates(file_content, wrap_column, line_numbers)
+
+        position = offset
+        for ( line_start, line_end ), ( l, line_encoding ), new_line in zip(
+                line_spans,
+                decoded_lines,
+                file_content
+            ):
+            if new_line != l:
+                chunks.append(raw_content[position:line_start])
+                chunks.append(new_line.encode(line_encoding))
+                position = line_end
+
+        chunks.append(raw_content[position:])
+    else:
+        chunks.append(raw_content[offset:])
+
+    return chunks
+
+
+def update_raw_content(
+    raw_content,
+    verbose,
+    license_list,
+    modify_dates,
+    wrap_column,
+    filename = None,
+    copyright_holder = None,
+    preserve_content = False,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that applies the copyright date and license updates to raw file
+    content.  By default, the content is decoded as UTF-8 and the result
+    always uses Unix line endings with trailing whitespace removed.
+
+    When the content is preserved, only the copyright header and the lines
+    holding copyright dates are decoded.  The header is written back using
+    the encoding and line endings of the file and every other byte is kept
+    unchanged.  Content that can not be decoded using the encoding of the
+    file, such as Latin-1 content in a UTF-8 file, is handled byte for byte.
+
+    :param raw_content:
+        The raw file content.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates should be updated.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param filename:
+        The name of the file.  See update_file_content.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See
+        update_file_content.
+
+    :param preserve_content:
+        If True, then the encoding, line endings and whitespace of the file
+        are preserved.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs are expanded and trailing whitespace is
+        removed.  When the content is preserved, only the lines requiring
+        changes are decoded.  See update_file_content.
+
+    :return:
+        Returns the updated raw content.  Returns None if the content could
+        not be decoded or updated.
+
+    :type raw_content:      bytes
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type cleanup_tab_size: int
+    :rtype:                 bytes or None
+
+    """
+
+    if not preserve_content:
+        return update_raw_lines(
+            raw_content,
+            verbose,
+            license_list,
+            modify_dates,
+            wrap_column,
+            filename,
+            copyright_holder,
+            False,
+            cleanup_tab_size
+        )
+
+    success = True
+    new_raw_header = b''
+    body_start = 0
+    encoding = find_content_encoding(raw_content)
+
+    if license_list:
+        with STATISTICS.phase("scan"):
+            header_end = find_update_region(
+                raw_content,
+                filename,
+                wrap_column,
+                license_list,
+                copyright_holder
+            )
+
+        if header_end is not None:
+            new_raw_header = update_raw_lines(
+                raw_content[:header_end],
+                verbose,
+                license_list,
+                modify_dates,
+                wrap_column,
+                filename,
+                copyright_holder,
+                True,
+                cleanup_tab_size
+            )
+
+            success = new_raw_header is not None
+            body_start = header_end
+        elif filename is not None:
+            sys.stderr.write(
+                "*** Warning: No copyright header found in the first %d bytes "
+                "of %s.\n"%(
+                    HEADER_SCAN_SIZE,
+                    filename
+                )
+            )
+
+    if success and modify_dates:
+        if verbose and body_start == 0:
+            sys.stdout.write("    Updating copyright dates.\n")
+
+        with STATISTICS.phase("dates"):
+            body_chunks = update_raw_copyright_dates(
+                raw_content,
+                body_start,
+                wrap_column,
+                encoding
+            )
+    elif success:
+        body_chunks = [ raw_content[body_start:] ]
+
+    if success and cleanup_tab_size:
+        if verbose and body_start == 0:
+            sys.stdout.write("    Cleaning up whitespace.\n")
+
+        with STATISTICS.phase("cleanup"):
+            body_chunks = [
+                cleanup_raw_whitespace(
+                    b''.join(body_chunks),
+                    cleanup_tab_size,
+                    encoding
+                )
+            ]
+
+    if success:
+        new_raw_content = b''.join([ new_raw_header ] + body_chunks)
+    else:
+        new_raw_content = None
+
+    return new_raw_content
+
+
+def report_check_result(
+    filename,
+    original_content,
+    new_content,
+    check_report
+    ):
+    """
+    Function that reports the outcome of checking a file without modifying
+    it.  In "diff" mode, a unified diff is written for each file that would
+    change.  In "json" mode, one JSON object is written per file holding the
+    "file", a "changed" flag and, for files that would change, the "diff".
+
+    :param filename:
+        The name of the file that was checked.
+
+    :param original_content:
+        The original file content.
+
+    :param new_content:
+        The content the file would have after being processed.
+
+    :param check_report:
+        The report to generate, either "diff" or "json".
+
+    :type filename:         str
+    :type original_content: bytes
+    :type new_content:      bytes
+    :type check_report:     str
+
+    """
+
+    changed = new_content != original_content
+    if changed:
+        import difflib
+
+        diff = "".join(
+            difflib.unified_diff(
+                original_content.decode("utf-8", "replace").splitlines(True),
+                new_content.decode("utf-8", "replace").splitlines(True),
+                fromfile = filename,
+                tofile = filename
+            )
+        )
+
+    if check_report == "json":
+        report = { "file" : filename, "changed" : changed }
+        if changed:
+            report["diff"] = diff
+
+        sys.stdout.write(json.dumps(report) + "\n")
+    elif changed:
+        sys.stdout.write(diff)
+
+
+def find_header_region(
+    content,
+    wrap_column,
+    scan_size = HEADER_SCAN_SIZE,
+    banner_characters = DEFAULT_BANNER_CHARACTERS
+    ):
+    """
+    Function that locates the copyright header in the first bytes of a file
+    without reading the remainder of the file.
+
+    :param content:
+        The file content.  This is typically a memory map of the file.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :param scan_size:
+        The maximum number of bytes to search.
+
+    :param banner_characters:
+        The characters that can make up the banner lines of the header.
+
+    :return:
+        Returns the offset just past the line ending the copyright header.
+        Returns None if the header could not be found.
+
+    :type content:           bytes-like
+    :type wrap_column:       int
+    :type scan_size:         int
+    :type banner_characters: str
+    :rtype:                  int or None
+
+    """
+
+    end_offset = None
+    banners_found = 0
+    limit = min(len(content), scan_size)
+    line_start = 0
+    while end_offset is None and line_start < limit:
+        line_end = content.find(b'\n', line_start, limit)
+        if line_end < 0:
+            if limit < len(content):
+                break
+
+            line_end = limit
+
+        l = bytes(content[line_start:line_end]).decode("utf-8", "replace")
+        if interesting_line(l.rstrip(), wrap_column, banner_characters):
+            banners_found += 1
+            if banners_found == 2:
+                end_offset = min(line_end + 1, len(content))
+
+        line_start = line_end + 1
+
+    return end_offset
+
+
+def find_insertion_region(
+    content,
+    wrap_column,
+    scan_size = HEADER_SCAN_SIZE,
+    banner_characters = DEFAULT_BANNER_CHARACTERS
+    ):
+    """
+    Function that locates the region at the start of a file that must be
+    rewritten to insert a new copyright header.  The region holds the lines
+    that must stay at the top of the file plus the line that follows them.
+
+    :param content:
+        The file content.  This is typically a memory map of the file.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :param scan_size:
+        The maximum number of bytes to search.
+
+    :param banner_characters:
+        The characters that can make up the banner lines of a header.
+
+    :return:
+        Returns the offset just past the end of the region.  Returns None if
+        the first bytes of the file hold part of a copyright header.
+
+    :type content:           bytes-like
+    :type wrap_column:       int
+    :type scan_size:         int
+    :type banner_characters: str
+    :rtype:                  int or None
+
+    """
+
+    end_offset = 0
+    in_preamble = True
+    limit = min(len(content), scan_size)
+    line_start = 0
+    while line_start < limit:
+        line_end = content.find(b'\n', line_start, limit)
+        if line_end < 0:
+            if limit < len(content):
+                break
+
+            line_end = limit
+
+        l = bytes(content[line_start:line_end]).decode("utf-8", "replace")
+        if interesting_line(l.rstrip(), wrap_column, banner_characters):
+            return None
+
+        if in_preamble:
+            end_offset = min(line_end + 1, len(content))
+            in_preamble = HEADER_PREAMBLE_RE.match(l) is not None
+
+        line_start = line_end + 1
+
+    return end_offset
+
+
+def find_update_region(
+    content,
+    filename,
+    wrap_column,
+    license_list,
+    copyright_holder = None
+    ):
+    """
+    Function that locates the region at the start of a file that must be
+    rewritten to update its copyright header.  If the file has no header and
+    one can be inserted, then the region is the one found by
+    find_insertion_region.
+
+    :param content:
+        The file content.  This is typically a memory map of the file.
+
+    :param filename:
+        The name of the file, used to determine the comment syntax.
+
+    :param wrap_column:
+        The maximum line length in characters.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See
+        update_file_content.
+
+    :return:
+        Returns the offset just past the end of the region.  Returns None if
+        no header was found in the first HEADER_SCAN_SIZE bytes and none can
+        be inserted.
+
+    :type content:          bytes-like
+    :type filename:         str or None
+    :type wrap_column:      int
+    :type license_list:     list
+    :type copyright_holder: str or None
+    :rtype:                 int or None
+
+    """
+
+    first_line_end = content.find(b'\n', 0, HEADER_SCAN_SIZE)
+    if first_line_end < 0:
+        first_line_end = min(len(content), HEADER_SCAN_SIZE)
+
+    syntax = find_comment_syntax(
+        filename,
+        bytes(content[:first_line_end]).decode("utf-8", "replace")
+    )
+    characters = find_banner_characters(syntax)
+    header_end = find_header_region(
+        content,
+        wrap_column,
+        HEADER_SCAN_SIZE,
+        characters
+    )
+
+    if header_end is None                   and \
+       syntax is not None                   and \
+       copyright_holder                     and \
+       license_list                             :
+        header_end = find_insertion_region(
+            content,
+            wrap_column,
+            HEADER_SCAN_SIZE,
+            characters
+        )
+
+    return header_end
+
+
+def process_file_header(
+    filename,
+    verbose,
+    license_list,
+    modify_dates,
+    create_backups,
+    wrap_column,
+    file_state = None,
+    check_report = None,
+    backup_store = None,
+    copyright_holder = None,
+    preserve_content = False,
+    maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+    skip_generated = True,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function you can use to update only the copyright header of a single
+    file.  The file is memory mapped and only the header region is decoded.
+    The remainder of the file is copied unchanged from the memory map, so the
+    header is written using the line ending of the first line of the file.
+    Dates are only updated within the header region.
+
+    :param filename:
+        The name of the file to be processed.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates in the header should be updated.
+
+    :param create_backups:
+        If True, then a backup of the file should be created.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param file_state:
+        An optional dictionary used to report on the file.  See process_file.
+        Content digests are not calculated in header-only mode.
+
+    :param check_report:
+        If not None, then the header is checked in memory without the file
+        being backed up or written.  See process_file.
+
+    :param backup_store:
+        The backup store used when backups are created.  See process_file.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See process_file.
+
+    :param preserve_content:
+        If True, then the header is written back using the encoding and line
+        endings of the file.  See process_file.
+
+    :param maximum_size:
+        The size of the largest file processed.  See process_file.
+
+    :param skip_generated:
+        If True, then files marked as generated are skipped.  See
+        process_file.
+
+    :param cleanup_tab_size:
+        If greater than 0, then whitespace within the header is cleaned up.
+        See process_file.
+
+    :return:
+        Returns True if the operation was successful.  Returns False on error.
+
+    :type filename:         str
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type create_backups:   bool
+    :type wrap_column:      int
+    :type file_state:       dict or None
+    :type check_report:     str or None
+    :type backup_store:     BackupStore or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type maximum_size:     int
+    :type skip_generated:   bool
+    :type cleanup_tab_size: int
+    :rtype:                 bool
+
+    """
+
+    success = True
+
+    filename = os.path.abspath(filename)
+    if verbose:
+        sys.stdout.write("Processing %s:\n"%filename)
+        sys.stdout.write("    Locating header.\n")
+
+    file_map = None
+    with STATISTICS.phase("read"):
+        try:
+            file_handle = open(filename, "rb")
+        except:
+            sys.stderr.write("*** Could not read file %s\n"%filename)
+            success = False
+
+        if success:
+            with file_handle:
+                file_stat = os.fstat(file_handle.fileno())
+                try:
+                    file_map = mmap.mmap(
+                        file_handle.fileno(),
+                        0,
+                        access = mmap.ACCESS_READ
+                    )
+                except ValueError:
+                    # Empty files can not be mapped.
+                    file_map = b''
+                except:
+                    sys.stderr.write("*** Could not map file %s\n"%filename)
+                    success = False
+
+    skip_reason = None
+    requires_update = False
+    if success:
+        skip_reason = classify_content(
+            file_map,
+            file_stat.st_size,
+            maximum_size,
+            skip_generated
+        )
+
+    if success and skip_reason is None:
+        with STATISTICS.phase("scan"):
+            header_end = find_update_region(
+                file_map,
+                filename,
+                wrap_column,
+                license_list,
+                copyright_holder
+            )
+
+        # Only the scanned region of the map is read from the file.
+        STATISTICS.count("bytes_read", min(len(file_map), HEADER_SCAN_SIZE))
+
+        if header_end is None:
+            sys.stderr.write(
+                "*** Warning: No copyright header found in the first %d bytes "
+                "of %s.\n"%(
+                    HEADER_SCAN_SIZE,
+                    filename
+                )
+            )
+            raw_header = b''
+            requires_update = False
+        else:
+            raw_header = file_map[:header_end]
+            with STATISTICS.phase("scan"):
+                requires_update = file_requires_update(
+                    raw_header,
+                    license_list,
+                    modify_dates,
+                    cleanup_tab_size
+                )
+
+        if requires_update:
+            new_raw_header = update_raw_lines(
+                raw_header,
+                verbose,
+                license_list,
+                modify_dates,
+                wrap_column,
+                filename,
+                copyright_holder,
+                preserve_content,
+                cleanup_tab_size,
+                find_line_ending(file_map)
+            )
+
+            if new_raw_header is None:
+                sys.stderr.write(
+                    "*** Could not update header of %s\n"%filename
+                )
+                success = False
+        elif verbose:
+            sys.stdout.write("    No changes required.\n")
+
+    if success and requires_update:
+        if new_raw_header == raw_header:
+            requires_update = False
+            if verbose:
+                sys.stdout.write("    No changes required.\n")
+
+    if success and skip_reason is not None:
+        record_skipped_file(
+            filename,
+            skip_reason,
+            file_stat,
+            verbose,
+            check_report,
+            file_state
+        )
+    elif success and check_report is not None:
+        report_check_result(
+            filename,
+            raw_header,
+            new_raw_header if requires_update else raw_header,
+            check_report
+        )
+    elif     success                                                        \
+         and requires_update                                                \
+         and file_state is not None                                         \
+         and file_state.get("defer_write")                                  :
+        file_state["pending_header"] = (
+            new_raw_header,
+            header_end,
+            file_stat
+        )
+    elif success and requires_update:
+        ( success, file_stat ) = write_file_header(
+            filename,
+            file_map,
+            file_stat,
+            new_raw_header,
+            header_end,
+            verbose,
+            create_backups,
+            backup_store
+        )
+
+    if success and skip_reason is None and file_state is not None:
+        file_state["changed"] = requires_update
+        if check_report is None or not requires_update:
+            file_state["size"] = file_stat.st_size
+            file_state["mtime_ns"] = file_stat.st_mtime_ns
+            if "digest" in file_state:
+                file_state["digest"] = None
+
+    if isinstance(file_map, mmap.mmap):
+        file_map.close()
+
+    return success
+
+
+def write_file_header(
+    filename,
+    file_map,
+    file_stat,
+    new_raw_header,
+    header_end,
+    verbose,
+    create_backups,
+    backup_store
+    ):
+    """
+    Function that replaces the copyright header of a file, copying the rest
+    of the file from a memory map.  A backup is created first if requested.
+
+    :param filename:
+        The absolute path of the file.
+
+    :param file_map:
+        The memory map, or other bytes-like object, holding the original file
+        content.
+
+    :param file_stat:
+        The status of the file when it was mapped.
+
+    :param new_raw_header:
+        The updated raw header.
+
+    :param header_end:
+        The offset of the end of the original header.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param create_backups:
+        If True, then a backup of the file should be created.
+
+    :param backup_store:
+        The backup store used when backups are created.  See process_file.
+
+    :return:
+        Returns a tuple holding the success status and the status of the
+        file after it was written.
+
+    :type filename:       str
+    :type file_map:       bytes-like
+    :type file_stat:      os.stat_result
+    :type new_raw_header: bytes
+    :type header_end:     int
+    :type verbose:        bool
+    :type create_backups: bool
+    :type backup_store:   BackupStore or None
+    :rtype:               tuple
+
+    """
+
+    success = True
+    if create_backups:
+        success = backup_file(
+            filename,
+            file_map,
+            file_stat.st_mode,
+            verbose,
+            backup_store
+        )
+
+    if success:
+        if verbose:
+            sys.stdout.write("    Writing updates.\n")
+
+        try:
+            with memoryview(file_map) as file_view:
+                replace_file_content(
+                    filename,
+                    [ new_raw_header, file_view[header_end:] ]
+                )
+
+            file_stat = os.stat(filename)
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not write file %s: %s\n"%(
+                    filename,
+                    str(e)
+                )
+            )
+            success = False
+
+    return ( success, file_stat )
+
+
+def process_file(
+    filename,
+    verbose,
+    license_list,
+    modify_dates,
+    create_backups,
+    wrap_column,
+    header_only = False,
+    file_state = None,
+    check_report = None,
+    backup_store = None,
+    copyright_holder = None,
+    preserve_content = False,
+    maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+    skip_generated = True,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function you can use to parse a single file.
+
+    :param filename:
+        The name of the file to be processed.  The file is only opened once
+        processing reaches it.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates in the file should be updated.
+
+    :param create_backups:
+        If True, then a backup of the file should be created.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param header_only:
+        If True, then only the copyright header is read and rewritten.  See
+        process_file_header.
+
+    :param file_state:
+        An optional dictionary used to report on the file.  On success,
+        "changed" is set to indicate if the file was, or in check mode would
+        be, modified.  If the file complies, then "size" and "mtime_ns" are
+        also set.  If the dictionary holds a "digest" entry, then the content
+        digest is tracked for the cache.  A file whose content matches the
+        provided digest is assumed to comply.  If the dictionary holds a true
+        "defer_write" entry, then an update is not written but left pending
+        in the dictionary for write_deferred_update.
+
+    :param check_report:
+        If not None, then the file is checked in memory without being backed
+        up or written.  The value selects the report generated, either
+        "diff" or "json".  See report_check_result.
+
+    :param backup_store:
+        The backup store used when backups are created.  If None, then the
+        file is copied into the backup directory next to it.
+
+    :param copyright_holder:
+        The copyright holder named in headers inserted into files that lack
+        one.  If None, then files without a header are left unchanged.
+
+    :param preserve_content:
+        If True, then only the copyright header and lines holding copyright
+        dates are decoded and rewritten.  The encoding, line endings and
+        whitespace of the file are preserved.  See update_raw_content.
+
+    :param maximum_size:
+        The size of the largest file processed.  Binary files, and files
+        larger than this size, are skipped without being fully read.  See
+        classify_content.
+
+    :param skip_generated:
+        If True, then files marked as generated are skipped.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs are expanded using this distance between
+        tab stops and trailing whitespace is removed.  See
+        update_file_content.
+
+    :return:
+        Returns True if the operation was successful.  Returns False on error.
+
+    :type filename:         str
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type create_backups:   bool
+    :type wrap_column:      int
+    :type header_only:      bool
+    :type file_state:       dict or None
+    :type check_report:     str or None
+    :type backup_store:     BackupStore or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type maximum_size:     int
+    :type skip_generated:   bool
+    :type cleanup_tab_size: int
+    :rtype:                 bool
+
+    """
+
+    if header_only:
+        return process_file_header(
+            filename,
+            verbose,
+            license_list,
+            modify_dates,
+            create_backups,
+            wrap_column,
+            file_state,
+            check_report,
+            backup_store,
+            copyright_holder,
+            preserve_content,
+            maximum_size,
+            skip_generated,
+            cleanup_tab_size
+        )
+
+    success = True
+
+    filename = os.path.abspath(filename)
+    if verbose:
+        sys.stdout.write("Processing %s:\n"%filename)
+        sys.stdout.write("    Reading.\n")
+
+    skip_reason = None
+    file_data = read_file(filename, maximum_size, skip_generated)
+    if file_data is not None:
+        ( raw_content, file_stat, skip_reason ) = file_data
+
+    if skip_reason is not None:
+        record_skipped_file(
+            filename,
+            skip_reason,
+            file_stat,
+            verbose,
+            check_report,
+            file_state
+        )
+    elif file_data is not None:
+        try:
+            ( success, new_raw_content, digest ) = transform_file_content(
+                raw_content,
+                verbose,
+                license_list,
+                modify_dates,
+                wrap_column,
+                file_state,
+                filename,
+                copyright_holder,
+                preserve_content,
+                cleanup_tab_size
+            )
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not update file %s: %s\n"%(filename, str(e))
+            )
+            success = False
+        else:
+            if not success:
+                sys.stderr.write("*** Could not update file %s\n"%filename)
+    else:
+        sys.stderr.write("*** Could not read file %s\n"%filename)
+        success = False
+
+    if success and skip_reason is None:
+        success = write_file_content(
+            filename,
+            raw_content,
+            new_raw_content,
+            file_stat,
+            digest,
+            verbose,
+            create_backups,
+            check_report,
+            backup_store,
+            file_state
+        )
+
+    return success
+
+
+def classify_content(
+    head,
+    file_size,
+    maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+    skip_generated = True
+    ):
+    """
+    Function that decides, from the first bytes of a file, if the file holds
+    source text that should be processed.
+
+    :param head:
+        The first bytes of the file.  Up to CLASSIFY_SCAN_SIZE bytes are
+        examined.  An empty value may be used to only check the file size.
+
+    :param file_size:
+        The size of the file in bytes.
+
+    :param maximum_size:
+        The size of the largest file processed.  A value of 0 disables the
+        limit.
+
+    :param skip_generated:
+        If True, then files holding a generated file marker near their start
+        are skipped.
+
+    :return:
+        Returns None if the file should be processed.  Otherwise returns the
+        reason the file is skipped, either "oversized", "binary" or
+        "generated".
+
+    :type head:           bytes-like
+    :type file_size:      int
+    :type maximum_size:   int
+    :type skip_generated: bool
+    :rtype:               str or None
+
+    """
+
+    if maximum_size and file_size > maximum_size:
+        result = "oversized"
+    elif b'\0' in head[:CLASSIFY_SCAN_SIZE]                            or \
+         bytes(head[:16]).startswith(BINARY_MAGIC_NUMBERS)                 :
+        result = "binary"
+    elif     skip_generated                                                \
+         and GENERATED_MARKER_RE.search(head[:GENERATED_MARKER_SCAN_SIZE])    :
+        result = "generated"
+    else:
+        result = None
+
+    return result
+
+
+def read_file(
+    filename,
+    maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+    skip_generated = True
+    ):
+    """
+    Function that reads the raw content of a file.  The first bytes of the
+    file are classified before the remainder is read so that binary,
+    generated and oversized files are skipped cheaply.  See
+    classify_content.
+
+    :param filename:
+        The name of the file to be read.
+
+    :param maximum_size:
+        The size of the largest file read.  See classify_content.
+
+    :param skip_generated:
+        If True, then generated files are skipped.  See classify_content.
+
+    :return:
+        Returns a tuple holding the raw file content, the file status and the
+        reason the file is skipped, or None if the file should be processed.
+        Only the bytes read to classify a skipped file are returned.  Returns
+        None on error.
+
+    :type filename:       str
+    :type maximum_size:   int
+    :type skip_generated: bool
+    :rtype:               tuple or None
+
+    """
+
+    try:
+        with STATISTICS.phase("read"):
+            with open(filename, "rb") as file_handle:
+                file_stat = os.fstat(file_handle.fileno())
+                skip_reason = classify_content(
+                    b'',
+                    file_stat.st_size,
+                    maximum_size
+                )
+
+                if skip_reason is None:
+                    raw_content = file_handle.read(CLASSIFY_SCAN_SIZE)
+                    skip_reason = classify_content(
+                        raw_content,
+                        file_stat.st_size,
+                        maximum_size,
+                        skip_generated
+                    )
+                else:
+                    raw_content = b''
+
+                if skip_reason is None:
+                    # Reading the whole file again avoids copying it to join
+                    # the classified bytes with the remainder.
+                    file_handle.seek(0)
+                    raw_content = file_handle.read()
+    except:
+        result = None
+    else:
+        STATISTICS.count("bytes_read", len(raw_content))
+        result = ( raw_content, file_stat, skip_reason )
+
+    return result
+
+
+def transform_file_content(
+    raw_content,
+    verbose,
+    license_list,
+    modify_dates,
+    wrap_column,
+    file_state = None,
+    filename = None,
+    copyright_holder = None,
+    preserve_content = False,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that determines the updated content of a file.  No files are
+    read or written.
+
+    :param raw_content:
+        The raw file content.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates in the file should be updated.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param file_state:
+        The optional file state dictionary.  See process_file.  If the
+        dictionary holds a "digest" entry, then the content digest is
+        calculated and content matching the provided digest is assumed to
+        comply.  If the dictionary holds a "known_headers" entry, then the
+        digest of a compliant header is stored under "header_digest" and a
+        normalized file whose header digest is known skips the license
+        update.  See header_digest.
+
+    :param filename:
+        The name of the file.  See update_file_content.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See
+        update_file_content.
+
+    :param preserve_content:
+        If True, then the encoding, line endings and whitespace of the file
+        are preserved.  See update_raw_content.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs are expanded using this distance between
+        tab stops and trailing whitespace is removed.  See
+        update_file_content.
+
+    :return:
+        Returns a tuple holding the success status, the updated raw content
+        and the digest of the original content.  The updated content is None
+        if the file requires no changes.  The digest is None unless it is
+        tracked by the file state.
+
+    :type raw_content:      bytes
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type file_state:       dict or None
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type cleanup_tab_size: int
+    :rtype:                 tuple
+
+    """
+
+    success = True
+    new_raw_content = None
+    digest = None
+
+    with STATISTICS.phase("scan"):
+        if file_state is not None and "digest" in file_state:
+            digest = file_digest(raw_content)
+            requires_update = (
+                    file_state.get("digest") != digest
+                and file_requires_update(
+                        raw_content,
+                        license_list,
+                        modify_dates,
+                        cleanup_tab_size
+                    )
+            )
+        else:
+            requires_update = file_requires_update(
+                raw_content,
+                license_list,
+                modify_dates,
+                cleanup_tab_size
+            )
+
+        if file_state is not None and filename is not None:
+            known_headers = file_state.get("known_headers")
+        else:
+            known_headers = None
+
+        if requires_update and known_headers is not None:
+            # A file with a header known to comply, and nothing else to
+            # change, is accepted without the license text being rendered.
+            ( file_state["header_digest"], header_end ) = header_digest(
+                raw_content,
+                filename,
+                wrap_column
+            )
+
+            if     file_state["header_digest"] in known_headers             \
+               and (   preserve_content                                     \
+                    or content_normalized(raw_content, header_end)
+                   )                                                        \
+               and (   not cleanup_tab_size                                 \
+                    or WHITESPACE_CLEANUP_RE.search(
+                           raw_content,
+                           header_end
+                       ) is None
+                   )                                                        \
+               and (   not modify_dates                                     \
+                    or copyright_dates_current(
+                           raw_content,
+                           str(time.localtime().tm_year)
+                       )
+                   )                                                          :
+                STATISTICS.count("headers_cached")
+                requires_update = False
+
+    if requires_update:
+        new_raw_content = update_raw_content(
+            raw_content,
+            verbose,
+            license_list,
+            modify_dates,
+            wrap_column,
+            filename,
+            copyright_holder,
+            preserve_content,
+            cleanup_tab_size
+        )
+
+        success = new_raw_content is not None
+        if new_raw_content == raw_content:
+            new_raw_content = None
+        elif known_headers is not None:
+            if success:
+                file_state["header_digest"] = header_digest(
+                    new_raw_content,
+                    filename,
+                    wrap_column
+                )[0]
+            else:
+                file_state["header_digest"] = None
+
+    if success and new_raw_content is None and verbose:
+        sys.stdout.write("    No changes required.\n")
+
+    return ( success, new_raw_content, digest )
+
+
+def write_file_content(
+    filename,
+    raw_content,
+    new_raw_content,
+    file_stat,
+    digest,
+    verbose,
+    create_backups,
+    check_report,
+    backup_store,
+    file_state
+    ):
+    """
+    Function that reports or writes the updated content of a file, creating
+    a backup first if requested.
+
+    :param filename:
+        The absolute path of the file.
+
+    :param raw_content:
+        The original raw file content.
+
+    :param new_raw_content:
+        The updated raw file content.  A value of None indicates that the
+        file requires no changes.
+
+    :param file_stat:
+        The status of the file when it was read.
+
+    :param digest:
+        The digest of the original content, if tracked.  See
+        transform_file_content.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param create_backups:
+        If True, then a backup of the file should be created.
+
+    :param check_report:
+        If not None, then the result is reported without the file being
+        backed up or written.  See process_file.
+
+    :param backup_store:
+        The backup store used when backups are created.  See process_file.
+
+    :param file_state:
+        The optional file state dictionary to be updated.  See process_file.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type filename:        str
+    :type raw_content:     bytes
+    :type new_raw_content: bytes or None
+    :type file_stat:       os.stat_result
+    :type digest:          str or None
+    :type verbose:         bool
+    :type create_backups:  bool
+    :type check_report:    str or None
+    :type backup_store:    BackupStore or None
+    :type file_state:      dict or None
+    :rtype:                bool
+
+    """
+
+    success = True
+    requires_update = new_raw_content is not None
+
+    if check_report is not None:
+        report_check_result(
+            filename,
+            raw_content,
+            new_raw_content if requires_update else raw_content,
+            check_report
+        )
+    elif     requires_update                                                \
+         and file_state is not None                                         \
+         and file_state.get("defer_write")                                  :
+        file_state["pending_write"] = (
+            raw_content,
+            new_raw_content,
+            file_stat,
+            digest
+        )
+
+        return success
+    elif requires_update:
+        if create_backups:
+            success = backup_file(
+                filename,
+                raw_content,
+                file_stat.st_mode,
+                verbose,
+                backup_store
+            )
+
+        if success:
+            if verbose:
+                sys.stdout.write("    Writing updates.\n")
+
+            try:
+                replace_file_content(filename, [ new_raw_content ])
+                file_stat = os.stat(filename)
+            except Exception as e:
+                sys.stderr.write(
+                    "*** Could not write file %s: %s\n"%(
+                        filename,
+                        str(e)
+                    )
+                )
+                success = False
+            else:
+                if digest is not None:
+                    digest = file_digest(new_raw_content)
+
+    if success and file_state is not None:
+        file_state["changed"] = requires_update
+        if check_report is None or not requires_update:
+            file_state["size"] = file_stat.st_size
+            file_state["mtime_ns"] = file_stat.st_mtime_ns
+            if "digest" in file_state:
+                file_state["digest"] = digest
+
+    return success
+
+
+def file_digest(content):
+    """
+    Function that calculates the digest used to identify file content in the
+    cache.
+
+    :param content:
+        The file content.
+
+    :return:
+        Returns the digest as a hexadecimal string.
+
+    :type content: bytes
+    :rtype:        str
+
+    """
+
+    import hashlib
+
+    return hashlib.blake2b(content, digest_size = 16).hexdigest()
+
+
+def cache_fingerprint(
+    license_list,
+    modify_dates,
+    wrap_column,
+    header_only,
+    copyright_holder = None,
+    preserve_content = False,
+    maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+    skip_generated = True,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that calculates a fingerprint of the settings that determine if a
+    file complies.  Cache entries are only valid for the settings used to
+    create them.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the source file header.
+
+    :param modify_dates:
+        If True, then copyright dates are being updated.
+
+    :param wrap_column:
+        The maximum column width for the file.
+
+    :param header_only:
+        If True, then only copyright headers are being updated.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers, if any.
+
+    :param preserve_content:
+        If True, then the encoding, line endings and whitespace of files are
+        being preserved.
+
+    :param maximum_size:
+        The size of the largest file processed.
+
+    :param skip_generated:
+        If True, then generated files are being skipped.
+
+    :param cleanup_tab_size:
+        The distance between tab stops used to clean up whitespace, or 0 if
+        whitespace is not being cleaned up.
+
+    :return:
+        Returns the fingerprint as a hexadecimal string.
+
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type header_only:      bool
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type maximum_size:     int
+    :type skip_generated:   bool
+    :type cleanup_tab_size: int
+    :rtype:                 str
+
+    """
+
+    settings = json.dumps(
+        [
+            VERSION,
+            list(license_list),
+            [ license_terms(license) for license in license_list ],
+            modify_dates,
+            time.localtime().tm_year if modify_dates else None,
+            wrap_column,
+            header_only,
+            copyright_holder,
+            preserve_content,
+            maximum_size,
+            skip_generated,
+            cleanup_tab_size
+        ],
+        sort_keys = True
+    )
+
+    return file_digest(settings.encode("utf-8"))
+
+
+def load_cache(cache_filename, fingerprint):
+    """
+    Function that loads the cache of files known to comply.  A missing,
+    unreadable or out of date cache is treated as empty.
+
+    :param cache_filename:
+        The name of the cache file.
+
+    :param fingerprint:
+        The fingerprint of the current settings, as returned by
+        cache_fingerprint.
+
+    :return:
+        Returns the cache.  The cache is a dictionary holding the fingerprint,
+        a dictionary of entries keyed by absolute filename and a list of the
+        digests of headers known to comply, most recently seen last.  Each
+        entry is a list holding the file size, the modification time in
+        nanoseconds, the content digest, or None, and the time the file was
+        last seen.
+
+    :type cache_filename: str
+    :type fingerprint:    str
+    :rtype:               dict
+
+    """
+
+    entries = {}
+    headers = []
+    try:
+        with open(cache_filename, "r", encoding = "utf-8") as file_handle:
+            cache = json.load(file_handle)
+
+        if     cache.get("version") == CACHE_VERSION \
+           and cache.get("fingerprint") == fingerprint  :
+            entries = cache["entries"]
+            headers = list(cache.get("headers", []))
+    except (OSError, ValueError, KeyError, AttributeError, TypeError):
+        pass
+
+    return {
+        "fingerprint" : fingerprint,
+        "entries" : entries,
+        "headers" : headers
+    }
+
+
+def save_cache(cache_filename, cache):
+    """
+    Function that evicts stale entries from the cache and atomically writes
+    the compacted cache to disk.
+
+    :param cache_filename:
+        The name of the cache file.
+
+    :param cache:
+        The cache, as returned by load_cache.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type cache_filename: str
+    :type cache:          dict
+    :rtype:               bool
+
+    """
+
+    import tempfile
+
+    success = True
+
+    oldest_allowed = time.time() - CACHE_MAXIMUM_AGE
+    entries = [
+        ( filename, entry ) for filename, entry in cache["entries"].items()
+        if entry[3] >= oldest_allowed
+    ]
+
+    if len(entries) > CACHE_MAXIMUM_ENTRIES:
+        entries.sort(key = lambda item: item[1][3], reverse = True)
+        entries = entries[:CACHE_MAXIMUM_ENTRIES]
+
+    content = json.dumps(
+        {
+            "version" : CACHE_VERSION,
+            "fingerprint" : cache["fingerprint"],
+            "entries" : dict(entries),
+            "headers" : cache["headers"][-CACHE_MAXIMUM_HEADERS:]
+        },
+        separators = ( ',', ':' )
+    )
+
+    ( filepath, basename ) = os.path.split(os.path.abspath(cache_filename))
+    try:
+        ( file_descriptor, temporary_filename ) = tempfile.mkstemp(
+            prefix = "." + basename + ".",
+            suffix = ".tmp",
+            dir = filepath
+        )
+
+        try:
+            with os.fdopen(file_descriptor, "w", encoding = "utf-8") as f:
+                f.write(content)
+
+            os.replace(temporary_filename, cache_filename)
+        except:
+            os.unlink(temporary_filename)
+            raise
+    except Exception as e:
+        sys.stderr.write(
+            "*** Could not write cache %s: %s\n"%(
+                cache_filename,
+                str(e)
+            )
+        )
+        success = False
+
+    return success
+
+
+def check_cache(cache, filename):
+    """
+    Function that checks if a file is known to comply without opening it.
+
+    :param cache:
+        The cache, as returned by load_cache.  A value of None indicates that
+        no cache is being used.
+
+    :param filename:
+        The name of the file to be checked.
+
+    :return:
+        Returns a tuple holding a flag that is True if the file is known to
+        comply and the file state dictionary to be passed to process_file.
+        When a cache is used, the dictionary holds the last known content
+        digest, or None, so that files that were only touched can be skipped
+        after they are read, along with the digests of the headers known to
+        comply.
+
+    :type cache:    dict or None
+    :type filename: str
+    :rtype:         tuple
+
+    """
+
+    known_compliant = False
+    file_state = {}
+    if cache is not None:
+        file_state["digest"] = None
+        file_state["known_headers"] = cache["headers"]
+        entry = cache["entries"].get(os.path.abspath(filename))
+        if entry is not None:
+            try:
+                file_stat = os.stat(filename)
+            except OSError:
+                entry = None
+
+        if entry is not None:
+            if     entry[0] == file_stat.st_size     \
+               and entry[1] == file_stat.st_mtime_ns    :
+                entry[3] = time.time()
+                known_compliant = True
+            else:
+                file_state["digest"] = entry[2]
+
+    return ( known_compliant, file_state )
+
+
+def update_cache(cache, filename, file_state):
+    """
+    Function that records that a file complies, along with any header known
+    to comply.
+
+    :param cache:
+        The cache, as returned by load_cache.  A value of None indicates that
+        no cache is being used.
+
+    :param filename:
+        The name of the file that was processed.
+
+    :param file_state:
+        The file state dictionary filled in by process_file.
+
+    :type cache:      dict or None
+    :type filename:   str
+    :type file_state: dict
+
+    """
+
+    if cache is not None and file_state.get("header_digest") is not None:
+        headers = cache["headers"]
+        if file_state["header_digest"] in headers:
+            headers.remove(file_state["header_digest"])
+
+        headers.append(file_state["header_digest"])
+        del headers[:-CACHE_MAXIMUM_HEADERS]
+
+    if cache is not None and "mtime_ns" in file_state:
+        cache["entries"][os.path.abspath(filename)] = [
+            file_state["size"],
+            file_state["mtime_ns"],
+            file_state.get("digest"),
+            time.time()
+        ]
+
+
+def write_deferred_update(
+    filename,
+    file_state,
+    verbose,
+    create_backups,
+    backup_store
+    ):
+    """
+    Function that backs up and writes an update left pending by process_file
+    when the file state requested that writes be deferred.  Worker processes
+    defer their writes so that the parent can write files in order and drop
+    the writes that follow a failure.
+
+    :param filename:
+        The name of the file.
+
+    :param file_state:
+        The file state dictionary filled in by process_file.  The pending
+        update, if any, is removed from the dictionary.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param create_backups:
+        If True, then a backup of the file should be created.
+
+    :param backup_store:
+        The backup store used when backups are created.  See process_file.
+
+    :return:
+        Returns True on success.  Returns False on error.
+
+    :type filename:       str
+    :type file_state:     dict
+    :type verbose:        bool
+    :type create_backups: bool
+    :type backup_store:   BackupStore or None
+    :rtype:               bool
+
+    """
+
+    success = True
+    filename = os.path.abspath(filename)
+    file_state.pop("defer_write", None)
+
+    if "pending_write" in file_state:
+        ( raw_content, new_raw_content, file_stat, digest ) = file_state.pop(
+            "pending_write"
+        )
+
+        success = write_file_content(
+            filename,
+            raw_content,
+            new_raw_content,
+            file_stat,
+            digest,
+            verbose,
+            create_backups,
+            None,
+            backup_store,
+            file_state
+        )
+    elif "pending_header" in file_state:
+        ( new_raw_header, header_end, file_stat ) = file_state.pop(
+            "pending_header"
+        )
+
+        try:
+            with open(filename, "rb") as file_handle:
+                current_stat = os.fstat(file_handle.fileno())
+                if     current_stat.st_size != file_stat.st_size         \
+                   or current_stat.st_mtime_ns != file_stat.st_mtime_ns    :
+                    raise ValueError("file changed while being processed")
+
+                file_map = mmap.mmap(
+                    file_handle.fileno(),
+                    0,
+                    access = mmap.ACCESS_READ
+                )
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not read file %s: %s\n"%(filename, str(e))
+            )
+            success = False
+
+        if success:
+            with file_map:
+                ( success, file_stat ) = write_file_header(
+                    filename,
+                    file_map,
+                    file_stat,
+                    new_raw_header,
+                    header_end,
+                    verbose,
+                    create_backups,
+                    backup_store
+                )
+
+        if success:
+            file_state["size"] = file_stat.st_size
+            file_state["mtime_ns"] = file_stat.st_mtime_ns
+
+    return success
+
+
+def enable_statistics(enabled):
+    """
+    Function that replaces the statistics recorded in this process.  When
+    statistics are not wanted a collector that records nothing is used, so
+    that processing files does not pay for the lock and counters.
+
+    :param enabled:
+        If True, then statistics are recorded.
+
+    :type enabled: bool
+
+    """
+
+    global STATISTICS
+
+    if enabled:
+        STATISTICS = Statistics()
+    else:
+        STATISTICS = NullStatistics()
+
+
+def initialize_worker(licenses, statistics_enabled):
+    """
+    Function used to initialize worker processes.
+
+    :param licenses:
+        The licenses loaded from templates, keyed by SPDX identifier.
+
+    :param statistics_enabled:
+        If True, then the worker records statistics.
+
+    :type licenses:           dict
+    :type statistics_enabled: bool
+
+    """
+
+    register_licenses(licenses)
+    enable_statistics(statistics_enabled)
+
+
+def process_file_job(job):
+    """
+    Function used by worker processes to process a single file.  Output
+    generated while processing the file is captured so that it can be reported
+    in order by the parent process.
+
+    :param job:
+        A tuple holding the name of the file to be processed, a dictionary
+        of keyword arguments to be passed to process_file, a flag indicating
+        if the cache shows the file already complies and the file state
+        dictionary to be passed to process_file.
+
+    :return:
+        Returns a tuple holding the filename, the success status, the
+        captured standard output, the captured standard error, the updated
+        file state and a snapshot of the statistics recorded while processing
+        the file.
+
+    :type job:  tuple
+    :rtype:     tuple
+
+    """
+
+    ( filename, options, known_compliant, file_state ) = job
+
+    STATISTICS.reset()
+    file_state["defer_write"] = True
+
+    captured_stdout = io.StringIO()
+    captured_stderr = io.StringIO()
+    with contextlib.redirect_stdout(captured_stdout), \
+         contextlib.redirect_stderr(captured_stderr)     :
+        if known_compliant:
+            report_cached_file(
+                filename,
+                options["verbose"],
+                options.get("check_report")
+            )
+            success = True
+        else:
+            success = process_file(
+                filename = filename,
+                file_state = file_state,
+                **options
+            )
+
+    return (
+        filename,
+        success,
+        captured_stdout.getvalue(),
+        captured_stderr.getvalue(),
+        file_state,
+        STATISTICS.snapshot()
+    )
+
+
+def report_cached_file(filename, verbose, check_report = None):
+    """
+    Function that reports a file skipped because the cache shows it already
+    complies.
+
+    :param filename:
+        The name of the skipped file.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param check_report:
+        The check mode report being generated, if any.
+
+    :type filename:     str
+    :type verbose:      bool
+    :type check_report: str or None
+
+    """
+
+    filename = os.path.abspath(filename)
+    if verbose:
+        sys.stdout.write(
+            "Processing %s:\n"
+            "    Unchanged since last run.\n"%filename
+        )
+
+    if check_report == "json":
+        sys.stdout.write(
+            json.dumps({ "file" : filename, "changed" : False }) + "\n"
+        )
+
+
+def record_skipped_file(
+    filename,
+    skip_reason,
+    file_stat,
+    verbose,
+    check_report,
+    file_state
+    ):
+    """
+    Function that reports a file skipped because it does not hold source
+    text and records that it requires no changes.
+
+    :param filename:
+        The absolute path of the skipped file.
+
+    :param skip_reason:
+        The reason the file was skipped.  See classify_content.
+
+    :param file_stat:
+        The status of the file when it was opened.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param check_report:
+        The check mode report being generated, if any.
+
+    :param file_state:
+        The optional file state dictionary to be updated.  See process_file.
+        The reason the file was skipped is stored under "skipped".
+
+    :type filename:     str
+    :type skip_reason:  str
+    :type file_stat:    os.stat_result
+    :type verbose:      bool
+    :type check_report: str or None
+    :type file_state:   dict or None
+
+    """
+
+    if verbose:
+        sys.stdout.write("    Skipped %s file.\n"%skip_reason)
+
+    if check_report == "json":
+        report = {
+            "file" : filename,
+            "changed" : False,
+            "skipped" : skip_reason
+        }
+        sys.stdout.write(json.dumps(report) + "\n")
+
+    if file_state is not None:
+        file_state["changed"] = False
+        file_state["skipped"] = skip_reason
+        file_state["size"] = file_stat.st_size
+        file_state["mtime_ns"] = file_stat.st_mtime_ns
+        if "digest" in file_state:
+            file_state["digest"] = None
+
+
+def count_processed_file(success, file_state):
+    """
+    Function that updates the statistics counters for a file that was
+    processed.
+
+    :param success:
+        The success status reported for the file.
+
+    :param file_state:
+        The file state dictionary reported for the file.
+
+    :type success:    bool
+    :type file_state: dict
+
+    """
+
+    STATISTICS.count("files_processed")
+    if not success:
+        STATISTICS.count("files_failed")
+    elif file_state.get("skipped"):
+        STATISTICS.count("files_skipped")
+    elif file_state.get("changed"):
+        STATISTICS.count("files_changed")
+    else:
+        STATISTICS.count("files_unchanged")
+
+
+async def process_files_pipeline(
+    filenames,
+    io_readers,
+    io_writers,
+    cache,
+    options
+    ):
+    """
+    Coroutine that processes a collection of files using a pipeline of
+    stages so that many file operations can be in flight at once on high
+    latency storage.  Files are read by up to io_readers threads, updated on
+    the event loop thread and written by up to io_writers threads.  Results
+    are reported in the order that the files were provided.  Processing
+    stops after the first file that fails, although files already in the
+    pipeline may still be modified.
+
+    :param filenames:
+        An iterable of filenames to be processed.  The iterable is advanced
+        from a separate thread so that directory walks do not block the
+        pipeline.
+
+    :param io_readers:
+        The maximum number of files being read at once.
+
+    :param io_writers:
+        The maximum number of files being backed up and written at once.
+
+    :param cache:
+        The cache, as returned by load_cache, or None.  See process_files.
+
+    :param options:
+        Dictionary of keyword arguments that would be passed to process_file
+        for each file.
+
+    :return:
+        Returns a tuple holding a flag that is True if every file was
+        processed successfully and the number of files that were, or in check
+        mode would be, changed.
+
+    :type filenames:  iterable
+    :type io_readers: int
+    :type io_writers: int
+    :type cache:      dict or None
+    :type options:    dict
+    :rtype:           tuple
+
+    """
+
+    import asyncio
+    import concurrent.futures
+
+    loop = asyncio.get_running_loop()
+    read_limit = asyncio.Semaphore(io_readers)
+    write_limit = asyncio.Semaphore(io_writers)
+    pending_files = asyncio.Queue(io_readers * PENDING_JOBS_PER_WORKER)
+
+    verbose = options["verbose"]
+    check_report = options.get("check_report")
+    header_only = options.get("header_only", False)
+
+    walk_executor = concurrent.futures.ThreadPoolExecutor(1)
+    io_executor = concurrent.futures.ThreadPoolExecutor(
+        io_readers + io_writers
+    )
+
+    stdout_capture = ThreadOutput(sys.stdout)
+    stderr_capture = ThreadOutput(sys.stderr)
+
+    def captured(file_output, function, *arguments):
+        with stdout_capture.capture(file_output[0]), \
+             stderr_capture.capture(file_output[1])     :
+            return function(*arguments)
+
+    def read_stage(filename):
+        ( known_compliant, file_state ) = check_cache(cache, filename)
+        file_data = None
+        success = True
+        if known_compliant:
+            report_cached_file(filename, verbose, check_report)
+        elif header_only:
+            # Header-only processing works on a memory map and is run as a
+            # single stage.
+            success = process_file(
+                filename = filename,
+                file_state = file_state,
+                **options
+            )
+        else:
+            filename = os.path.abspath(filename)
+            if verbose:
+                sys.stdout.write("Processing %s:\n"%filename)
+                sys.stdout.write("    Reading.\n")
+
+            file_data = read_file(
+                filename,
+                options.get("maximum_size", DEFAULT_MAXIMUM_FILE_SIZE),
+                options.get("skip_generated", True)
+            )
+
+            if file_data is None:
+                sys.stderr.write("*** Could not read file %s\n"%filename)
+                success = False
+            elif file_data[2] is not None:
+                record_skipped_file(
+                    filename,
+                    file_data[2],
+                    file_data[1],
+                    verbose,
+                    check_report,
+                    file_state
+                )
+                file_data = None
+
+        return ( success, known_compliant, file_state, file_data )
+
+    def transform_stage(filename, file_state, file_data):
+        filename = os.path.abspath(filename)
+        try:
+            ( success, new_raw_content, digest ) = transform_file_content(
+                file_data[0],
+                verbose,
+                options["license_list"],
+                options["modify_dates"],
+                options["wrap_column"],
+                file_state,
+                filename,
+                options.get("copyright_holder"),
+                options.get("preserve_content", False),
+                options.get("cleanup_tab_size", 0)
+            )
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not update file %s: %s\n"%(filename, str(e))
+            )
+            ( success, new_raw_content, digest ) = ( False, None, None )
+        else:
+            if not success:
+                sys.stderr.write("*** Could not update file %s\n"%filename)
+
+        return ( success, new_raw_content, digest )
+
+    def write_stage(filename, file_state, file_data, new_raw_content, digest):
+        return write_file_content(
+            os.path.abspath(filename),
+            file_data[0],
+            new_raw_content,
+            file_data[1],
+            digest,
+            verbose,
+            options["create_backups"],
+            check_report,
+            options.get("backup_store"),
+            file_state
+        )
+
+    async def process_one_file(filename):
+        file_output = ( io.StringIO(), io.StringIO() )
+
+        async with read_limit:
+            ( success, known_compliant, file_state, file_data ) = (
+                await loop.run_in_executor(
+                    io_executor,
+                    captured,
+                    file_output,
+                    read_stage,
+                    filename
+                )
+            )
+
+        if success and file_data is not None:
+            ( success, new_raw_content, digest ) = captured(
+                file_output,
+                transform_stage,
+                filename,
+                file_state,
+                file_data
+            )
+
+            if success:
+                async with write_limit:
+                    success = await loop.run_in_executor(
+                        io_executor,
+                        captured,
+                        file_output,
+                        write_stage,
+                        filename,
+                        file_state,
+                        file_data,
+                        new_raw_content,
+                        digest
+                    )
+
+        return (
+            filename,
+            success,
+            known_compliant,
+            file_output[0].getvalue(),
+            file_output[1].getvalue(),
+            file_state
+        )
+
+    stop_feeding = asyncio.Event()
+
+    async def feed_files():
+        filename_iterator = iter(filenames)
+        while not stop_feeding.is_set():
+            filename = await loop.run_in_executor(
+                walk_executor,
+                next,
+                filename_iterator,
+                None
+            )
+
+            if filename is None or stop_feeding.is_set():
+                break
+
+            file_task = asyncio.ensure_future(process_one_file(filename))
+            try:
+                await pending_files.put(file_task)
+            except asyncio.CancelledError:
+                await asyncio.gather(file_task, return_exceptions = True)
+                raise
+
+        await pending_files.put(None)
+
+    success = True
+    files_changed = 0
+    with walk_executor, io_executor, \
+         contextlib.redirect_stdout(stdout_capture), \
+         contextlib.redirect_stderr(stderr_capture)     :
+        feeder = asyncio.ensure_future(feed_files())
+
+        try:
+            while True:
+                file_task = await pending_files.get()
+                if file_task is None:
+                    break
+
+                (
+                    filename,
+                    file_success,
+                    known_compliant,
+                    file_stdout,
+                    file_stderr,
+                    file_state
+                ) = await file_task
+
+                stdout_capture.write(file_stdout)
+                stdout_capture.flush()
+                stderr_capture.write(file_stderr)
+                stderr_capture.flush()
+
+                if known_compliant:
+                    STATISTICS.count("files_cached")
+                    continue
+
+                count_processed_file(file_success, file_state)
+                if not file_success:
+                    success = False
+                    break
+
+                if file_state["changed"]:
+                    files_changed += 1
+
+                update_cache(cache, filename, file_state)
+        finally:
+            # Stop the feeder and wait for files already in the pipeline,
+            # even if output could not be written, so that no task uses the
+            # executors once they are shut down and no thread is left
+            # writing once processing stops.
+            stop_feeding.set()
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions = True)
+
+            remaining_tasks = []
+            while not pending_files.empty():
+                file_task = pending_files.get_nowait()
+                if file_task is not None:
+                    remaining_tasks.append(file_task)
+
+            await asyncio.gather(*remaining_tasks, return_exceptions = True)
+
+    return ( success, files_changed )
+
+
+def process_files(
+    filenames,
+    jobs,
+    cache = None,
+    io_readers = 0,
+    io_writers = 0,
+    **options
+    ):
+    """
+    Function that processes a collection of files, optionally using a pool of
+    worker processes or a pipeline of I/O threads.  Results are reported in
+    the order that the files were provided.  Processing stops after the first
+    file that fails.  When worker processes or the pipeline are used, files
+    already being processed at that point may still be modified.
+
+    :param filenames:
+        An iterable of filenames to be processed.
+
+    :param jobs:
+        The number of worker processes to use.  A value of 1 processes files
+        sequentially in this process.
+
+    :param cache:
+        The cache, as returned by load_cache, used to skip files known to
+        comply.  A value of None disables the cache.  The cache is updated
+        with each file that is processed successfully.
+
+    :param io_readers:
+        If greater than 0, then files are processed by an asyncio pipeline
+        with up to this many files being read at once and jobs is ignored.
+        See process_files_pipeline.
+
+    :param io_writers:
+        The maximum number of files being written at once by the pipeline.
+        A value of 0 uses the io_readers value.
+
+    :param options:
+        Keyword arguments to be passed to process_file for each file.
+
+    :return:
+        Returns a tuple holding a flag that is True if every file was
+        processed successfully and the number of files that were, or in check
+        mode would be, changed.
+
+    :type filenames:  iterable
+    :type jobs:       int
+    :type cache:      dict or None
+    :type io_readers: int
+    :type io_writers: int
+    :rtype:           tuple
+
+    """
+
+    return process_file_groups(
+        [ ( filenames, cache, options ) ],
+        jobs,
+        io_readers,
+        io_writers
+    )
+
+
+def process_file_groups(groups, jobs, io_readers = 0, io_writers = 0):
+    """
+    Function that processes groups of files, each group with its own cache
+    and processing options.  A single pool of worker processes is shared by
+    every group so that the workers, and the license text they have already
+    rendered, are reused across groups.  Results are reported in order and
+    processing stops after the first file that fails.  Worker processes only
+    read and update files in memory.  Backups and writes are made here, in
+    file order, so no file following a failure is modified.  See
+    process_files.
+
+    :param groups:
+        An iterable of tuples, each holding an iterable of filenames, the
+        cache used for those files and a dictionary of keyword arguments to
+        be passed to process_file for each file.  Groups are consumed lazily.
+
+    :param jobs:
+        The number of worker processes to use.  A value of 1 processes files
+        sequentially in this process.
+
+    :param io_readers:
+        If greater than 0, then each group is processed by an asyncio
+        pipeline with up to this many files being read at once and jobs is
+        ignored.  See process_files_pipeline.
+
+    :param io_writers:
+        The maximum number of files being written at once by the pipeline.
+        A value of 0 uses the io_readers value.
+
+    :return:
+        Returns a tuple holding a flag that is True if every file was
+        processed successfully and the number of files that were, or in check
+        mode would be, changed.
+
+    :type groups:     iterable
+    :type jobs:       int
+    :type io_readers: int
+    :type io_writers: int
+    :rtype:           tuple
+
+    """
+
+    success = True
+    files_changed = 0
+    start_time = time.perf_counter()
+    if io_readers > 0:
+        import asyncio
+
+        for filenames, cache, options in groups:
+            ( success, group_files_changed ) = asyncio.run(
+                process_files_pipeline(
+                    filenames,
+                    io_readers,
+                    io_writers or io_readers,
+                    cache,
+                    options
+                )
+            )
+
+            files_changed += group_files_changed
+            if not success:
+                break
+    elif jobs > 1:
+        import multiprocessing
+
+        # The pool consumes its input from a separate thread.  The semaphore
+        # keeps that thread from walking far ahead of the workers and the
+        # event stops it once a file has failed.
+        pending_jobs = threading.Semaphore(jobs * PENDING_JOBS_PER_WORKER)
+        stop_dispatch = threading.Event()
+
+        # Results are returned in job order so the cache and options of each
+        # job are queued alongside it.
+        job_groups = collections.deque()
+
+        def job_generator():
+            for filenames, cache, options in groups:
+                report_all_files = (
+                       options["verbose"]
+                    or options.get("check_report") == "json"
+                )
+
+                for filename in filenames:
+                    if stop_dispatch.is_set():
+                        return
+
+                    ( known_compliant, file_state ) = check_cache(
+                        cache,
+                        filename
+                    )
+
+                    if known_compliant:
+                        STATISTICS.count("files_cached")
+
+                    if not known_compliant or report_all_files:
+                        pending_jobs.acquire()
+                        if stop_dispatch.is_set():
+                            return
+
+                        job_groups.append(( cache, options ))
+                        yield (
+                            filename,
+                            options,
+                            known_compliant,
+                            file_state
+                        )
+
+        with multiprocessing.Pool(
+                processes = jobs,
+                initializer = initialize_worker,
+                initargs = (
+                    REGISTERED_LICENSES,
+                    not isinstance(STATISTICS, NullStatistics)
+                )
+            ) as pool:
+            results = pool.imap(
+                process_file_job,
+                job_generator(),
+                chunksize = 1
+            )
+
+            try:
+                for result in results:
+                    pending_jobs.release()
+                    ( cache, options ) = job_groups.popleft()
+
+                    (
+                        filename,
+                        file_success,
+                        file_stdout,
+                        file_stderr,
+                        file_state,
+                        file_statistics
+                    ) = result
+
+                    sys.stdout.write(file_stdout)
+                    sys.stdout.flush()
+                    sys.stderr.write(file_stderr)
+                    sys.stderr.flush()
+
+                    STATISTICS.merge(file_statistics)
+                    if file_success:
+                        file_success = write_deferred_update(
+                            filename,
+                            file_state,
+                            options["verbose"],
+                            options["create_backups"],
+                            options.get("backup_store")
+                        )
+
+                    if not file_success or "changed" in file_state:
+                        count_processed_file(file_success, file_state)
+
+                    if not file_success:
+                        success = False
+                        break
+
+                    if file_state.get("changed"):
+                        files_changed += 1
+
+                    update_cache(cache, filename, file_state)
+            finally:
+                # The input thread may be waiting for a free slot and must be
+                # woken so that the pool can shut down.
+                stop_dispatch.set()
+                pending_jobs.release()
+    else:
+        for filenames, cache, options in groups:
+            for filename in filenames:
+                ( known_compliant, file_state ) = check_cache(cache, filename)
+                if known_compliant:
+                    STATISTICS.count("files_cached")
+                    report_cached_file(
+                        filename,
+                        options["verbose"],
+                        options.get("check_report")
+                    )
+                else:
+                    success = process_file(
+                        filename = filename,
+                        file_state = file_state,
+                        **options
+                    )
+
+                    count_processed_file(success, file_state)
+                    if not success:
+                        break
+
+                    if file_state["changed"]:
+                        files_changed += 1
+
+                    update_cache(cache, filename, file_state)
+
+            if not success:
+                break
+
+    STATISTICS.add_time("total", time.perf_counter() - start_time)
+
+    return ( success, files_changed )
+
+
+def filter_document(
+    raw_content,
+    document_number,
+    verbose,
+    license_list,
+    modify_dates,
+    wrap_column,
+    filename = None,
+    copyright_holder = None,
+    preserve_content = False,
+    cleanup_tab_size = 0
+    ):
+    """
+    Function that applies the copyright date and license updates to a
+    document read from a stream.  A document that can not be updated is
+    returned unchanged.
+
+    :param raw_content:
+        The raw document content.
+
+    :param document_number:
+        The one based position of the document in the stream, used to report
+        errors.
+
+    :param verbose:
+        If True, then verbose reporting will be generated.
+
+    :param license_list:
+        An ordered list of licenses to be inserted into the document header.
+
+    :param modify_dates:
+        If True, then copyright dates should be updated.
+
+    :param wrap_column:
+        The maximum column width for the document.
+
+    :param filename:
+        The file name the document would be stored under, used to determine
+        the comment syntax.  A value of None indicates that the name is
+        unknown.
+
+    :param copyright_holder:
+        The copyright holder named in inserted headers.  See
+        update_file_content.
+
+    :param preserve_content:
+        If True, then the encoding, line endings and whitespace of the
+        document are preserved.  See update_raw_content.
+
+    :param cleanup_tab_size:
+        If greater than 0, then tabs are expanded using this distance between
+        tab stops and trailing whitespace is removed.  See
+        update_file_content.
+
+    :return:
+        Returns a tuple holding the success status and the document content
+        to be written.
+
+    :type raw_content:      bytes
+    :type document_number:  int
+    :type verbose:          bool
+    :type license_list:     list
+    :type modify_dates:     bool
+    :type wrap_column:      int
+    :type filename:         str or None
+    :type copyright_holder: str or None
+    :type preserve_content: bool
+    :type cleanup_tab_size: int
+    :rtype:                 tuple
+
+    """
+
+    if verbose:
+        sys.stdout.write("Processing document %d:\n"%document_number)
+
+    STATISTICS.count("bytes_read", len(raw_content))
+    with STATISTICS.phase("scan"):
+        requires_update = file_requires_update(
+            raw_content,
+            license_list,
+            modify_dates,
+            cleanup_tab_size
+        )
+
+    new_raw_content = raw_content
+    success = True
+    if requires_update:
+        try:
+            new_raw_content = update_raw_content(
+                raw_content,
+                verbose,
+                license_list,
+                modify_dates,
+                wrap_column,
+                filename,
+                copyright_holder,
+                preserve_content,
+                cleanup_tab_size
+            )
+        except:
+            new_raw_content = None
+
+        if new_raw_content is None:
+            sys.stderr.write(
+                "*** Could not update document %d, passed through "
+                "unchanged.\n"%document_number
+            )
+
+            new_raw_content = raw_content
+            success = False
+
+    if verbose and success and new_raw_content == raw_content:
+        sys.stdout.write("    No changes required.\n")
+
+    count_processed_file(
+        success,
+        { "changed" : new_raw_content != raw_content }
+    )
+    STATISTICS.count("bytes_written", len(new_raw_content))
+
+    return ( success, new_raw_content )
+
+
+def read_documents(input_stream, delimiter = None):
+    """
+    Generator that reads documents from a stream.  When a delimiter is used,
+    each document is yielded as soon as its delimiter has been read.
+
+    :param input_stream:
+        The binary stream to read documents from.
+
+    :param delimiter:
+        If None, then the entire stream is read as a single document.
+        Otherwise, documents are separated by this delimiter.
+
+    :return:
+        Yields tuples holding the document content and the delimiter that
+        followed it.  A final document not followed by the delimiter is
+        yielded with an empty delimiter.
+
+    :type input_stream: io.BufferedIOBase
+    :type delimiter:    bytes or None
+    :rtype:             generator
+
+    """
+
+    if delimiter is None:
+        with STATISTICS.phase("read"):
+            raw_content = input_stream.read()
+
+        yield ( raw_content, b'' )
+    else:
+        # read1 returns the data already available instead of waiting for a
+        # full buffer so that interactive streams are served promptly.
+        read_stream = getattr(input_stream, "read1", input_stream.read)
+
+        pending = b''
+        while True:
+            with STATISTICS.phase("read"):
+                chunk = read_stream(STREAM_READ_SIZE)
+
+            if not chunk:
+                break
+
+            raw_documents = (pending + chunk).split(delimiter)
+            pending = raw_documents.pop()
+            for raw_content in raw_documents:
+                yield ( raw_content, delimiter )
+
+        if pending:
+            yield ( pending, b'' )
+
+
+def filter_stream(
+    input_stream,
+    output_stream,
+    delimiter = None,
+    **options
+    ):
+    """
+    Function that reads documents from a stream, updates them and writes the
+    results to another stream.  No files are read or written and no backups
+    are created.  Verbose reporting is written to standard error so that the
+    output stream only holds document content.
+
+    :param input_stream:
+        The binary stream to read documents from.
+
+    :param output_stream:
+        The binary stream to write updated documents to.
+
+    :param delimiter:
+        If None, then the entire input stream is treated as a single
+        document.  Otherwise, documents are separated by this delimiter and
+        each updated document is written and flushed as soon as it has been
+        read, allowing a single process to serve a long running stream.
+
+    :param options:
+        Keyword arguments holding the verbose, license_list, modify_dates and
+        wrap_column settings and, optionally, the filename,
+        copyright_holder, preserve_content and cleanup_tab_size settings.
+        See filter_document.
+
+    :return:
+        Returns a tuple holding a flag that is True if every document was
+        updated successfully and the number of documents that were changed.
+
+    :type input_stream:  io.BufferedIOBase
+    :type output_stream: io.BufferedIOBase
+    :type delimiter:     bytes or None
+    :type options:       dict
+    :rtype:              tuple
+
+    """
+
+    success = True
+    documents_changed = 0
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        documents = read_documents(input_stream, delimiter)
+        for document_number, ( raw_content, terminator ) in enumerate(
+                documents,
+                start = 1
+            ):
+            ( document_success, new_raw_content ) = filter_document(
+                raw_content,
+                document_number,
+                **options
+            )
+
+            if not document_success:
+                success = False
+            elif new_raw_content != raw_content:
+                documents_changed += 1
+
+            with STATISTICS.phase("write"):
+                output_stream.write(new_raw_content)
+                output_stream.write(terminator)
+                output_stream.flush()
+
+    STATISTICS.add_time("total", time.perf_counter() - start_time)
+
+    return ( success, documents_changed )
+
+
+def manifest_settings(table, location, template_directories = ()):
+    """
+    Function that validates the settings held in a table of a manifest.
+    Licenses are resolved using resolve_license.
+
+    :param table:
+        The manifest table holding the settings.
+
+    :param location:
+        A description of the table used to report errors.
+
+    :param template_directories:
+        The directories searched for license templates.
+
+    :return:
+        Returns a dictionary holding the settings, keyed by setting name.  A
+        ValueError is raised if the table holds an invalid setting.
+
+    :type table:                dict
+    :type location:             str
+    :type template_directories: list
+    :rtype:                     dict
+
+    """
+
+    settings = {}
+    for key, value in table.items():
+        if key not in MANIFEST_SETTINGS:
+            raise ValueError("Unknown setting %s in %s"%(key, location))
+
+        ( name, expected_type ) = MANIFEST_SETTINGS[key]
+        if not isinstance(value, expected_type)                        or \
+           (expected_type is int and isinstance(value, bool))            or \
+           (    expected_type is list
+            and not all([ isinstance(v, str) for v in value ])
+           )                                                               :
+            raise ValueError("Invalid value for %s in %s"%(key, location))
+
+        if name == "license_list":
+            try:
+                value = resolve_licenses(value, template_directories)
+            except ValueError as e:
+                raise ValueError("%s in %s"%(str(e), location))
+
+        settings[name] = value
+
+    return settings
+
+
+def path_contains(root, path):
+    """
+    Function that determines if a path is a root path or lies within it.
+    Both paths must be normalized.
+
+    :param root:
+        The root path.
+
+    :param path:
+        The path to check.
+
+    :return:
+        Returns True if the path is the root or lies within it.
+
+    :type root: str
+    :type path: str
+    :rtype:     bool
+
+    """
+
+    return path == root or path.startswith(os.path.join(root, ''))
+
+
+def load_manifest(manifest_filename, defaults, template_directories = ()):
+    """
+    Function that loads a manifest describing the repositories to be
+    processed and the settings used for each.  Manifests are JSON files or,
+    if the file name ends with ".toml", TOML files.  A manifest holds an
+    optional "defaults" table and a "repositories" list.  Each repository
+    holds a "paths" list of globs, relative to the manifest's directory, and
+    any of the settings in MANIFEST_SETTINGS.  Repository settings override
+    the manifest defaults which override the provided defaults.  Each file
+    uses the settings of the first repository with a path holding it, so a
+    path within a path matched earlier is dropped and paths matched earlier
+    are excluded from the paths holding them.
+
+    :param manifest_filename:
+        The name of the manifest file.
+
+    :param defaults:
+        A dictionary holding the default value of every setting, keyed by
+        setting name.
+
+    :param template_directories:
+        The directories searched for license templates.
+
+    :return:
+        Returns a list of dictionaries, one for each path matched, holding
+        the path under "path", the paths within it used by earlier
+        repositories under "excluded_paths" and the value of every setting.
+        A relative cache filename is relative to the path.  A ValueError is
+        raised if the manifest can not be read or is invalid.
+
+    :type manifest_filename:    str
+    :type defaults:             dict
+    :type template_directories: list
+    :rtype:                     list
+
+    """
+
+    import glob
+
+    is_toml = manifest_filename.lower().endswith(".toml")
+    if is_toml:
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML manifests require Python 3.11 or later")
+
+    try:
+        with open(manifest_filename, "rb") as file_handle:
+            if is_toml:
+                manifest = tomllib.load(file_handle)
+            else:
+                manifest = json.load(file_handle)
+    except Exception as e:
+        raise ValueError(
+            "Could not load manifest %s: %s"%(manifest_filename, str(e))
+        )
+
+    if not isinstance(manifest, dict)                                  or \
+       not isinstance(manifest.get("defaults", {}), dict)              or \
+       not isinstance(manifest.get("repositories"), list)                 :
+        raise ValueError(
+            "Manifest %s must hold a \"repositories\" list"%manifest_filename
+        )
+
+    unknown_keys = set(manifest) - set([ "defaults", "repositories" ])
+    if unknown_keys:
+        raise ValueError(
+            "Unknown manifest entry %s in %s"%(
+                sorted(unknown_keys)[0],
+                manifest_filename
+            )
+        )
+
+    manifest_defaults = dict(defaults)
+    manifest_defaults.update(
+        manifest_settings(
+            manifest.get("defaults", {}),
+            "manifest defaults",
+            template_directories
+        )
+    )
+
+    base_directory = os.path.dirname(os.path.abspath(manifest_filename))
+    repositories = []
+    paths_seen = []
+    for index, entry in enumerate(manifest["repositories"], start = 1):
+        location = "manifest repository %d"%index
+        if not isinstance(entry, dict):
+            raise ValueError("Invalid %s"%location)
+
+        entry = dict(entry)
+        patterns = entry.pop("paths", None)
+        if isinstance(patterns, str):
+            patterns = [ patterns ]
+
+        if not isinstance(patterns, list)                          or \
+           not patterns                                            or \
+           not all([ isinstance(p, str) for p in patterns ])          :
+            raise ValueError("Missing \"paths\" list in %s"%location)
+
+        settings = dict(manifest_defaults)
+        settings.update(
+            manifest_settings(entry, location, template_directories)
+        )
+
+        for pattern in patterns:
+            matches = sorted(
+                glob.glob(os.path.join(base_directory, pattern))
+            )
+
+            if not matches:
+                sys.stderr.write(
+                    "*** Warning: Manifest pattern %s matched no paths.\n"%(
+                        pattern
+                    )
+                )
+
+            for path in matches:
+                path = os.path.normpath(path)
+                if not any([ path_contains(p, path) for p in paths_seen ]):
+                    repository = dict(settings)
+                    repository["path"] = path
+                    repository["excluded_paths"] = [
+                        p for p in paths_seen if path_contains(path, p)
+                    ]
+
+                    paths_seen.append(path)
+                    repositories.append(repository)
+
+    return repositories
+
+
+###############################################################################
+# Classes:
+#
+
+class Statistics:
+    """
+    Class that records the time spent in each processing phase along with
+    counters describing the work performed.  Worker processes record their
+    own statistics which are merged into the parent's statistics as results
+    are reported.
+
+    """
+
+    def __init__(self):
+        """
+        Method that initializes the statistics.
+
+        """
+
+        self.reset()
+
+    def reset(self):
+        """
+        Method that discards all recorded times and counts.  This method must
+        not be called while other threads are updating the statistics.
+
+        """
+
+        self._lock = threading.Lock()
+        self.phases = dict.fromkeys(STATISTICS_PHASES, 0.0)
+        self.counters = dict.fromkeys(STATISTICS_COUNTERS, 0)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Method that times a block of code, adding the elapsed time to a
+        phase.
+
+        :param name:
+            The name of the phase.
+
+        :type name: str
+
+        """
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_time(self, name, seconds):
+        """
+        Method that adds time to a phase.
+
+        :param name:
+            The name of the phase.
+
+        :param seconds:
+            The time to be added, in seconds.
+
+        :type name:    str
+        :type seconds: float
+
+        """
+
+        with self._lock:
+            self.phases[name] += seconds
+
+    def count(self, name, value = 1):
+        """
+        Method that increments a counter.
+
+        :param name:
+            The name of the counter.
+
+        :param value:
+            The amount to add to the counter.
+
+        :type name:  str
+        :type value: int
+
+        """
+
+        with self._lock:
+            self.counters[name] += value
+
+    def snapshot(self):
+        """
+        Method that obtains a copy of the recorded statistics.
+
+        :return:
+            Returns a dictionary holding a "phases" dictionary of times, in
+            seconds, and a "counters" dictionary of counts.
+
+        :rtype: dict
+
+        """
+
+        with self._lock:
+            return {
+                "phases" : dict(self.phases),
+                "counters" : dict(self.counters)
+            }
+
+    def merge(self, snapshot):
+        """
+        Method that adds statistics recorded elsewhere, typically by a worker
+        process, to these statistics.
+
+        :param snapshot:
+            The statistics to be added, as returned by the snapshot method.
+
+        :type snapshot: dict
+
+        """
+
+        with self._lock:
+            for name, seconds in snapshot["phases"].items():
+                self.phases[name] += seconds
+
+            for name, value in snapshot["counters"].items():
+                self.counters[name] += value
+
+    def format_summary(self):
+        """
+        Method that generates a human readable summary of the statistics.
+
+        :return:
+            Returns the summary text.
+
+        :rtype: str
+
+        """
+
+        report = self.report()
+        width = max(
+            [ len(name) for name in report["wall_clock_seconds"] ]
+          + [ len(name) for name in report["worker_seconds"] ]
+          + [ len(name) for name in report["counters"] ]
+        )
+
+        lines = [ "Statistics:", "  Wall clock time:" ]
+        for name, seconds in report["wall_clock_seconds"].items():
+            lines.append("    %-*s %12.6f s"%(width, name, seconds))
+
+        lines.append(
+            "  Processing time, summed across worker processes and threads:"
+        )
+        for name, seconds in report["worker_seconds"].items():
+            lines.append("    %-*s %12.6f s"%(width, name, seconds))
+
+        lines.append("  Counts:")
+        for name, value in report["counters"].items():
+            lines.append("    %-*s %12d"%(width, name, value))
+
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        """
+        Method that obtains a copy of the recorded statistics with wall clock
+        times kept apart from times summed across workers.
+
+        :return:
+            Returns a dictionary holding a "wall_clock_seconds" dictionary of
+            the phases in STATISTICS_WALL_CLOCK_PHASES, a "worker_seconds"
+            dictionary of the other phases and a "counters" dictionary of
+            counts.
+
+        :rtype: dict
+
+        """
+
+        snapshot = self.snapshot()
+
+        return {
+            "wall_clock_seconds" : {
+                name : seconds for name, seconds in snapshot["phases"].items()
+                if name in STATISTICS_WALL_CLOCK_PHASES
+            },
+            "worker_seconds" : {
+                name : seconds for name, seconds in snapshot["phases"].items()
+                if name not in STATISTICS_WALL_CLOCK_PHASES
+            },
+            "counters" : snapshot["counters"]
+        }
+
+    def format_json(self):
+        """
+        Method that generates a JSON report of the statistics.
+
+        :return:
+            Returns the JSON text.
+
+        :rtype: str
+
+        """
+
+        report = self.report()
+        report["version"] = VERSION
+
+        return json.dumps(report, indent = 4) + "\n"
+
+    def format_prometheus(self):
+        """
+        Method that generates a report of the statistics using the Prometheus
+        text exposition format.
+
+        :return:
+            Returns the report text.
+
+        :rtype: str
+
+        """
+
+        report = self.report()
+
+        metric = "%s_wall_clock_seconds"%STATISTICS_METRIC_PREFIX
+        lines = [
+            "# HELP %s Wall clock seconds spent in each phase."%metric,
+            "# TYPE %s gauge"%metric
+        ]
+
+        for name, seconds in report["wall_clock_seconds"].items():
+            lines.append("%s{phase=\"%s\"} %.6f"%(metric, name, seconds))
+
+        metric = "%s_worker_seconds"%STATISTICS_METRIC_PREFIX
+        lines.extend(
+            [
+                "# HELP %s Seconds spent in each processing phase, summed "
+                "across worker processes and threads."%metric,
+                "# TYPE %s gauge"%metric
+            ]
+        )
+
+        for name, seconds in report["worker_seconds"].items():
+            lines.append("%s{phase=\"%s\"} %.6f"%(metric, name, seconds))
+
+        for name, value in report["counters"].items():
+            metric = "%s_%s_total"%(STATISTICS_METRIC_PREFIX, name)
+            lines.append(
+                "# HELP %s %s"%(metric, STATISTICS_COUNTERS[name])
+            )
+            lines.append("# TYPE %s counter"%metric)
+            lines.append("%s %d"%(metric, value))
+
+        return "\n".join(lines) + "\n"
+
+
+class NullStatistics(Statistics):
+    """
+    Class that stands in for Statistics when no statistics are wanted.
+    Nothing is recorded and reports hold no times or counts.
+
+    """
+
+    def reset(self):
+        """
+        Method that discards all recorded times and counts.
+
+        """
+
+        self.phases = {}
+        self.counters = {}
+
+    def phase(self, name):
+        """
+        Method that would time a block of code.
+
+        :param name:
+            The name of the phase.
+
+        :return:
+            Returns a context manager that does nothing.
+
+        :type name: str
+        :rtype:     contextlib.nullcontext
+
+        """
+
+        return NULL_CONTEXT
+
+    def add_time(self, name, seconds):
+        """
+        Method that ignores time added to a phase.
+
+        :param name:
+            The name of the phase.
+
+        :param seconds:
+            The time to be added, in seconds.
+
+        :type name:    str
+        :type seconds: float
+
+        """
+
+        pass
+
+    def count(self, name, value = 1):
+        """
+        Method that ignores a counter increment.
+
+        :param name:
+            The name of the counter.
+
+        :param value:
+            The amount to add to the counter.
+
+        :type name:  str
+        :type value: int
+
+        """
+
+        pass
+
+    def snapshot(self):
+        """
+        Method that obtains a copy of the recorded statistics.
+
+        :return:
+            Returns a dictionary holding empty "phases" and "counters"
+            dictionaries.
+
+        :rtype: dict
+
+        """
+
+        return { "phases" : {}, "counters" : {} }
+
+    def merge(self, snapshot):
+        """
+        Method that ignores statistics recorded elsewhere.
+
+        :param snapshot:
+            The statistics to be added, as returned by the snapshot method.
+
+        :type snapshot: dict
+
+        """
+
+        pass
+
+
+NULL_CONTEXT = contextlib.nullcontext()
+"""
+The context manager returned by NullStatistics.phase.  It does nothing and
+can be entered any number of times.
+
+"""
+
+STATISTICS = Statistics()
+"""
+The statistics recorded while processing files in this process.  Replaced by
+enable_statistics.
+
+"""
+
+
+class ThreadOutput:
+    """
+    Class that stands in for an output stream, sending text written by a
+    thread to a buffer while capturing is enabled for that thread.  Text
+    written by other threads is passed to the underlying stream.
+
+    """
+
+    def __init__(self, stream):
+        """
+        Method that initializes the stand in stream.
+
+        :param stream:
+            The underlying stream.
+
+        :type stream: io.TextIOBase
+
+        """
+
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        """
+        Method that writes text to the calling thread's buffer, if any, or to
+        the underlying stream.
+
+        :param text:
+            The text to be written.
+
+        :return:
+            Returns the number of characters written.
+
+        :type text: str
+        :rtype:     int
+
+        """
+
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._stream
+
+        return buffer.write(text)
+
+    def flush(self):
+        """
+        Method that flushes the underlying stream.
+
+        """
+
+        self._stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self, buffer):
+        """
+        Method that captures text written by the calling thread.
+
+        :param buffer:
+            The buffer to receive the text.
+
+        :type buffer: io.StringIO
+
+        """
+
+        previous_buffer = getattr(self._local, "buffer", None)
+        self._local.buffer = buffer
+        try:
+            yield
+        finally:
+            self._local.buffer = previous_buffer
+
+    def __getattr__(self, name):
+        """
+        Method that forwards other attributes to the underlying stream.
+
+        :param name:
+            The attribute name.
+
+        :return:
+            Returns the attribute of the underlying stream.
+
+        :type name: str
+
+        """
+
+        return getattr(self._stream, name)
+
+
+class BackupStore:
+    """
+    Class that keeps backups of modified files in a single directory.  File
+    content is compressed and stored once per unique digest under
+    "objects" so identical files share a single copy, across runs as well as
+    within a run.  Each run records the files it backed up in a manifest under
+    "runs" so that the run can later be restored.  Instances can be passed to
+    worker processes.
+
+    """
+
+    def __init__(self, directory = DEFAULT_BACKUP_STORE, run_id = None):
+        """
+        Method that initializes the backup store.
+
+        :param directory:
+            The backup store directory.  The directory is created when the
+            first backup is made.
+
+        :param run_id:
+            The identifier of the run that backups are recorded against.  If
+            None, then a new identifier based on the current time is used.
+
+        :type directory: str
+        :type run_id:    str or None
+
+        """
+
+        if run_id is None:
+            run_id = "%s-%s"%(
+                time.strftime("%Y%m%d-%H%M%S"),
+                os.urandom(3).hex()
+            )
+
+        self.directory = os.path.abspath(directory)
+        self.run_id = run_id
+
+    def backup(self, filename, raw_content, file_mode, verbose):
+        """
+        Method that backs up the original content of a file.
+
+        :param filename:
+            The absolute path of the file being backed up.
+
+        :param raw_content:
+            The original file content.
+
+        :param file_mode:
+            The original file mode.
+
+        :param verbose:
+            If True, then verbose reporting will be generated.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type filename:    str
+        :type raw_content: bytes-like
+        :type file_mode:   int
+        :type verbose:     bool
+        :rtype:            bool
+
+        """
+
+        import zlib
+
+        success = True
 
-    if success and license_list:
         if verbose:
-            sys.stdout.write("    Updating licenses.\n")
+            sys.stdout.write("    Backing up to run %s\n"%self.run_id)
+
+        digest = file_digest(raw_content)
+        object_path = self._object_path(digest)
+        entry = json.dumps(
+            {
+                "file" : filename,
+                "object" : digest,
+                "mode" : stat.S_IMODE(file_mode),
+                "size" : len(raw_content)
+            }
+        )
+
+        try:
+            with STATISTICS.phase("backup"):
+                if os.path.exists(object_path):
+                    # Refreshed so that pruning keeps content being reused.
+                    os.utime(object_path)
+                else:
+                    self._write_object(
+                        object_path,
+                        zlib.compress(raw_content, BACKUP_COMPRESSION_LEVEL)
+                    )
+
+                manifest_path = self._manifest_path(self.run_id)
+                os.makedirs(os.path.dirname(manifest_path), exist_ok = True)
+
+                # Lines appended in a single write are not interleaved with
+                # lines appended by other worker processes.
+                with open(manifest_path, "ab") as file_handle:
+                    file_handle.write((entry + "\n").encode("utf-8"))
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not back up %s to %s: %s\n"%(
+                    filename,
+                    self.directory,
+                    str(e)
+                )
+            )
+            success = False
+        else:
+            STATISTICS.count("backups_created")
+
+        return success
+
+    def has_backups(self):
+        """
+        Method that determines if any backups were recorded against this
+        run.
+
+        :return:
+            Returns True if the run holds backups.
+
+        :rtype: bool
+
+        """
+
+        return os.path.exists(self._manifest_path(self.run_id))
+
+    def list_runs(self):
+        """
+        Method that lists the runs held in the backup store.
+
+        :return:
+            Returns a list of tuples holding each run identifier and the
+            number of files backed up by the run, oldest first.
+
+        :rtype: list
+
+        """
+
+        runs_path = os.path.join(self.directory, "runs")
+        try:
+            names = sorted(os.listdir(runs_path))
+        except FileNotFoundError:
+            names = []
+
+        runs = []
+        for name in names:
+            if name.endswith(".jsonl"):
+                run_id = name[:-6]
+                runs.append(( run_id, len(self._read_manifest(run_id)) ))
+
+        return runs
+
+    def restore(self, run_id, verbose):
+        """
+        Method that restores every file backed up by a run to its original
+        content and permissions.  Files that can not be restored are reported
+        and the remaining files are still restored.
+
+        :param run_id:
+            The identifier of the run to be restored.
+
+        :param verbose:
+            If True, then verbose reporting will be generated.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type run_id:  str
+        :type verbose: bool
+        :rtype:        bool
+
+        """
+
+        success = True
+
+        entries = None
+        if BACKUP_RUN_ID_RE.fullmatch(run_id):
+            try:
+                entries = self._read_manifest(run_id)
+            except (OSError, ValueError):
+                pass
+
+        if entries is None:
+            sys.stderr.write(
+                "*** Could not read backup run %s from %s\n"%(
+                    run_id,
+                    self.directory
+                )
+            )
+            success = False
+        else:
+            restored_files = set()
+            failed_files = []
+            for entry in entries:
+                filename = entry["file"]
+                if filename in restored_files:
+                    # A file backed up more than once is restored to the
+                    # content it held when the run started.
+                    continue
+
+                restored_files.add(filename)
+                if verbose:
+                    sys.stdout.write("Restoring %s\n"%filename)
+
+                try:
+                    self._restore_file(entry)
+                except Exception as e:
+                    sys.stderr.write(
+                        "*** Could not restore %s: %s\n"%(
+                            filename,
+                            str(e)
+                        )
+                    )
+                    failed_files.append(filename)
+
+            if failed_files:
+                sys.stderr.write(
+                    "*** %d of %d file(s) in run %s were not restored:\n"%(
+                        len(failed_files),
+                        len(restored_files),
+                        run_id
+                    )
+                )
+
+                for filename in failed_files:
+                    sys.stderr.write("***     %s\n"%filename)
+
+                success = False
+
+        return success
+
+    def prune(self, keep_runs, verbose):
+        """
+        Method that removes all but the most recent runs from the backup
+        store, then removes stored content that no remaining run references.
+        Content backed up within BACKUP_PRUNE_GRACE_PERIOD is kept.
+
+        :param keep_runs:
+            The number of most recent runs to keep.
+
+        :param verbose:
+            If True, then verbose reporting will be generated.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type keep_runs: int
+        :type verbose:   bool
+        :rtype:          bool
+
+        """
+
+        success = True
+
+        run_ids = [ run_id for run_id, _ in self.list_runs() ]
+        if keep_runs > 0:
+            removed_run_ids = run_ids[:-keep_runs]
+        else:
+            removed_run_ids = run_ids
+
+        for run_id in removed_run_ids:
+            if verbose:
+                sys.stdout.write("Removing run %s\n"%run_id)
+
+            try:
+                os.unlink(self._manifest_path(run_id))
+            except OSError as e:
+                sys.stderr.write(
+                    "*** Could not remove backup run %s: %s\n"%(
+                        run_id,
+                        str(e)
+                    )
+                )
+                success = False
+
+        referenced_objects = set()
+        for run_id in run_ids:
+            try:
+                referenced_objects.update(
+                    [ e["object"] for e in self._read_manifest(run_id) ]
+                )
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError) as e:
+                # Content is only removed when every reference is known.
+                sys.stderr.write(
+                    "*** Could not read backup run %s: %s\n"%(run_id, str(e))
+                )
+                return False
+
+        removed_objects = 0
+        oldest_kept = time.time() - BACKUP_PRUNE_GRACE_PERIOD
+        objects_path = os.path.join(self.directory, "objects")
+        for directory, _, names in os.walk(objects_path):
+            for name in names:
+                object_path = os.path.join(directory, name)
+                try:
+                    if     name not in referenced_objects                  \
+                       and os.stat(object_path).st_mtime < oldest_kept    :
+                        os.unlink(object_path)
+                        removed_objects += 1
+                except OSError as e:
+                    sys.stderr.write(
+                        "*** Could not remove %s: %s\n"%(object_path, str(e))
+                    )
+                    success = False
+
+        sys.stdout.write(
+            "Removed %d run(s) and %d stored file(s) from %s.\n"%(
+                len(removed_run_ids),
+                removed_objects,
+                self.directory
+            )
+        )
+
+        return success
+
+    def _object_path(self, digest):
+        """
+        Method that determines where content with a given digest is stored.
+
+        :param digest:
+            The content digest.
+
+        :return:
+            Returns the path of the stored object.
+
+        :type digest: str
+        :rtype:       str
+
+        """
+
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _manifest_path(self, run_id):
+        """
+        Method that determines where the manifest for a run is stored.
+
+        :param run_id:
+            The run identifier.
+
+        :return:
+            Returns the path of the manifest.
+
+        :type run_id: str
+        :rtype:       str
+
+        """
+
+        return os.path.join(self.directory, "runs", run_id + ".jsonl")
+
+    def _write_object(self, object_path, compressed_content):
+        """
+        Method that atomically writes a stored object.
+
+        :param object_path:
+            The path of the object.
+
+        :param compressed_content:
+            The compressed file content.
+
+        :type object_path:        str
+        :type compressed_content: bytes
+
+        """
+
+        import tempfile
+
+        object_directory = os.path.dirname(object_path)
+        os.makedirs(object_directory, exist_ok = True)
+
+        ( file_descriptor, temporary_filename ) = tempfile.mkstemp(
+            suffix = ".tmp",
+            dir = object_directory
+        )
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_handle:
+                file_handle.write(compressed_content)
+
+            os.replace(temporary_filename, object_path)
+        except:
+            try:
+                os.unlink(temporary_filename)
+            except OSError:
+                pass
+
+            raise
+
+    def _read_manifest(self, run_id):
+        """
+        Method that reads the manifest for a run.
+
+        :param run_id:
+            The run identifier.
+
+        :return:
+            Returns the list of manifest entries in the order they were
+            recorded.
+
+        :type run_id: str
+        :rtype:       list
+
+        """
+
+        with open(self._manifest_path(run_id), "r", encoding = "utf-8") as f:
+            return [ json.loads(l) for l in f if l.strip() ]
+
+    def _restore_file(self, entry):
+        """
+        Method that restores a single file from a manifest entry.
+
+        :param entry:
+            The manifest entry.
+
+        :type entry: dict
+
+        """
+
+        import zlib
+
+        with open(self._object_path(entry["object"]), "rb") as file_handle:
+            content = zlib.decompress(file_handle.read())
+
+        if file_digest(content) != entry["object"]:
+            raise ValueError("backup content is corrupt")
+
+        filename = entry["file"]
+        if os.path.exists(filename):
+            replace_file_content(filename, [ content ])
+        else:
+            os.makedirs(os.path.dirname(filename), exist_ok = True)
+            with open(filename, "wb") as file_handle:
+                file_handle.write(content)
+
+        os.chmod(filename, entry["mode"])
+
+
+class FileWatcher:
+    """
+    Class that reports files that change within a set of files and directory
+    trees.  Changes are reported by inotify where available.  Otherwise the
+    directory trees are scanned periodically.  Directories are selected using
+    the same include, exclude and .gitignore settings as walk_directory.
+
+    """
+
+    def __init__(
+        self,
+        paths,
+        include_patterns = (),
+        exclude_patterns = (),
+        honour_gitignore = True,
+        poll_interval = None
+        ):
+        """
+        Method that initializes the watcher and starts watching for changes.
+
+        :param paths:
+            The files and directories to watch.
+
+        :param include_patterns:
+            A list of globs.  If not empty, then only changes to files in
+            directories matching one of these globs are reported.
+
+        :param exclude_patterns:
+            A list of globs used to ignore files and directories found in
+            directories.
+
+        :param honour_gitignore:
+            If True, then .gitignore files found in directories will be
+            honoured.
+
+        :param poll_interval:
+            The time, in seconds, between scans for changes.  If None, then
+            inotify is used if it is available.  Otherwise the directories are
+            scanned every DEFAULT_POLL_INTERVAL seconds.
+
+        :type paths:            list
+        :type include_patterns: list
+        :type exclude_patterns: list
+        :type honour_gitignore: bool
+        :type poll_interval:    float or None
+
+        """
+
+        self.paths = [ os.path.abspath(p) for p in paths ]
+        self.include_patterns = list(include_patterns)
+        self.exclude_patterns = list(exclude_patterns)
+        self.honour_gitignore = honour_gitignore
+
+        self._inotify_fd = None
+        self._watches = {}
+
+        if poll_interval is None and self._start_inotify():
+            self.poll_interval = None
+        else:
+            self.poll_interval = poll_interval or DEFAULT_POLL_INTERVAL
+            self._snapshot = self._scan()
+            self._next_scan = time.monotonic() + self.poll_interval
+
+    def changes(self, timeout):
+        """
+        Method that waits for files to change.
+
+        :param timeout:
+            The maximum time, in seconds, to wait.
+
+        :return:
+            Returns the set of files that changed.  The set is empty if no
+            files changed before the timeout expired.
+
+        :type timeout: float
+        :rtype:        set
+
+        """
+
+        if self._inotify_fd is not None:
+            changed = self._read_events(timeout)
+        else:
+            changed = self._poll(timeout)
+
+        return changed
+
+    def close(self):
+        """
+        Method that stops watching for changes.
+
+        """
+
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+            self._watches = {}
+
+    def _selected(self, root, path, is_directory):
+        """
+        Method that determines if a changed path is being watched.
+
+        :param root:
+            The watched file or directory holding the path.
+
+        :param path:
+            The path that changed.
+
+        :param is_directory:
+            If True, then the path is a directory.
+
+        :return:
+            Returns True if the path is being watched.
+
+        :type root:         str
+        :type path:         str
+        :type is_directory: bool
+        :rtype:             bool
+
+        """
+
+        if os.path.isdir(root):
+            selected = path_selected(
+                root,
+                path,
+                is_directory,
+                self.include_patterns,
+                self.exclude_patterns,
+                self.honour_gitignore
+            )
+        else:
+            selected = path == root
+
+        return selected
+
+    def _start_inotify(self):
+        """
+        Method that watches every selected directory using inotify.
+
+        :return:
+            Returns True on success.  Returns False if inotify is not
+            available or the directories could not all be watched.
+
+        :rtype: bool
+
+        """
+
+        import ctypes
+
+        try:
+            libc = ctypes.CDLL(None, use_errno = True)
+            inotify_init = libc.inotify_init1
+            self._inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return False
+
+        self._inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32
+        ]
+
+        inotify_fd = inotify_init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if inotify_fd < 0:
+            return False
+
+        self._inotify_fd = inotify_fd
+        try:
+            for path in self.paths:
+                if os.path.isdir(path):
+                    self._watch_tree(path, path)
+                else:
+                    self._watch_directory(os.path.dirname(path), path)
+        except OSError as e:
+            sys.stderr.write(
+                "*** Could not watch for changes using inotify, scanning "
+                "for changes instead: %s\n"%str(e)
+            )
+            self.close()
+            return False
+
+        return True
+
+    def _watch_directory(self, directory, root):
+        """
+        Method that adds an inotify watch for a single directory.  Directories
+        that no longer exist are ignored.
+
+        :param directory:
+            The directory to watch.
+
+        :param root:
+            The watched file or directory the directory was found under.
+
+        :type directory: str
+        :type root:      str
+
+        """
+
+        import ctypes
+
+        watch_descriptor = self._inotify_add_watch(
+            self._inotify_fd,
+            os.fsencode(directory),
+            INOTIFY_WATCH_MASK
+        )
+
+        if watch_descriptor >= 0:
+            self._watches[watch_descriptor] = ( directory, root )
+        else:
+            error_number = ctypes.get_errno()
+            if error_number not in ( errno.ENOENT, errno.ENOTDIR ):
+                raise OSError(
+                    error_number,
+                    os.strerror(error_number),
+                    directory
+                )
+
+    def _watch_tree(self, directory, root):
+        """
+        Method that adds inotify watches for a directory and every selected
+        directory below it.
+
+        :param directory:
+            The top of the directory tree to watch.
+
+        :param root:
+            The watched directory the tree was found under.
+
+        :type directory: str
+        :type root:      str
+
+        """
+
+        pending = [ directory ]
+        while pending:
+            directory = pending.pop()
+            self._watch_directory(directory, root)
+
+            try:
+                with os.scandir(directory) as iterator:
+                    for entry in iterator:
+                        if     entry.is_dir(follow_symlinks = False)        \
+                           and self._selected(root, entry.path, True)      :
+                            pending.append(entry.path)
+            except OSError:
+                pass
+
+    def _read_events(self, timeout):
+        """
+        Method that waits for inotify events and returns the files they
+        report.  New directories are watched and the files they hold are
+        reported.  If the kernel discarded events, then every watched file is
+        reported.
+
+        :param timeout:
+            The maximum time, in seconds, to wait.
+
+        :return:
+            Returns the set of files that changed.
+
+        :type timeout: float
+        :rtype:        set
+
+        """
+
+        import select
+        import struct
+
+        changed = set()
+
+        ( readable, _, _ ) = select.select(
+            [ self._inotify_fd ],
+            [],
+            [],
+            timeout
+        )
+
+        if readable:
+            try:
+                events = os.read(self._inotify_fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                events = b''
+
+            offset = 0
+            while offset + INOTIFY_EVENT_SIZE <= len(events):
+                ( watch_descriptor, mask, _, name_length ) = (
+                    struct.unpack_from("iIII", events, offset)
+                )
+
+                offset += INOTIFY_EVENT_SIZE
+                name = events[offset:offset + name_length].rstrip(b'\0')
+                offset += name_length
+
+                if mask & INOTIFY_QUEUE_OVERFLOW:
+                    changed.update(self._scan())
+                elif mask & INOTIFY_IGNORED:
+                    self._watches.pop(watch_descriptor, None)
+                elif name and watch_descriptor in self._watches:
+                    ( directory, root ) = self._watches[watch_descriptor]
+                    path = os.path.join(directory, os.fsdecode(name))
+                    if mask & INOTIFY_IS_DIRECTORY:
+                        if self._selected(root, path, True):
+                            self._watch_tree(path, root)
+                            changed.update(
+                                f for f in walk_source_files(
+                                    [ path ],
+                                    honour_gitignore = self.honour_gitignore
+                                )
+                                if self._selected(root, f, False)
+                            )
+                    elif     mask & (INOTIFY_CLOSE_WRITE | INOTIFY_MOVED_TO) \
+                         and self._selected(root, path, False)              :
+                        changed.add(path)
+
+        return changed
+
+    def _poll(self, timeout):
+        """
+        Method that scans the watched files and directories for changes once
+        the poll interval has passed.
+
+        :param timeout:
+            The maximum time, in seconds, to wait for the next scan.
+
+        :return:
+            Returns the set of files that were created or modified since the
+            previous scan.
+
+        :type timeout: float
+        :rtype:        set
+
+        """
+
+        changed = set()
+
+        delay = self._next_scan - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+
+        if time.monotonic() >= self._next_scan:
+            snapshot = self._scan()
+            changed.update(
+                f for f, s in snapshot.items() if self._snapshot.get(f) != s
+            )
+
+            self._snapshot = snapshot
+            self._next_scan = time.monotonic() + self.poll_interval
+
+        return changed
+
+    def _scan(self):
+        """
+        Method that finds the size and modification time of every watched
+        file.
+
+        :return:
+            Returns a dictionary holding the size and modification time of
+            each file, keyed by file name.
+
+        :rtype: dict
+
+        """
+
+        snapshot = {}
+        for filename in walk_source_files(
+                self.paths,
+                self.include_patterns,
+                self.exclude_patterns,
+                self.honour_gitignore
+            ):
+            try:
+                file_stat = os.stat(filename)
+            except OSError:
+                continue
+
+            snapshot[filename] = ( file_stat.st_size, file_stat.st_mtime_ns )
+
+        return snapshot
+
+
+class TextServer:
+    """
+    Class that updates in-memory source text for editors and other tools
+    over a Unix domain socket.  Each request is a single line holding a JSON
+    object with a "text" member and an optional "filename" member.  Each
+    response is a single line holding a JSON object with the updated "text"
+    and a "changed" flag, or an "error" message.  Any number of requests can
+    be sent over a connection.  Connections are served by separate threads.
+
+    """
+
+    def __init__(self, processor, socket_filename):
+        """
+        Method that initializes the server.
+
+        :param processor:
+            The processor used to update text.
+
+        :param socket_filename:
+            The file name of the socket.
+
+        :type processor:       LicenseProcessor
+        :type socket_filename: str
+
+        """
+
+        self.processor = processor
+        self.socket_filename = socket_filename
+        self._socket = None
+
+    def start(self):
+        """
+        Method that creates the socket and starts accepting connections.  A
+        stale socket left by an earlier server is replaced.  The socket can
+        only be used by the current user.  An OSError is raised if the socket
+        can not be created.
+
+        """
+
+        import socket
+
+        try:
+            if stat.S_ISSOCK(os.lstat(self.socket_filename).st_mode):
+                os.unlink(self.socket_filename)
+        except FileNotFoundError:
+            pass
+
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server_socket.bind(self.socket_filename)
+            server_socket.listen()
+        except OSError:
+            server_socket.close()
+            raise
+        finally:
+            os.umask(old_umask)
+
+        self._socket = server_socket
+        threading.Thread(
+            target = self._accept_connections,
+            args = ( server_socket, ),
+            daemon = True
+        ).start()
+
+    def close(self):
+        """
+        Method that stops accepting connections and removes the socket.
+
+        """
+
+        import socket
+
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            self._socket.close()
+            self._socket = None
+
+            try:
+                os.unlink(self.socket_filename)
+            except OSError:
+                pass
+
+    def handle_request(self, request_line):
+        """
+        Method that handles a single request.
+
+        :param request_line:
+            The request, holding a JSON object.
+
+        :return:
+            Returns the response object.
+
+        :type request_line: bytes
+        :rtype:             dict
+
+        """
+
+        try:
+            request = json.loads(request_line)
+        except ValueError:
+            request = None
+
+        if     not isinstance(request, dict)                                 \
+           or not isinstance(request.get("text"), str)                        \
+           or not isinstance(request.get("filename", ""), (str, type(None))):
+            return { "error" : "Invalid request" }
+
+        text = self.processor.process_text(
+            request["text"],
+            request.get("filename")
+        )
+
+        if text is not None:
+            response = { "text" : text, "changed" : text != request["text"] }
+        else:
+            response = { "error" : "Could not update text" }
+
+        return response
+
+    def _accept_connections(self, server_socket):
+        """
+        Method that accepts connections until the socket is closed.
+
+        :param server_socket:
+            The listening socket.
+
+        :type server_socket: socket.socket
+
+        """
+
+        while True:
+            try:
+                ( connection, _ ) = server_socket.accept()
+            except OSError:
+                break
+
+            threading.Thread(
+                target = self._serve_connection,
+                args = ( connection, ),
+                daemon = True
+            ).start()
+
+    def _serve_connection(self, connection):
+        """
+        Method that serves requests sent over a connection until the
+        connection is closed.
+
+        :param connection:
+            The connected socket.
+
+        :type connection: socket.socket
+
+        """
+
+        try:
+            with connection,                                                 \
+                 connection.makefile("rb") as reader,                        \
+                 connection.makefile("wb") as writer :
+                for request_line in reader:
+                    if request_line.strip():
+                        response = self.handle_request(request_line)
+                        writer.write(
+                            json.dumps(response).encode("utf-8") + b'\n'
+                        )
+                        writer.flush()
+        except OSError:
+            pass
+
+
+class LicenseProcessor:
+    """
+    Class you can use to update license headers and copyright dates from
+    other Python tools.  The processor is configured once and can then be
+    used to process any number of files, directory trees or in-memory text
+    without starting a new interpreter.
+
+    """
+
+    def __init__(
+        self,
+        license_list = (),
+        wrap_column = DEFAULT_COLUMN_WIDTH,
+        modify_dates = False,
+        create_backups = True,
+        header_only = False,
+        check_report = None,
+        verbose = False,
+        jobs = DEFAULT_JOBS,
+        cache_filename = None,
+        include_patterns = (),
+        exclude_patterns = (),
+        honour_gitignore = True,
+        backup_layout = DEFAULT_BACKUP_LAYOUT,
+        backup_store_directory = DEFAULT_BACKUP_STORE,
+        io_readers = 0,
+        io_writers = 0,
+        copyright_holder = None,
+        preserve_content = False,
+        maximum_size = DEFAULT_MAXIMUM_FILE_SIZE,
+        skip_generated = True,
+        cleanup_tab_size = 0,
+        template_directories = ()
+        ):
+        """
+        Method that initializes the processor.
+
+        :param license_list:
+            An ordered list of licenses to be inserted into source file
+            headers.  Licenses are not changed if the list is empty.  Each
+            license is a name in LICENSE_TEXT or an SPDX identifier.  See
+            resolve_license.
+
+        :param wrap_column:
+            The maximum column width for files.
+
+        :param modify_dates:
+            If True, then copyright dates should be updated.
+
+        :param create_backups:
+            If True, then a backup of each modified file will be created.
+
+        :param header_only:
+            If True, then only copyright headers are read and rewritten.  See
+            process_file_header.
+
+        :param check_report:
+            If not None, then files are checked without being modified.  The
+            value selects the report generated, either "diff" or "json".
+
+        :param verbose:
+            If True, then verbose reporting will be generated.
+
+        :param jobs:
+            The number of worker processes used to process files.  A value of
+            0 uses one worker process per CPU.
+
+        :param cache_filename:
+            The name of the file used to cache files known to comply.  A
+            value of None disables the cache.
+
+        :param include_patterns:
+            Globs used to limit the files found when walking directories.
+
+        :param exclude_patterns:
+            Globs used to skip files and directories when walking
+            directories.
+
+        :param honour_gitignore:
+            If True, then .gitignore files are honoured when walking
+            directories.
+
+        :param backup_layout:
+            The layout used for backups.  See BACKUP_LAYOUTS.
+
+        :param backup_store_directory:
+            The backup store directory used by the "store" backup layout.
+
+        :param io_readers:
+            If greater than 0, then files are processed by an asyncio
+            pipeline with up to this many files being read at once.  Can not
+            be combined with more than one job.
+
+        :param io_writers:
+            The maximum number of files being written at once by the
+            pipeline.  A value of 0 uses the io_readers value.
+
+        :param copyright_holder:
+            The copyright holder named in headers inserted into files that
+            lack one.  If None, then files without a header are left
+            unchanged.
+
+        :param preserve_content:
+            If True, then only copyright headers and lines holding copyright
+            dates are rewritten.  The encoding, line endings and whitespace
+            of files are preserved.  See update_raw_content.
+
+        :param maximum_size:
+            The size of the largest file processed.  Binary files, and files
+            larger than this size, are skipped.  A value of 0 disables the
+            size limit.
+
+        :param skip_generated:
+            If True, then files marked as generated are skipped.
+
+        :param cleanup_tab_size:
+            If greater than 0, then tabs are expanded using this distance
+            between tab stops and trailing whitespace is removed.  Files are
+            cleaned up in the same pass that updates their licenses and
+            dates.
+
+        :param template_directories:
+            The directories searched for license templates before the
+            templates shipped with this script.
+
+        :type license_list:           list
+        :type wrap_column:            int
+        :type modify_dates:           bool
+        :type create_backups:         bool
+        :type header_only:            bool
+        :type check_report:           str or None
+        :type verbose:                bool
+        :type jobs:                   int
+        :type cache_filename:         str or None
+        :type include_patterns:       list
+        :type exclude_patterns:       list
+        :type honour_gitignore:       bool
+        :type backup_layout:          str
+        :type backup_store_directory: str
+        :type io_readers:             int
+        :type io_writers:             int
+        :type copyright_holder:       str or None
+        :type preserve_content:       bool
+        :type maximum_size:           int
+        :type skip_generated:         bool
+        :type cleanup_tab_size:       int
+        :type template_directories:   list
+
+        """
+
+        license_list = resolve_licenses(license_list, template_directories)
+
+        if backup_layout not in BACKUP_LAYOUTS:
+            raise ValueError("Unknown backup layout %s"%backup_layout)
+
+        if io_readers < 0 or io_writers < 0:
+            raise ValueError("I/O limits must be 0 or greater")
+
+        if io_readers > 0 and jobs != 1:
+            raise ValueError("The I/O pipeline can not be used with jobs")
+
+        if maximum_size < 0:
+            raise ValueError("The maximum file size must be 0 or greater")
+
+        if cleanup_tab_size < 0:
+            raise ValueError("The tab size must be 0 or greater")
+
+        self.license_list = list(license_list)
+        self.wrap_column = wrap_column
+        self.modify_dates = modify_dates
+        self.create_backups = create_backups
+        self.header_only = header_only
+        self.check_report = check_report
+        self.verbose = verbose
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.cache_filename = cache_filename
+        self.include_patterns = list(include_patterns)
+        self.exclude_patterns = list(exclude_patterns)
+        self.honour_gitignore = honour_gitignore
+        self.io_readers = io_readers
+        self.io_writers = io_writers
+        self.copyright_holder = copyright_holder
+        self.preserve_content = preserve_content
+        self.maximum_size = maximum_size
+        self.skip_generated = skip_generated
+        self.cleanup_tab_size = cleanup_tab_size
+        self.template_directories = list(template_directories)
+
+        if backup_layout == "store":
+            self.backup_store = BackupStore(backup_store_directory)
+        else:
+            self.backup_store = None
+
+        self.files_changed = 0
+        self._cache = None
+
+    def clear_cache(self):
+        """
+        Method that discards the contents of the cache.  The empty cache is
+        written the next time files are processed.
+
+        """
+
+        self._cache = {
+            "fingerprint" : self._cache_fingerprint(),
+            "entries" : {},
+            "headers" : []
+        }
+
+    def process_text(self, text, filename = None):
+        """
+        Method that updates source text held in memory.  No files are read or
+        written.  If the processor preserves content, then the line endings
+        and whitespace of the text are kept.
+
+        :param text:
+            The source text to be updated.
+
+        :param filename:
+            The file name the text would be stored under, used to determine
+            the comment syntax.  A value of None indicates that the name is
+            unknown.
+
+        :return:
+            Returns the updated text.  Returns None on error.
+
+        :type text:     str
+        :type filename: str or None
+        :rtype:         str or None
+
+        """
+
+        if self.preserve_content:
+            new_raw_content = update_raw_content(
+                text.encode("utf-8"),
+                False,
+                self.license_list,
+                self.modify_dates,
+                self.wrap_column,
+                filename,
+                self.copyright_holder,
+                True,
+                self.cleanup_tab_size
+            )
+
+            if new_raw_content is not None:
+                result = new_raw_content.decode("utf-8")
+            else:
+                result = None
+        else:
+            file_content = update_file_content(
+                [ l.rstrip() for l in io.StringIO(text, newline = None) ],
+                False,
+                self.license_list,
+                self.modify_dates,
+                self.wrap_column,
+                filename,
+                self.copyright_holder,
+                self.cleanup_tab_size
+            )
+
+            if file_content is not None:
+                result = "".join([ l + "\n" for l in file_content ])
+            else:
+                result = None
+
+        return result
+
+    def process_stream(
+        self,
+        input_stream,
+        output_stream,
+        delimiter = None,
+        filename = None
+        ):
+        """
+        Method that updates documents read from a binary stream, writing the
+        results to another binary stream.  See filter_stream.  The number of
+        documents changed is added to the files_changed attribute.
+
+        :param input_stream:
+            The binary stream to read documents from.
+
+        :param output_stream:
+            The binary stream to write updated documents to.
+
+        :param delimiter:
+            The delimiter separating documents.  If None, then the entire
+            stream is a single document.
+
+        :param filename:
+            The file name the documents would be stored under, used to
+            determine the comment syntax.  A value of None indicates that the
+            name is unknown.
+
+        :return:
+            Returns True on success.  Returns False if any document could not
+            be updated.
+
+        :type input_stream:  io.BufferedIOBase
+        :type output_stream: io.BufferedIOBase
+        :type delimiter:     bytes or None
+        :type filename:      str or None
+        :rtype:              bool
+
+        """
+
+        ( success, documents_changed ) = filter_stream(
+            input_stream,
+            output_stream,
+            delimiter,
+            verbose = self.verbose,
+            license_list = self.license_list,
+            modify_dates = self.modify_dates,
+            wrap_column = self.wrap_column,
+            filename = filename,
+            copyright_holder = self.copyright_holder,
+            preserve_content = self.preserve_content,
+            cleanup_tab_size = self.cleanup_tab_size
+        )
+
+        self.files_changed += documents_changed
+
+        return success
+
+    def process_path(self, path):
+        """
+        Method that processes a single file or directory tree.
+
+        :param path:
+            The file or directory to be processed.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type path: str
+        :rtype:     bool
+
+        """
+
+        return self.process_many([ path ])
+
+    def process_many(self, paths):
+        """
+        Method that processes a collection of files and directory trees.
+        Directories are walked using the include, exclude and .gitignore
+        settings.
+
+        :param paths:
+            The files and directories to be processed.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type paths: list
+        :rtype:      bool
+
+        """
+
+        return self.process_filenames(
+            walk_source_files(
+                paths,
+                self.include_patterns,
+                self.exclude_patterns,
+                self.honour_gitignore
+            )
+        )
+
+    def process_filenames(self, filenames):
+        """
+        Method that processes files without walking directories.  The number
+        of files that were, or in check mode would be, changed is added to
+        the files_changed attribute.
+
+        :param filenames:
+            An iterable of filenames to be processed.
+
+        :return:
+            Returns True on success.  Returns False on error.
+
+        :type filenames: iterable
+        :rtype:          bool
+
+        """
+
+        if self.cache_filename is not None and self._cache is None:
+            self._cache = load_cache(
+                self.cache_filename,
+                self._cache_fingerprint()
+            )
+
+        ( success, files_changed ) = process_files(
+            filenames,
+            self.jobs,
+            self._cache,
+            self.io_readers,
+            self.io_writers,
+            verbose = self.verbose,
+            license_list = self.license_list,
+            modify_dates = self.modify_dates,
+            create_backups = self.create_backups,
+            wrap_column = self.wrap_column,
+            header_only = self.header_only,
+            check_report = self.check_report,
+            backup_store = self.backup_store,
+            copyright_holder = self.copyright_holder,
+            preserve_content = self.preserve_content,
+            maximum_size = self.maximum_size,
+            skip_generated = self.skip_generated,
+            cleanup_tab_size = self.cleanup_tab_size
+        )
+
+        self.files_changed += files_changed
+
+        if self.cache_filename is not None and self._cache is not None:
+            if not save_cache(self.cache_filename, self._cache):
+                success = False
+
+        return success
+
+    def process_manifest(self, manifest_filename):
+        """
+        Method that processes every repository described by a manifest in a
+        single run.  The settings of this processor are used as the defaults
+        for the manifest.  All repositories share the same worker processes.
+        A cache is kept for each repository with a cache filename.  The
+        number of files that were, or in check mode would be, changed is
+        added to the files_changed attribute.  See load_manifest.
+
+        :param manifest_filename:
+            The name of the manifest file.
+
+        :return:
+            Returns True on success.  Returns False on error.  A ValueError is
+            raised if the manifest is invalid.
+
+        :type manifest_filename: str
+        :rtype:                  bool
+
+        """
+
+        repositories = load_manifest(
+            manifest_filename,
+            {
+                "license_list" : self.license_list,
+                "wrap_column" : self.wrap_column,
+                "modify_dates" : self.modify_dates,
+                "header_only" : self.header_only,
+                "copyright_holder" : self.copyright_holder,
+                "preserve_content" : self.preserve_content,
+                "maximum_size" : self.maximum_size,
+                "skip_generated" : self.skip_generated,
+                "cleanup_tab_size" : self.cleanup_tab_size,
+                "include_patterns" : self.include_patterns,
+                "exclude_patterns" : self.exclude_patterns,
+                "cache_filename" : None
+            },
+            self.template_directories
+        )
+
+        caches = []
+
+        def groups():
+            for repository in repositories:
+                path = repository["path"]
+                cache_filename = repository["cache_filename"]
+                if cache_filename is not None:
+                    if os.path.isdir(path):
+                        cache_directory = path
+                    else:
+                        cache_directory = os.path.dirname(path)
+
+                    cache_filename = os.path.abspath(
+                        os.path.join(cache_directory, cache_filename)
+                    )
+
+                    cache = load_cache(
+                        cache_filename,
+                        cache_fingerprint(
+                            repository["license_list"],
+                            repository["modify_dates"],
+                            repository["wrap_column"],
+                            repository["header_only"],
+                            repository["copyright_holder"],
+                            repository["preserve_content"],
+                            repository["maximum_size"],
+                            repository["skip_generated"],
+                            repository["cleanup_tab_size"]
+                        )
+                    )
+
+                    caches.append(( cache_filename, cache ))
+                else:
+                    cache = None
+
+                filenames = walk_source_files(
+                    [ path ],
+                    repository["include_patterns"],
+                    repository["exclude_patterns"],
+                    self.honour_gitignore
+                )
+
+                if cache_filename is not None:
+                    # The cache is often kept within the repository.
+                    filenames = (
+                        f for f in filenames
+                        if os.path.abspath(f) != cache_filename
+                    )
+
+                excluded_paths = repository["excluded_paths"]
+                if excluded_paths:
+                    # Files within paths of earlier repositories use their
+                    # settings and must only be processed once.
+                    filenames = (
+                        f for f in filenames
+                        if not any(
+                            [
+                                path_contains(p, os.path.abspath(f))
+                                for p in excluded_paths
+                            ]
+                        )
+                    )
+
+                options = {
+                    "verbose" : self.verbose,
+                    "license_list" : repository["license_list"],
+                    "modify_dates" : repository["modify_dates"],
+                    "create_backups" : self.create_backups,
+                    "wrap_column" : repository["wrap_column"],
+                    "header_only" : repository["header_only"],
+                    "check_report" : self.check_report,
+                    "backup_store" : self.backup_store,
+                    "copyright_holder" : repository["copyright_holder"],
+                    "preserve_content" : repository["preserve_content"],
+                    "maximum_size" : repository["maximum_size"],
+                    "skip_generated" : repository["skip_generated"],
+                    "cleanup_tab_size" : repository["cleanup_tab_size"]
+                }
+
+                yield ( filenames, cache, options )
+
+        ( success, files_changed ) = process_file_groups(
+            groups(),
+            self.jobs,
+            self.io_readers,
+            self.io_writers
+        )
+
+        self.files_changed += files_changed
+
+        for cache_filename, cache in caches:
+            if not save_cache(cache_filename, cache):
+                success = False
+
+        return success
+
+    def watch(
+        self,
+        paths,
+        debounce_delay = DEFAULT_DEBOUNCE_DELAY,
+        socket_filename = None,
+        poll_interval = None,
+        stop_event = None
+        ):
+        """
+        Method that processes files and directory trees, then processes
+        files again each time they change until interrupted.  Only the files
+        that changed are processed.  Changes are collected until no file has
+        changed for the debounce delay so that a burst of changes is
+        processed once.  If no cache filename was provided, then files are
+        tracked in memory so that files written by the processor are not
+        processed again.  See FileWatcher.
+
+        :param paths:
+            The files and directories to watch.  The list can be empty if a
+            socket filename is provided.
+
+        :param debounce_delay:
+            The time, in seconds, to wait after the last change before files
+            are processed.
+
+        :param socket_filename:
+            The file name of a Unix domain socket used to update in-memory
+            text while watching.  See TextServer.  If None, then no socket is
+            created.
+
+        :param poll_interval:
+            The time, in seconds, between scans for changes.  If None, then
+            inotify is used if it is available.
+
+        :param stop_event:
+            An event that ends the watch once set.  If None, then the watch
+            ends when the process is interrupted.
+
+        :return:
+            Returns True on success.  Returns False if any file could not be
+            processed.  An OSError is raised if the socket can not be created.
+
+        :type paths:           list
+        :type debounce_delay:  float
+        :type socket_filename: str or None
+        :type poll_interval:   float or None
+        :type stop_event:      threading.Event or None
+        :rtype:                bool
+
+        """
+
+        if self.cache_filename is None and self._cache is None:
+            self.clear_cache()
+
+        success = True
+        server = None
+        watcher = None
+        try:
+            if socket_filename is not None:
+                server = TextServer(self, socket_filename)
+                server.start()
+
+            if paths:
+                watcher = FileWatcher(
+                    paths,
+                    self.include_patterns,
+                    self.exclude_patterns,
+                    self.honour_gitignore,
+                    poll_interval
+                )
+
+                if not self.process_many(paths):
+                    success = False
+
+            if self.verbose:
+                sys.stdout.write("Watching for changes.\n")
+                sys.stdout.flush()
+
+            pending = set()
+            deadline = None
+            while stop_event is None or not stop_event.is_set():
+                if pending:
+                    timeout = min(
+                        max(0.0, deadline - time.monotonic()),
+                        WATCH_WAKE_INTERVAL
+                    )
+                else:
+                    timeout = WATCH_WAKE_INTERVAL
 
-        new_file_content = update_license_header(
-            file_content,
-            wrap_column,
-            license_list
+                if watcher is not None:
+                    changed = watcher.changes(timeout)
+                elif stop_event is not None:
+                    stop_event.wait(timeout)
+                    changed = None
+                else:
+                    time.sleep(timeout)
+                    changed = None
+
+                if changed:
+                    pending.update(changed)
+                    deadline = time.monotonic() + debounce_delay
+                elif pending and time.monotonic() >= deadline:
+                    # Files written by the processor are known to comply.
+                    filenames = sorted(
+                        f for f in pending
+                        if     os.path.isfile(f)
+                           and not check_cache(self._cache, f)[0]
+                    )
+
+                    pending = set()
+                    if filenames and not self.process_filenames(filenames):
+                        success = False
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+            if server is not None:
+                server.close()
+
+        return success
+
+    def _cache_fingerprint(self):
+        """
+        Method that calculates the cache fingerprint for this processor.
+
+        :return:
+            Returns the fingerprint.
+
+        :rtype: str
+
+        """
+
+        return cache_fingerprint(
+            self.license_list,
+            self.modify_dates,
+            self.wrap_column,
+            self.header_only,
+            self.copyright_holder,
+            self.preserve_content,
+            self.maximum_size,
+            self.skip_generated,
+            self.cleanup_tab_size
         )
 
-        if new_file_content is None:
-            success = False
-        else:
-            file_content = new_file_content
 
-    if success:
-        file_handle.close()
+class ArgumentRecorder:
+    """
+    Class that records the switches and arguments added to it.  Used in place
+    of an argparse.ArgumentParser to read the command line definition without
+    importing argparse.
 
-        if verbose:
-            sys.stdout.write("    Writing updates.\n")
+    """
 
-        try:
-            with open(filename, "w+") as file_handle:
-                for l in file_content:
-                    file_handle.write(l + "\n")
-        except Exception as e:
-            sys.stderr.write(
-                "*** Failed to write updates to %s: %s\n"%(
-                    filename,
-                    str(e)
-                )
-            )
-            success = False
+    def __init__(self):
+        """
+        Method that initializes the recorder.
 
-    return success
+        """
+
+        self.arguments = []
+
+    def add_argument(self, *names, **options):
+        """
+        Method that records a switch or argument.
+
+        :param names:
+            The names of the switch, or the name of the argument.
+
+        :param options:
+            The keyword arguments that would be passed to
+            argparse.ArgumentParser.add_argument.
+
+        :type names:   str
+        :type options: dict
+
+        """
+
+        self.arguments.append(( names, options ))
 
 ###############################################################################
 # Main:
 #
 
-success = True;
+def add_command_line_arguments(command_line_parser):
+    """
+    Function that adds the command line switches and arguments to a parser.
 
-command_line_parser = argparse.ArgumentParser(description = DESCRIPTION)
-command_line_parser.add_argument(
-    "-V",
-    "--version",
-    help = "You can use this switch to obtain the software release "
-           "version.",
-    action = "version",
-    version = VERSION
-)
+    :param command_line_parser:
+        The parser.  This is an argparse.ArgumentParser or an
+        ArgumentRecorder.
 
-command_line_parser.add_argument(
-    "-v",
-    "--verbose",
-    help = "You can use this switch to request verbose status updates.",
-    action = "store_true",
-    default = False,
-    dest = "verbose"
-)
+    :type command_line_parser: argparse.ArgumentParser or ArgumentRecorder
 
-command_line_parser.add_argument(
-    "-c",
-    "--commercial",
-    help = "You can use this switch to specify that Inesonic commercial "
-           "license should be included.",
-    action = "store_true",
-    default = False,
-    dest = "commercial"
-)
+    """
 
-command_line_parser.add_argument(
-    "-a",
-    "--aion",
-    help = "You can use this switch to specify that Inesonic Aion EULA should "
-           "be included.",
-    action = "store_true",
-    default = False,
-    dest = "aion"
-)
+    command_line_parser.add_argument(
+        "-V",
+        "--version",
+        help = "You can use this switch to obtain the software release "
+               "version.",
+        action = "version",
+        version = VERSION
+    )
 
-command_line_parser.add_argument(
-    "-m",
-    "--mit",
-    help = "You can use this switch to specify that the MIT license should be "
-           "included.",
-    action = "store_true",
-    default = False,
-    dest = "mit_license"
-)
+    command_line_parser.add_argument(
+        "-v",
+        "--verbose",
+        help = "You can use this switch to request verbose status updates.",
+        action = "store_true",
+        default = False,
+        dest = "verbose"
+    )
 
-command_line_parser.add_argument(
-    "-g",
-    "--gplv2",
-    help = "You can use this switch to specify that the GPLv2 license should "
-           "be included.",
-    action = "store_true",
-    default = False,
-    dest = "gplv2_license"
-)
+    command_line_parser.add_argument(
+        "-c",
+        "--commercial",
+        help = "You can use this switch to specify that Inesonic commercial "
+               "license should be included.",
+        action = "store_true",
+        default = False,
+        dest = "commercial"
+    )
 
-command_line_parser.add_argument(
-    "-l",
-    "--lgplv2",
-    help = "You can use this switch to specify that the LGPLv2 license should "
-           "be included.",
-    action = "store_true",
-    default = False,
-    dest = "lgplv2_license"
-)
+    command_line_parser.add_argument(
+        "-a",
+        "--aion",
+        help = "You can use this switch to specify that Inesonic Aion EULA should "
+               "be included.",
+        action = "store_true",
+        default = False,
+        dest = "aion"
+    )
 
-command_line_parser.add_argument(
-    "-G",
-    "--gplv3",
-    help = "You can use this switch to specify that the GPLv3 license should "
-           "be included.",
-    action = "store_true",
-    default = False,
-    dest = "gplv3_license"
-)
+    command_line_parser.add_argument(
+        "-m",
+        "--mit",
+        help = "You can use this switch to specify that the MIT license should be "
+               "included.",
+        action = "store_true",
+        default = False,
+        dest = "mit_license"
+    )
 
-command_line_parser.add_argument(
-    "-L",
-    "--lgplv3",
-    help = "You can use this switch to specify that the LGPLv3 license should "
-           "be included.",
-    action = "store_true",
-    default = False,
-    dest = "lgplv3_license"
-)
+    command_line_parser.add_argument(
+        "-g",
+        "--gplv2",
+        help = "You can use this switch to specify that the GPLv2 license should "
+               "be included.",
+        action = "store_true",
+        default = False,
+        dest = "gplv2_license"
+    )
 
-command_line_parser.add_argument(
-    "-d",
-    "--date",
-    help = "You can use this switch to identify and adjust any copyright "
-           "dates.  Date strings will be identified by the regular expression "
-           "Copyright 2[0-9]{3}(-2[0-9]{3})?.",
-    action = "store_true",
-    default = False,
-    dest = "modify_dates"
-)
+    command_line_parser.add_argument(
+        "-l",
+        "--lgplv2",
+        help = "You can use this switch to specify that the LGPLv2 license should "
+               "be included.",
+        action = "store_true",
+        default = False,
+        dest = "lgplv2_license"
+    )
 
-command_line_parser.add_argument(
-    "-b",
-    "--backup",
-    help = "You can use this switch to indicate that a backup for each file "
-           "should be created.  Backups will be placed in a \"%s\" "
-           "directory under the same filename."%BACKUP_DIRECTORY,
-    action = "store_true",
-    default = True,
-    dest = "create_backups"
-)
+    command_line_parser.add_argument(
+        "-G",
+        "--gplv3",
+        help = "You can use this switch to specify that the GPLv3 license should "
+               "be included.",
+        action = "store_true",
+        default = False,
+        dest = "gplv3_license"
+    )
 
-command_line_parser.add_argument(
-    "-w",
-    "--wrap",
-    help = "You can use this switch to specify the maximum column width for "
-           "content.  This script will make a best attempt to meet this "
-           "requirement, throwing an error if the requirement can not be "
-           "met.  Note that this assumes the file uses spaces, not tabs.",
-    type = int,
-    default = DEFAULT_COLUMN_WIDTH,
-    dest = "wrap"
-)
+    command_line_parser.add_argument(
+        "-L",
+        "--lgplv3",
+        help = "You can use this switch to specify that the LGPLv3 license should "
+               "be included.",
+        action = "store_true",
+        default = False,
+        dest = "lgplv3_license"
+    )
 
-command_line_parser.add_argument(
-    "files",
-    help = "One or more files to be modified.",
-    type = argparse.FileType('r', encoding='utf-8'),
-    nargs = '+',
-)
+    command_line_parser.add_argument(
+        "--license",
+        help = "You can use this switch to specify, by SPDX identifier, a "
+               "license that should be included, for example Apache-2.0.  "
+               "Licenses other than those built into this script are loaded "
+               "from \"<SPDX-ID>%s\" templates.  This switch can be used "
+               "multiple times.  A license selected more than once, for "
+               "example with both --mit and --license MIT, is included "
+               "once."%LICENSE_TEMPLATE_EXTENSION,
+        action = "append",
+        default = [],
+        dest = "licenses"
+    )
 
-arguments = command_line_parser.parse_args()
+    command_line_parser.add_argument(
+        "--license-dir",
+        help = "You can use this switch to specify a directory holding "
+               "license templates.  Directories are searched in order before "
+               "the \"licenses\" directory next to this script.  This switch "
+               "can be used multiple times.",
+        action = "append",
+        default = [],
+        dest = "template_directories"
+    )
 
-verbose = arguments.verbose
-commercial = arguments.commercial
-aion = arguments.aion
-mit_license = arguments.mit_license
-gplv2_license = arguments.gplv2_license
-lgplv2_license = arguments.lgplv2_license
-gplv3_license = arguments.gplv3_license
-lgplv3_license = arguments.lgplv3_license
-modify_dates = arguments.modify_dates
-create_backups = arguments.create_backups
-wrap_column = arguments.wrap
-files = arguments.files
+    command_line_parser.add_argument(
+        "-d",
+        "--date",
+        help = "You can use this switch to identify and adjust any copyright "
+               "dates.  Date strings will be identified by the regular expression "
+               "Copyright 2[0-9]{3}(-2[0-9]{3})?.",
+        action = "store_true",
+        default = False,
+        dest = "modify_dates"
+    )
 
-license_list = []
-if commercial:
-    license_list.append('commercial')
+    command_line_parser.add_argument(
+        "--copyright-holder",
+        help = "You can use this switch to insert a copyright header naming "
+               "this holder into files that lack one.  The comment syntax is "
+               "chosen from the file name or \"#!\" line.  Files without a "
+               "header are otherwise left unchanged.",
+        type = str,
+        default = None,
+        dest = "copyright_holder"
+    )
 
-if aion:
-    license_list.append('aion')
+    command_line_parser.add_argument(
+        "-b",
+        "--backup",
+        help = "You can use this switch to indicate that a backup for each file "
+               "should be created.  Backups are kept in the backup store "
+               "unless --backup-layout directory is used.  This is the "
+               "default.",
+        action = "store_true",
+        default = True,
+        dest = "create_backups"
+    )
 
-if mit_license:
-    license_list.append('mit')
+    command_line_parser.add_argument(
+        "--no-backup",
+        help = "You can use this switch to disable backups.",
+        action = "store_false",
+        dest = "create_backups"
+    )
 
-if gplv2_license:
-    license_list.append('gplv2')
+    command_line_parser.add_argument(
+        "--backup-layout",
+        help = "You can use this switch to select where backups are kept.  "
+               "\"store\" keeps compressed, deduplicated copies of modified "
+               "files in a single backup store.  \"directory\" copies each "
+               "modified file into a \"%s\" directory next to it.  If not "
+               "specified, \"%s\" is used."%(
+                   BACKUP_DIRECTORY,
+                   DEFAULT_BACKUP_LAYOUT
+               ),
+        choices = BACKUP_LAYOUTS,
+        default = DEFAULT_BACKUP_LAYOUT,
+        dest = "backup_layout"
+    )
 
-if lgplv2_license:
-    license_list.append('lgplv2')
+    command_line_parser.add_argument(
+        "--backup-store",
+        help = "You can use this switch to specify the backup store "
+               "directory.  If not specified, %s is used."%(
+                   DEFAULT_BACKUP_STORE
+               ),
+        type = str,
+        default = DEFAULT_BACKUP_STORE,
+        dest = "backup_store_directory"
+    )
 
-if gplv3_license:
-    license_list.append('gplv3')
+    command_line_parser.add_argument(
+        "--restore",
+        help = "You can use this switch to restore every file backed up to "
+               "the backup store by an earlier run, then exit.",
+        type = str,
+        default = None,
+        dest = "restore_run_id"
+    )
 
-if lgplv3_license:
-    license_list.append('lgplv3')
+    command_line_parser.add_argument(
+        "--list-backups",
+        help = "You can use this switch to list the runs held in the backup "
+               "store, then exit.",
+        action = "store_true",
+        default = False,
+        dest = "list_backups"
+    )
 
-success = True
-for fh in files:
-    if success:
-        success = process_file(
-            file_handle = fh,
-            verbose = verbose,
+    command_line_parser.add_argument(
+        "--prune-backups",
+        help = "You can use this switch to remove all but the given number "
+               "of most recent runs from the backup store, along with stored "
+               "content no remaining run refers to, then exit.",
+        type = int,
+        default = None,
+        dest = "prune_keep_runs"
+    )
+
+    command_line_parser.add_argument(
+        "-w",
+        "--wrap",
+        help = "You can use this switch to specify the maximum column width for "
+               "content.  This script will make a best attempt to meet this "
+               "requirement, throwing an error if the requirement can not be "
+               "met.  Note that this assumes the file uses spaces, not tabs.",
+        type = int,
+        default = DEFAULT_COLUMN_WIDTH,
+        dest = "wrap"
+    )
+
+    command_line_parser.add_argument(
+        "-k",
+        "--check",
+        help = "You can use this switch to check files without modifying "
+               "them.  No backups are created and no files are written.  A "
+               "report is generated for the files that would change and the "
+               "exit status is non-zero if any file would change.",
+        action = "store_true",
+        default = False,
+        dest = "check"
+    )
+
+    command_line_parser.add_argument(
+        "-r",
+        "--report",
+        help = "You can use this switch to select the report generated in "
+               "check mode.  \"diff\" writes a unified diff for each file "
+               "that would change.  \"json\" writes one JSON object per "
+               "line for each file checked.",
+        choices = [ "diff", "json" ],
+        default = "diff",
+        dest = "report"
+    )
+
+    command_line_parser.add_argument(
+        "-H",
+        "--header-only",
+        help = "You can use this switch to only read and rewrite the copyright "
+               "header at the top of each file.  The header must be found in "
+               "the first %d bytes of the file.  The remainder of the file is "
+               "copied without being parsed.  Copyright dates are only "
+               "updated within the header."%HEADER_SCAN_SIZE,
+        action = "store_true",
+        default = False,
+        dest = "header_only"
+    )
+
+    command_line_parser.add_argument(
+        "-P",
+        "--preserve",
+        help = "You can use this switch to only decode and rewrite the "
+               "copyright header and lines holding copyright dates.  The "
+               "encoding, line endings and whitespace of each file are "
+               "preserved and all other bytes are copied unchanged.",
+        action = "store_true",
+        default = False,
+        dest = "preserve_content"
+    )
+
+    command_line_parser.add_argument(
+        "--max-size",
+        help = "You can use this switch to skip files larger than this many "
+               "bytes without reading them.  A value of 0 disables the "
+               "limit.  The default is %d bytes.  Binary files are always "
+               "skipped."%DEFAULT_MAXIMUM_FILE_SIZE,
+        type = int,
+        default = DEFAULT_MAXIMUM_FILE_SIZE,
+        dest = "maximum_size"
+    )
+
+    command_line_parser.add_argument(
+        "--process-generated",
+        help = "You can use this switch to process files marked as generated, "
+               "such as files holding \"@generated\" or \"DO NOT EDIT\" near "
+               "their start.  Generated files are skipped by default.",
+        action = "store_false",
+        default = True,
+        dest = "skip_generated"
+    )
+
+    command_line_parser.add_argument(
+        "-W",
+        "--cleanup",
+        help = "You can use this switch to expand tabs and remove trailing "
+               "whitespace in the same pass that updates licenses and "
+               "dates.",
+        action = "store_true",
+        default = False,
+        dest = "cleanup"
+    )
+
+    command_line_parser.add_argument(
+        "--tab-size",
+        help = "You can use this switch to set the distance between tab stops "
+               "used by --cleanup.  The default is %d."%DEFAULT_TAB_SIZE,
+        type = int,
+        default = DEFAULT_TAB_SIZE,
+        dest = "tab_size"
+    )
+
+    command_line_parser.add_argument(
+        "-j",
+        "--jobs",
+        help = "You can use this switch to specify the number of worker "
+               "processes used to process files.  A value of 0 will use one "
+               "worker process per CPU.  If not specified, files are "
+               "processed sequentially.  Files are written in order and no "
+               "file following a failure is modified.",
+        type = int,
+        default = DEFAULT_JOBS,
+        dest = "jobs"
+    )
+
+    command_line_parser.add_argument(
+        "--io-readers",
+        help = "You can use this switch to process files with a pipeline "
+               "that keeps up to the specified number of file reads in "
+               "flight while other files are updated and written.  This "
+               "helps on high latency storage such as network file systems.  "
+               "Can not be combined with --jobs.",
+        type = int,
+        default = 0,
+        dest = "io_readers"
+    )
+
+    command_line_parser.add_argument(
+        "--io-writers",
+        help = "You can use this switch with --io-readers to limit the "
+               "number of files being backed up and written at once.  If "
+               "not specified, the --io-readers value is used.",
+        type = int,
+        default = 0,
+        dest = "io_writers"
+    )
+
+    command_line_parser.add_argument(
+        "-C",
+        "--cache",
+        help = "You can use this switch to keep a cache of files known to "
+               "comply so that unchanged files are skipped without being "
+               "opened on later runs.  The cache is only used for runs with "
+               "the same licenses, dates, wrap column and year settings.",
+        type = str,
+        default = None,
+        dest = "cache_filename"
+    )
+
+    command_line_parser.add_argument(
+        "--clear-cache",
+        help = "You can use this switch to discard the existing cache "
+               "contents before processing files.  Requires --cache.",
+        action = "store_true",
+        default = False,
+        dest = "clear_cache"
+    )
+
+    command_line_parser.add_argument(
+        "-i",
+        "--include",
+        help = "You can use this switch to limit the files found in "
+               "directories to those matching a glob.  Globs containing a "
+               "\"/\" are matched against the path relative to the directory.  "
+               "Other globs are matched against the file name.  This switch "
+               "can be used multiple times.",
+        action = "append",
+        default = [],
+        dest = "include_patterns"
+    )
+
+    command_line_parser.add_argument(
+        "-x",
+        "--exclude",
+        help = "You can use this switch to skip files and directories found "
+               "in directories that match a glob.  This switch can be used "
+               "multiple times.",
+        action = "append",
+        default = [],
+        dest = "exclude_patterns"
+    )
+
+    command_line_parser.add_argument(
+        "--no-gitignore",
+        help = "You can use this switch to process files found in directories "
+               "even if they are ignored by a .gitignore file.",
+        action = "store_false",
+        default = True,
+        dest = "honour_gitignore"
+    )
+
+    command_line_parser.add_argument(
+        "-s",
+        "--since",
+        help = "You can use this switch to only process files in the current "
+               "git repository that changed since the specified reference.  "
+               "Any paths provided limit the files considered.",
+        type = str,
+        default = None,
+        dest = "since"
+    )
+
+    command_line_parser.add_argument(
+        "-S",
+        "--staged",
+        help = "You can use this switch to only process files in the current "
+               "git repository with changes staged for commit.  Any paths "
+               "provided limit the files considered.",
+        action = "store_true",
+        default = False,
+        dest = "staged"
+    )
+
+    command_line_parser.add_argument(
+        "-M",
+        "--manifest",
+        help = "You can use this switch to process every repository listed "
+               "in a JSON or TOML manifest in a single run.  The manifest "
+               "selects the licenses, wrap column and date policy used for "
+               "each repository.  Other switches provide the defaults.",
+        type = str,
+        default = None,
+        dest = "manifest_filename"
+    )
+
+    command_line_parser.add_argument(
+        "--stdin",
+        help = "You can use this switch to read a single source file from "
+               "standard input and write the updated file to standard "
+               "output.  No files are written and no backups are created.  "
+               "A path of \"-\" has the same effect.  Switches that only "
+               "apply to files, such as --header-only or --jobs, are "
+               "rejected.",
+        action = "store_true",
+        default = False,
+        dest = "stdin"
+    )
+
+    command_line_parser.add_argument(
+        "-0",
+        "--null",
+        help = "You can use this switch with --stdin to read several source "
+               "files from standard input, separated by NUL characters.  "
+               "Each updated file is written to standard output, followed "
+               "by a NUL character, as soon as it has been read.",
+        action = "store_true",
+        default = False,
+        dest = "null"
+    )
+
+    command_line_parser.add_argument(
+        "--watch",
+        help = "You can use this switch to keep running after the paths have "
+               "been processed, processing files again each time they "
+               "change.  Changes are reported by inotify where available.  "
+               "Press Ctrl-C to stop.",
+        action = "store_true",
+        default = False,
+        dest = "watch"
+    )
+
+    command_line_parser.add_argument(
+        "--socket",
+        help = "You can use this switch with --watch to accept requests to "
+               "update in-memory text, for example from an editor, over a "
+               "Unix domain socket with this file name.  Paths are optional "
+               "when a socket is used.",
+        type = str,
+        default = None,
+        dest = "socket_filename"
+    )
+
+    command_line_parser.add_argument(
+        "--debounce",
+        help = "You can use this switch to set the time, in seconds, that "
+               "--watch waits after the last change before processing files.  "
+               "The default is %g seconds."%DEFAULT_DEBOUNCE_DELAY,
+        type = float,
+        default = DEFAULT_DEBOUNCE_DELAY,
+        dest = "debounce_delay"
+    )
+
+    command_line_parser.add_argument(
+        "--poll",
+        help = "You can use this switch to make --watch scan for changes "
+               "every given number of seconds instead of using inotify.  "
+               "Scanning is used automatically, once a second, when inotify "
+               "is not available.",
+        type = float,
+        default = None,
+        dest = "poll_interval"
+    )
+
+    command_line_parser.add_argument(
+        "--stats",
+        help = "You can use this switch to write a summary of the time spent "
+               "in each processing phase and the work performed to standard "
+               "error.",
+        action = "store_true",
+        default = False,
+        dest = "stats"
+    )
+
+    command_line_parser.add_argument(
+        "--stats-file",
+        help = "You can use this switch to write the time spent in each "
+               "processing phase and the work performed to a file.",
+        type = str,
+        default = None,
+        dest = "stats_filename"
+    )
+
+    command_line_parser.add_argument(
+        "--stats-format",
+        help = "You can use this switch to select the format of the file "
+               "written by --stats-file.  \"json\" writes a JSON object.  "
+               "\"prometheus\" writes the Prometheus text format.",
+        choices = [ "json", "prometheus" ],
+        default = "json",
+        dest = "stats_format"
+    )
+
+    command_line_parser.add_argument(
+        "paths",
+        help = "One or more files or directories to be modified.  "
+               "Directories are searched recursively.  \"%s\" directories "
+               "are always skipped.  Paths are optional when --since or "
+               "--staged is used."%BACKUP_DIRECTORY,
+        nargs = '*',
+    )
+
+
+def build_command_line_parser():
+    """
+    Function that builds the full command line parser.
+
+    :return:
+        Returns the parser.
+
+    :rtype: argparse.ArgumentParser
+
+    """
+
+    import argparse
+
+    command_line_parser = argparse.ArgumentParser(description = DESCRIPTION)
+    add_command_line_arguments(command_line_parser)
+
+    return command_line_parser
+
+
+def command_line_error(message):
+    """
+    Function that reports a command line error, along with the usage, and
+    exits.
+
+    :param message:
+        The error message.
+
+    :type message: str
+
+    """
+
+    build_command_line_parser().error(message)
+
+
+def parse_simple_arguments(argv):
+    """
+    Function that parses a command line holding only paths and switches that
+    take no value without building the full command line parser.  Building
+    the parser, and importing argparse, takes longer than processing a
+    typical file.
+
+    :param argv:
+        The command line arguments.
+
+    :return:
+        Returns the parsed arguments, with the same attributes as the
+        arguments returned by the full parser.  Returns None if the command
+        line must be parsed by the full parser.
+
+    :type argv: list
+    :rtype:     types.SimpleNamespace or None
+
+    """
+
+    import types
+
+    recorder = ArgumentRecorder()
+    add_command_line_arguments(recorder)
+
+    values = {}
+    switches = {}
+    for names, options in recorder.arguments:
+        action = options.get("action")
+        if not names[0].startswith("-"):
+            values[names[0]] = []
+        elif action == "store_true":
+            values.setdefault(options["dest"], options.get("default", False))
+            switches.update(dict.fromkeys(names, ( options["dest"], True )))
+        elif action == "store_false":
+            values.setdefault(options["dest"], options.get("default", True))
+            switches.update(dict.fromkeys(names, ( options["dest"], False )))
+        elif action != "version":
+            default = options.get("default")
+            if isinstance(default, list):
+                default = list(default)
+
+            values.setdefault(options["dest"], default)
+
+    for argument in argv:
+        if argument in switches:
+            ( dest, value ) = switches[argument]
+            values[dest] = value
+        elif argument.startswith("-"):
+            # Switches taking values, help, "-" and "--" are left to the full
+            # parser.
+            return None
+        else:
+            values["paths"].append(argument)
+
+    return types.SimpleNamespace(**values)
+
+
+def main(argv = None):
+    """
+    Function that parses the command line and processes the requested files.
+
+    :param argv:
+        The command line arguments.  If None, then sys.argv is used.
+
+    :return:
+        Returns the exit status.
+
+    :type argv: list or None
+    :rtype:     int
+
+    """
+
+    if argv is None:
+        argv = sys.argv[1:]
+
+    arguments = parse_simple_arguments(argv)
+    if arguments is None:
+        arguments = build_command_line_parser().parse_args(argv)
+
+    verbose = arguments.verbose
+    commercial = arguments.commercial
+    aion = arguments.aion
+    mit_license = arguments.mit_license
+    gplv2_license = arguments.gplv2_license
+    lgplv2_license = arguments.lgplv2_license
+    gplv3_license = arguments.gplv3_license
+    lgplv3_license = arguments.lgplv3_license
+    licenses = arguments.licenses
+    template_directories = arguments.template_directories
+    modify_dates = arguments.modify_dates
+    copyright_holder = arguments.copyright_holder
+    create_backups = arguments.create_backups
+    backup_layout = arguments.backup_layout
+    backup_store_directory = arguments.backup_store_directory
+    restore_run_id = arguments.restore_run_id
+    list_backups = arguments.list_backups
+    prune_keep_runs = arguments.prune_keep_runs
+    wrap_column = arguments.wrap
+    header_only = arguments.header_only
+    preserve_content = arguments.preserve_content
+    maximum_size = arguments.maximum_size
+    skip_generated = arguments.skip_generated
+    cleanup = arguments.cleanup
+    tab_size = arguments.tab_size
+    check_report = arguments.report if arguments.check else None
+    jobs = arguments.jobs
+    cache_filename = arguments.cache_filename
+    io_readers = arguments.io_readers
+    io_writers = arguments.io_writers
+    clear_cache = arguments.clear_cache
+    include_patterns = arguments.include_patterns
+    exclude_patterns = arguments.exclude_patterns
+    honour_gitignore = arguments.honour_gitignore
+    since = arguments.since
+    staged = arguments.staged
+    manifest_filename = arguments.manifest_filename
+    use_stdin = arguments.stdin
+    null_delimited = arguments.null
+    watch = arguments.watch
+    socket_filename = arguments.socket_filename
+    debounce_delay = arguments.debounce_delay
+    poll_interval = arguments.poll_interval
+    stats = arguments.stats
+    stats_filename = arguments.stats_filename
+    stats_format = arguments.stats_format
+    paths = arguments.paths
+
+    if jobs < 0:
+        command_line_error("--jobs must be 0 or greater")
+
+    if maximum_size < 0:
+        command_line_error("--max-size must be 0 or greater")
+
+    if tab_size < 1:
+        command_line_error("--tab-size must be 1 or greater")
+
+    if io_readers < 0 or io_writers < 0:
+        command_line_error(
+            "--io-readers and --io-writers must be 0 or greater"
+        )
+
+    if io_readers > 0 and jobs != 1:
+        command_line_error(
+            "--io-readers can not be combined with --jobs"
+        )
+
+    if io_writers > 0 and io_readers == 0:
+        command_line_error("--io-writers requires --io-readers")
+
+    if clear_cache and cache_filename is None:
+        command_line_error("--clear-cache requires --cache")
+
+    if since is not None and since.startswith("-"):
+        command_line_error("--since must name a git revision")
+
+    if debounce_delay < 0:
+        command_line_error("--debounce must be 0 or greater")
+
+    if poll_interval is not None and poll_interval <= 0:
+        command_line_error("--poll must be greater than 0")
+
+    if not watch and \
+       (socket_filename is not None or poll_interval is not None):
+        command_line_error("--socket and --poll require --watch")
+
+    if prune_keep_runs is not None and prune_keep_runs < 0:
+        command_line_error("--prune-backups must be 0 or greater")
+
+    if     restore_run_id is not None  \
+        or list_backups                \
+        or prune_keep_runs is not None   :
+        if paths                         or \
+           use_stdin                     or \
+           since is not None             or \
+           staged                        or \
+           manifest_filename is not None    :
+            command_line_error(
+                "--restore, --list-backups and --prune-backups do not "
+                "process files"
+            )
+
+        backup_store = BackupStore(backup_store_directory)
+        if restore_run_id is not None:
+            success = backup_store.restore(restore_run_id, verbose)
+        elif prune_keep_runs is not None:
+            success = backup_store.prune(prune_keep_runs, verbose)
+        else:
+            for run_id, number_files in backup_store.list_runs():
+                sys.stdout.write("%s  %d file(s)\n"%(run_id, number_files))
+
+            success = True
+
+        return 0 if success else 1
+
+    if "-" in paths:
+        if len(paths) > 1:
+            command_line_error("- can not be combined with other paths")
+
+        use_stdin = True
+        paths = []
+
+    if manifest_filename is not None:
+        if paths or use_stdin or since is not None or staged:
+            command_line_error(
+                "--manifest can not be combined with paths, --stdin, --since "
+                "or --staged"
+            )
+
+        if cache_filename is not None:
+            command_line_error(
+                "--manifest can not be combined with --cache"
+            )
+
+    if watch:
+        if use_stdin or since is not None or staged:
+            command_line_error(
+                "--watch can not be combined with --stdin, --since or --staged"
+            )
+
+        if manifest_filename is not None:
+            command_line_error(
+                "--watch can not be combined with --manifest"
+            )
+
+        if not paths and socket_filename is None:
+            command_line_error(
+                "--watch requires at least one path or --socket"
+            )
+
+    if use_stdin:
+        if paths or since is not None or staged:
+            command_line_error(
+                "--stdin can not be combined with paths, --since or --staged"
+            )
+
+        if check_report is not None or cache_filename is not None:
+            command_line_error(
+                "--stdin can not be combined with --check or --cache"
+            )
+
+        file_options = [
+            name for ( name, used ) in (
+                ( "--header-only", header_only ),
+                ( "--max-size", maximum_size != DEFAULT_MAXIMUM_FILE_SIZE ),
+                ( "--process-generated", not skip_generated ),
+                ( "--jobs", jobs != DEFAULT_JOBS ),
+                ( "--io-readers", io_readers > 0 ),
+                ( "--io-writers", io_writers > 0 ),
+                ( "--include", include_patterns ),
+                ( "--exclude", exclude_patterns ),
+                ( "--no-gitignore", not honour_gitignore ),
+                (
+                    "--backup-layout",
+                    backup_layout != DEFAULT_BACKUP_LAYOUT
+                ),
+                (
+                    "--backup-store",
+                    backup_store_directory != DEFAULT_BACKUP_STORE
+                )
+            )
+            if used
+        ]
+
+        if file_options:
+            command_line_error(
+                "--stdin can not be combined with %s"%", ".join(file_options)
+            )
+    elif null_delimited:
+        command_line_error("--null requires --stdin")
+    elif not paths                     and \
+         since is None                 and \
+         not staged                    and \
+         manifest_filename is None     and \
+         not watch                         :
+        command_line_error("at least one path is required")
+
+    license_list = []
+    if commercial:
+        license_list.append('commercial')
+
+    if aion:
+        license_list.append('aion')
+
+    if mit_license:
+        license_list.append('mit')
+
+    if gplv2_license:
+        license_list.append('gplv2')
+
+    if lgplv2_license:
+        license_list.append('lgplv2')
+
+    if gplv3_license:
+        license_list.append('gplv3')
+
+    if lgplv3_license:
+        license_list.append('lgplv3')
+
+    license_list.extend(licenses)
+
+    try:
+        processor = LicenseProcessor(
             license_list = license_list,
+            wrap_column = wrap_column,
             modify_dates = modify_dates,
             create_backups = create_backups,
-            wrap_column = wrap_column,
+            header_only = header_only,
+            check_report = check_report,
+            verbose = verbose,
+            jobs = jobs,
+            cache_filename = cache_filename,
+            include_patterns = include_patterns,
+            exclude_patterns = exclude_patterns,
+            honour_gitignore = honour_gitignore,
+            backup_layout = backup_layout,
+            backup_store_directory = backup_store_directory,
+            io_readers = io_readers,
+            io_writers = io_writers,
+            copyright_holder = copyright_holder,
+            preserve_content = preserve_content,
+            maximum_size = maximum_size,
+            skip_generated = skip_generated,
+            cleanup_tab_size = tab_size if cleanup else 0,
+            template_directories = template_directories
+        )
+    except ValueError as e:
+        command_line_error(str(e))
+
+    if clear_cache:
+        processor.clear_cache()
+
+    enable_statistics(stats or stats_filename is not None)
+
+    if use_stdin:
+        success = processor.process_stream(
+            sys.stdin.buffer,
+            sys.stdout.buffer,
+            STREAM_DOCUMENT_DELIMITER if null_delimited else None
+        )
+    elif watch:
+        import signal
+
+        def stop_watching(signal_number, frame):
+            raise KeyboardInterrupt()
+
+        # Service managers stop the watch with SIGTERM rather than Ctrl-C.
+        signal.signal(signal.SIGTERM, stop_watching)
+
+        try:
+            success = processor.watch(
+                paths,
+                debounce_delay,
+                socket_filename,
+                poll_interval
+            )
+        except OSError as e:
+            sys.stderr.write(
+                "*** Could not create socket %s: %s\n"%(
+                    socket_filename,
+                    str(e)
+                )
+            )
+            success = False
+    elif manifest_filename is not None:
+        try:
+            success = processor.process_manifest(manifest_filename)
+        except ValueError as e:
+            sys.stderr.write("*** %s\n"%str(e))
+            success = False
+    elif since is not None or staged:
+        filenames = git_changed_files(
+            since,
+            staged,
+            paths,
+            include_patterns,
+            exclude_patterns
+        )
+
+        if filenames is None:
+            success = False
+        else:
+            success = processor.process_filenames(filenames)
+    else:
+        success = processor.process_many(paths)
+
+    backup_store = processor.backup_store
+    if backup_store is not None and backup_store.has_backups():
+        sys.stdout.write(
+            "Backups saved as run %s.  Use --restore %s to undo this run.\n"%(
+                backup_store.run_id,
+                backup_store.run_id
+            )
         )
 
-if success:
-    exit(0)
-else:
-    exit(1)
+    if check_report is not None and processor.files_changed > 0:
+        if check_report != "json":
+            sys.stderr.write(
+                "*** %d file(s) would be changed.\n"%processor.files_changed
+            )
+
+        success = False
+
+    if stats:
+        sys.stderr.write(STATISTICS.format_summary())
+
+    if stats_filename is not None:
+        if stats_format == "prometheus":
+            report = STATISTICS.format_prometheus()
+        else:
+            report = STATISTICS.format_json()
+
+        try:
+            with open(stats_filename, "w") as file_handle:
+                file_handle.write(report)
+        except Exception as e:
+            sys.stderr.write(
+                "*** Could not write statistics to %s: %s\n"%(
+                    stats_filename,
+                    str(e)
+                )
+            )
+            success = False
+
+    if success:
+        return 0
+    else:
+        return 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # The reader of our output, for example "head", has exited.  Output
+        # is discarded so that flushing it at exit does not fail again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Shared fixtures for the modify_license tests.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import sys
+import json
+import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modify_license
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def current_year():
+    """
+    Fixture providing the current year, as used for updated copyright dates.
+
+    """
+
+    return datetime.date.today().year
+
+
+@pytest.fixture
+def run_script(tmp_path_factory):
+    """
+    Fixture providing a function that runs the script's main function with
+    backups disabled.  The function returns a tuple holding the exit status
+    and the statistics counters reported for the run.
+
+    """
+
+    stats_filename = str(tmp_path_factory.mktemp("stats") / "stats.json")
+
+    def run(*arguments):
+        status = modify_license.main(
+            [ "--no-backup", "--stats-file", stats_filename ] + list(arguments)
+        )
+
+        with open(stats_filename, "r", encoding = "utf-8") as file_handle:
+            counters = json.load(file_handle)["counters"]
+
+        os.remove(stats_filename)
+        return ( status, counters )
+
+    return run
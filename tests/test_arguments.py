@@ -0,0 +1,101 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of the command line parsing that avoids building the full parser.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [],
+        [ "src" ],
+        [ "--date", "--mit", "a.py", "b.py" ],
+        [ "a.py", "--no-backup", "-H", "-P", "--stats" ],
+        [ "-b", "--no-backup", "-b", "a.py" ],
+        [
+            "--check",
+            "-v",
+            "--process-generated",
+            "--no-gitignore",
+            "-W",
+            "--staged"
+        ]
+    ]
+)
+def test_simple_arguments_match_parser(argv):
+    """
+    Test that a command line of paths and switches without values is parsed
+    as the full parser would parse it.
+
+    """
+
+    arguments = modify_license.parse_simple_arguments(argv)
+    expected = modify_license.build_command_line_parser().parse_args(argv)
+
+    assert vars(arguments) == vars(expected)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [ "-dm", "a.py" ],
+        [ "-" ],
+        [ "--", "-a.py" ],
+        [ "--jobs", "2", "a.py" ],
+        [ "--dat", "a.py" ],
+        [ "--help" ]
+    ]
+)
+def test_other_arguments_use_parser(argv):
+    """
+    Test that command lines the simple parsing does not handle are left to
+    the full parser.
+
+    """
+
+    assert modify_license.parse_simple_arguments(argv) is None
+
+
+def test_simple_arguments_usage_error(capsys):
+    """
+    Test that an error in a command line parsed without the full parser is
+    still reported with the usage.
+
+    """
+
+    with pytest.raises(SystemExit) as exception_info:
+        modify_license.main([ "--date" ])
+
+    error = capsys.readouterr().err
+
+    assert exception_info.value.code == 2
+    assert error.startswith("usage: ")
+    assert "at least one path is required" in error
@@ -0,0 +1,151 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of backups kept in a directory next to each modified file.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of test files whose copyright date is out of date.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def no_reflink(tmp_path, monkeypatch):
+    """
+    Fixture that stops files under the temporary directory from being
+    cloned, so that backups are hard links where possible.
+
+    """
+
+    monkeypatch.setattr(
+        modify_license,
+        "REFLINK_UNSUPPORTED_DEVICES",
+        { os.stat(tmp_path).st_dev }
+    )
+
+###############################################################################
+# Tests:
+#
+
+def test_linked_backup_survives_replace(tmp_path, no_reflink):
+    """
+    Test that a hard linked backup keeps the original content when the file
+    is rewritten, because the file is replaced rather than written in place.
+
+    """
+
+    filename = str(tmp_path / "a.py")
+    backup_file = str(tmp_path / "a.py.bak")
+    with open(filename, "wb") as file_handle:
+        file_handle.write(OLD_CONTENT)
+
+    original_inode = os.stat(filename).st_ino
+
+    assert modify_license.clone_file(filename, backup_file) == "linked"
+    assert os.stat(backup_file).st_ino == original_inode
+
+    modify_license.replace_file_content(filename, [ b'new\n' ])
+
+    with open(backup_file, "rb") as file_handle:
+        assert file_handle.read() == OLD_CONTENT
+    with open(filename, "rb") as file_handle:
+        assert file_handle.read() == b'new\n'
+    assert os.stat(backup_file).st_ino == original_inode
+    assert os.stat(filename).st_ino != original_inode
+
+
+def test_copied_backup(tmp_path, no_reflink, monkeypatch):
+    """
+    Test that the file is copied when it can neither be cloned nor linked.
+
+    """
+
+    def refuse_link(source, destination):
+        raise PermissionError("links not allowed")
+
+    monkeypatch.setattr(os, "link", refuse_link)
+
+    filename = str(tmp_path / "a.py")
+    backup_file = str(tmp_path / "a.py.bak")
+    with open(filename, "wb") as file_handle:
+        file_handle.write(OLD_CONTENT)
+
+    assert modify_license.clone_file(filename, backup_file) == "copied"
+    assert os.stat(backup_file).st_ino != os.stat(filename).st_ino
+    assert sorted(os.listdir(tmp_path)) == [ "a.py", "a.py.bak" ]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [ (), ( "--header-only", ), ( "--jobs", "2" ), ( "--preserve", ) ]
+)
+def test_directory_backups(tmp_path, run_script, no_reflink, options):
+    """
+    Test that --backup-layout directory leaves the original content of each
+    rewritten file in the backup directory next to it.
+
+    """
+
+    directory = tmp_path / "tree"
+    directory.mkdir()
+    content = (
+          b'#' * 79 + b'\n'
+        + OLD_CONTENT
+        + b'#' * 79 + b'\n'
+        + b'y = 2\n'
+    )
+    for name in ( "a.py", "b.py" ):
+        ( directory / name ).write_bytes(content)
+
+    ( status, counters ) = run_script(
+        "--backup",
+        "--backup-layout", "directory",
+        "--date",
+        "--mit",
+        *options,
+        str(directory)
+    )
+
+    backup_directory = directory / modify_license.BACKUP_DIRECTORY
+
+    assert status == 0
+    assert counters["files_changed"] == 2
+    assert counters["backups_linked"] == 2
+    for name in ( "a.py", "b.py" ):
+        assert ( directory / name ).read_bytes() != content
+        assert ( backup_directory / name ).read_bytes() == content
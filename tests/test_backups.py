@@ -0,0 +1,304 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of the backup store used to back up, restore and prune modified files.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import stat
+import time
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of test files whose copyright date is out of date.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def store_directory(tmp_path):
+    """
+    Fixture providing the name of an empty backup store directory.
+
+    """
+
+    return str(tmp_path / "store")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Fixture providing a directory holding two files with identical out of
+    date content and one file with different content.
+
+    """
+
+    directory = tmp_path / "tree"
+    directory.mkdir()
+    ( directory / "a.py" ).write_bytes(OLD_CONTENT)
+    ( directory / "b.py" ).write_bytes(OLD_CONTENT)
+    ( directory / "c.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+    os.chmod(directory / "c.py", 0o750)
+
+    return directory
+
+###############################################################################
+# Functions:
+#
+
+def update_dates(store_directory, path):
+    """
+    Function that updates the copyright dates of the files under a path,
+    backing them up to a backup store.
+
+    :param store_directory:
+        The backup store directory.
+
+    :param path:
+        The file or directory to be updated.
+
+    :return:
+        Returns the identifier of the run.
+
+    :type store_directory: str
+    :type path:            pathlib.Path
+    :rtype:                str
+
+    """
+
+    run_ids = set(
+        run_id for run_id, _ in
+        modify_license.BackupStore(store_directory).list_runs()
+    )
+
+    status = modify_license.main(
+        [ "--date", "--backup-store", store_directory, str(path) ]
+    )
+    assert status == 0
+
+    ( run_id, ) = [
+        run_id for run_id, _ in
+        modify_license.BackupStore(store_directory).list_runs()
+        if run_id not in run_ids
+    ]
+
+    return run_id
+
+
+def object_paths(store_directory):
+    """
+    Function that lists the objects held in a backup store.
+
+    :param store_directory:
+        The backup store directory.
+
+    :return:
+        Returns the sorted paths of the stored objects.
+
+    :type store_directory: str
+    :rtype:                list
+
+    """
+
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in
+        os.walk(os.path.join(store_directory, "objects"))
+        for name in names
+    )
+
+###############################################################################
+# Tests:
+#
+
+def test_restore_round_trip(store_directory, tree, capsys):
+    """
+    Test that restoring a run puts back the content and permissions of every
+    file, including a file deleted since the run, and that identical content
+    is stored once.
+
+    """
+
+    run_id = update_dates(store_directory, tree)
+
+    assert "Backups saved as run %s."%run_id in capsys.readouterr().out
+    assert ( tree / "a.py" ).read_bytes() != OLD_CONTENT
+    assert len(object_paths(store_directory)) == 2
+
+    ( tree / "b.py" ).unlink()
+    os.chmod(tree / "c.py", 0o644)
+
+    status = modify_license.main(
+        [ "--backup-store", store_directory, "--restore", run_id ]
+    )
+
+    assert status == 0
+    assert ( tree / "a.py" ).read_bytes() == OLD_CONTENT
+    assert ( tree / "b.py" ).read_bytes() == OLD_CONTENT
+    assert ( tree / "c.py" ).read_bytes() == OLD_CONTENT + b'y = 2\n'
+    assert stat.S_IMODE(os.stat(tree / "c.py").st_mode) == 0o750
+
+
+def test_list_backups(store_directory, tree, capsys):
+    """
+    Test that --list-backups reports each run and the number of files it
+    backed up.
+
+    """
+
+    run_id = update_dates(store_directory, tree)
+    capsys.readouterr()
+
+    status = modify_license.main(
+        [ "--backup-store", store_directory, "--list-backups" ]
+    )
+
+    assert status == 0
+    assert capsys.readouterr().out == "%s  3 file(s)\n"%run_id
+
+
+def test_restore_first_backup_of_file(store_directory, tmp_path):
+    """
+    Test that a file backed up twice in a run is restored to the content it
+    held when the run started.
+
+    """
+
+    filename = str(tmp_path / "a.py")
+    with open(filename, "wb") as file_handle:
+        file_handle.write(b'second\n')
+
+    backup_store = modify_license.BackupStore(store_directory, "run")
+    assert backup_store.backup(filename, b'first\n', 0o100644, False)
+    assert backup_store.backup(filename, b'second\n', 0o100644, False)
+    assert backup_store.list_runs() == [ ( "run", 2 ) ]
+
+    assert backup_store.restore("run", False)
+    with open(filename, "rb") as file_handle:
+        assert file_handle.read() == b'first\n'
+
+
+def test_restore_continues_after_failure(store_directory, tree, capsys):
+    """
+    Test that a file whose stored content is corrupt is reported, and that
+    the other files are still restored.
+
+    """
+
+    run_id = update_dates(store_directory, tree)
+    corrupt_path = modify_license.BackupStore(store_directory)._object_path(
+        modify_license.file_digest(OLD_CONTENT + b'y = 2\n')
+    )
+    with open(corrupt_path, "wb") as file_handle:
+        file_handle.write(b'corrupt')
+
+    capsys.readouterr()
+    success = modify_license.BackupStore(store_directory).restore(
+        run_id,
+        False
+    )
+    error = capsys.readouterr().err
+
+    assert not success
+    assert "Could not restore %s"%( tree / "c.py" ) in error
+    assert "1 of 3 file(s) in run %s were not restored"%run_id in error
+    assert ( tree / "a.py" ).read_bytes() == OLD_CONTENT
+    assert ( tree / "b.py" ).read_bytes() == OLD_CONTENT
+
+
+@pytest.mark.parametrize("run_id", [ "no-such-run", "../runs", "" ])
+def test_restore_unknown_run(store_directory, capsys, run_id):
+    """
+    Test that an unknown or invalid run identifier is reported.
+
+    """
+
+    success = modify_license.BackupStore(store_directory).restore(
+        run_id,
+        False
+    )
+
+    assert not success
+    assert "Could not read backup run" in capsys.readouterr().err
+
+
+def test_prune_grace_period(store_directory, tmp_path, capsys):
+    """
+    Test that pruning removes old runs but keeps their content until it is
+    older than the grace period, and keeps content still referenced.
+
+    """
+
+    filename = str(tmp_path / "a.py")
+    modify_license.BackupStore(store_directory, "run-1").backup(
+        filename,
+        b'first\n',
+        0o100644,
+        False
+    )
+    first_objects = object_paths(store_directory)
+
+    backup_store = modify_license.BackupStore(store_directory, "run-2")
+    backup_store.backup(filename, b'second\n', 0o100644, False)
+    capsys.readouterr()
+
+    assert backup_store.prune(1, False)
+
+    assert capsys.readouterr().out == (
+        "Removed 1 run(s) and 0 stored file(s) from %s.\n"%store_directory
+    )
+    assert backup_store.list_runs() == [ ( "run-2", 1 ) ]
+    assert len(object_paths(store_directory)) == 2
+
+    expired_time = time.time() - modify_license.BACKUP_PRUNE_GRACE_PERIOD - 1
+    for object_path in object_paths(store_directory):
+        os.utime(object_path, ( expired_time, expired_time ))
+
+    assert backup_store.prune(1, False)
+
+    assert capsys.readouterr().out == (
+        "Removed 0 run(s) and 1 stored file(s) from %s.\n"%store_directory
+    )
+    assert not set(first_objects) & set(object_paths(store_directory))
+    assert backup_store.restore("run-2", False)
+    with open(filename, "rb") as file_handle:
+        assert file_handle.read() == b'second\n'
+
+    assert backup_store.prune(0, False)
+
+    assert capsys.readouterr().out == (
+        "Removed 1 run(s) and 1 stored file(s) from %s.\n"%store_directory
+    )
+    assert backup_store.list_runs() == []
+    assert object_paths(store_directory) == []
@@ -0,0 +1,189 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of the cache of files known to comply.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+
+import pytest
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def cached_tree(tmp_path, run_script, current_year):
+    """
+    Fixture providing a directory of compliant files and the name of a cache
+    file recording them.
+
+    """
+
+    source_directory = tmp_path / "src"
+    source_directory.mkdir()
+    for name in ( "a.py", "b.py", "c.py" ):
+        ( source_directory / name ).write_text(
+            "# Copyright 2020 - %d Acme\nx = 1\n"%current_year
+        )
+
+    cache_filename = str(tmp_path / "cache.json")
+    ( status, counters ) = run_script(
+        "--date",
+        "--cache",
+        cache_filename,
+        str(source_directory)
+    )
+
+    assert status == 0
+    assert counters["files_cached"] == 0
+    assert counters["files_processed"] == 3
+
+    return ( source_directory, cache_filename )
+
+###############################################################################
+# Tests:
+#
+
+def test_cache_hit(cached_tree, run_script):
+    """
+    Test that unchanged files are skipped using the cache.
+
+    """
+
+    ( source_directory, cache_filename ) = cached_tree
+    ( status, counters ) = run_script(
+        "--date",
+        "--cache",
+        cache_filename,
+        str(source_directory)
+    )
+
+    assert status == 0
+    assert counters["files_cached"] == 3
+    assert counters["files_processed"] == 0
+
+
+def test_cache_miss_on_changed_file(cached_tree, run_script, current_year):
+    """
+    Test that a file changed since it was cached is processed again.
+
+    """
+
+    ( source_directory, cache_filename ) = cached_tree
+    stale_filename = source_directory / "b.py"
+    stale_filename.write_text("# Copyright 2020 Acme\nx = 2\n")
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--cache",
+        cache_filename,
+        str(source_directory)
+    )
+
+    assert status == 0
+    assert counters["files_cached"] == 2
+    assert counters["files_processed"] == 1
+    assert counters["files_changed"] == 1
+    assert stale_filename.read_text() == (
+        "# Copyright 2020 - %d Acme\nx = 2\n"%current_year
+    )
+
+
+def test_cache_digest_match(cached_tree, run_script):
+    """
+    Test that a file whose modification time changed but whose content did
+    not is read, found to match the cached digest and left unchanged.
+
+    """
+
+    ( source_directory, cache_filename ) = cached_tree
+    touched_filename = str(source_directory / "c.py")
+    file_stat = os.stat(touched_filename)
+    os.utime(
+        touched_filename,
+        ns = ( file_stat.st_atime_ns, file_stat.st_mtime_ns + 10**9 )
+    )
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--cache",
+        cache_filename,
+        str(source_directory)
+    )
+
+    assert status == 0
+    assert counters["files_cached"] == 2
+    assert counters["files_processed"] == 1
+    assert counters["files_unchanged"] == 1
+    assert counters["lines_scanned"] == 0
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ( "--wrap", "100" ),
+        ( "--mit", ),
+        ( "--cleanup", ),
+        ( "--preserve", )
+    ]
+)
+def test_cache_fingerprint_invalidation(cached_tree, run_script, arguments):
+    """
+    Test that cache entries are not used by runs with different settings.
+
+    """
+
+    ( source_directory, cache_filename ) = cached_tree
+    ( status, counters ) = run_script(
+        "--date",
+        "--check",
+        "--cache",
+        cache_filename,
+        *arguments,
+        str(source_directory)
+    )
+
+    assert counters["files_cached"] == 0
+    assert counters["files_processed"] == 3
+
+
+def test_clear_cache(cached_tree, run_script):
+    """
+    Test that --clear-cache discards the entries of an otherwise valid cache.
+
+    """
+
+    ( source_directory, cache_filename ) = cached_tree
+    ( status, counters ) = run_script(
+        "--date",
+        "--cache",
+        cache_filename,
+        "--clear-cache",
+        str(source_directory)
+    )
+
+    assert status == 0
+    assert counters["files_cached"] == 0
+    assert counters["files_processed"] == 3
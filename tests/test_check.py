@@ -0,0 +1,122 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of the read-only check mode and its reports.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import json
+
+import pytest
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def source_tree(tmp_path, current_year):
+    """
+    Fixture providing a directory holding one file with a stale copyright
+    date and one file that complies.
+
+    """
+
+    ( tmp_path / "stale.py" ).write_text("# Copyright 2020 Acme\nx = 1\n")
+    ( tmp_path / "current.py" ).write_text(
+        "# Copyright 2020 - %d Acme\nx = 1\n"%current_year
+    )
+
+    return tmp_path
+
+###############################################################################
+# Tests:
+#
+
+def test_check_passes_when_files_comply(source_tree, run_script, capsys):
+    """
+    Test that a check of compliant files exits with status 0 and reports
+    nothing.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--check",
+        "--date",
+        str(source_tree / "current.py")
+    )
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_check_fails_when_files_would_change(
+        source_tree,
+        run_script,
+        capsys,
+        current_year
+    ):
+    """
+    Test that a check exits with a non-zero status and reports a diff when a
+    file would change, without modifying the file.
+
+    """
+
+    ( status, counters ) = run_script("--check", "--date", str(source_tree))
+    captured = capsys.readouterr()
+
+    assert status == 1
+    assert counters["files_changed"] == 1
+    assert "-# Copyright 2020 Acme\n" in captured.out
+    assert "+# Copyright 2020 - %d Acme\n"%current_year in captured.out
+    assert "1 file(s) would be changed" in captured.err
+    assert ( source_tree / "stale.py" ).read_text() == (
+        "# Copyright 2020 Acme\nx = 1\n"
+    )
+
+
+def test_check_json_report(source_tree, run_script, capsys):
+    """
+    Test that the JSON report holds one object per file checked.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--check",
+        "--report",
+        "json",
+        "--date",
+        str(source_tree)
+    )
+
+    reports = [
+        json.loads(l) for l in capsys.readouterr().out.splitlines()
+    ]
+    changed = dict([ ( r["file"], r["changed"] ) for r in reports ])
+
+    assert status == 1
+    assert changed == {
+        str(source_tree / "stale.py") : True,
+        str(source_tree / "current.py") : False
+    }
+    assert all([ "diff" in r for r in reports if r["changed"] ])
@@ -0,0 +1,206 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of the classification that skips binary, generated and oversized files.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import json
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of test files whose copyright date is out of date.
+
+"""
+
+SKIPPED_FILES = {
+    "image.png" : b'\x89PNG\r\n\x1a\n# Copyright 2020 Acme\n',
+    "data.py" : b'# Copyright 2020 Acme\n\0\0\0\n',
+    "generated.py" : b'# Generated by tool.  DO NOT EDIT.\n' + OLD_CONTENT,
+    "large.py" : OLD_CONTENT + b'#' * 200 + b'\n'
+}
+"""
+The content of test files that are skipped, keyed by file name, when the
+largest file processed is 100 bytes.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Fixture providing a directory holding one source file and each of the
+    files in SKIPPED_FILES.
+
+    """
+
+    directory = tmp_path / "tree"
+    directory.mkdir()
+    ( directory / "source.py" ).write_bytes(OLD_CONTENT)
+    for name, content in SKIPPED_FILES.items():
+        ( directory / name ).write_bytes(content)
+
+    return directory
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "head, file_size, maximum_size, skip_generated, expected",
+    [
+        ( b'x = 1\n', 6, 100, True, None ),
+        ( b'x = 1\n', 101, 100, True, "oversized" ),
+        ( b'x = 1\n', 101, 0, True, None ),
+        ( b'', 101, 100, True, "oversized" ),
+        ( b'x = 1\n\0', 7, 100, True, "binary" ),
+        ( b'\x7fELF\x02\x01', 6, 100, True, "binary" ),
+        ( b'%PDF-1.7\n', 9, 100, True, "binary" ),
+        ( b'// @generated\n', 14, 100, True, "generated" ),
+        ( b'// @generated\n', 14, 100, False, None ),
+        ( b'# Automatically Generated\n', 26, 100, True, "generated" ),
+        ( b'# Auto-generated\n', 17, 100, True, "generated" ),
+        ( b'\0// @generated\n', 15, 100, False, "binary" )
+    ]
+)
+def test_classify_content(
+        head,
+        file_size,
+        maximum_size,
+        skip_generated,
+        expected
+    ):
+    """
+    Test the reason given for skipping a file.
+
+    """
+
+    result = modify_license.classify_content(
+        head,
+        file_size,
+        maximum_size,
+        skip_generated
+    )
+
+    assert result == expected
+
+
+def test_generated_marker_beyond_scan_size():
+    """
+    Test that a generated file marker is only searched for near the start
+    of a file.
+
+    """
+
+    head = b'\n' * modify_license.GENERATED_MARKER_SCAN_SIZE + b'@generated\n'
+
+    assert modify_license.classify_content(head, len(head)) is None
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        (),
+        ( "--jobs", "2" ),
+        ( "--io-readers", "2" )
+    ]
+)
+def test_skipped_files_unchanged(tree, run_script, options):
+    """
+    Test that binary, generated and oversized files are skipped and left
+    unchanged in each processing mode.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--max-size", "100",
+        *options,
+        str(tree)
+    )
+
+    assert status == 0
+    assert counters["files_skipped"] == len(SKIPPED_FILES)
+    assert counters["files_changed"] == 1
+    assert ( tree / "source.py" ).read_bytes() != OLD_CONTENT
+    for name, content in SKIPPED_FILES.items():
+        assert ( tree / name ).read_bytes() == content
+
+
+def test_process_generated_and_size_limit(tree, run_script):
+    """
+    Test that --process-generated processes generated files and that a
+    --max-size of 0 disables the size limit.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--process-generated",
+        "--max-size", "0",
+        str(tree)
+    )
+
+    assert status == 0
+    assert counters["files_skipped"] == 2
+    assert counters["files_changed"] == 3
+    assert ( tree / "generated.py" ).read_bytes() \
+        != SKIPPED_FILES["generated.py"]
+    assert ( tree / "large.py" ).read_bytes() != SKIPPED_FILES["large.py"]
+
+
+def test_skipped_files_reported(tree, run_script, capsys):
+    """
+    Test that the JSON check report gives the reason each file was skipped.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--max-size", "100",
+        "--check",
+        "--report", "json",
+        str(tree)
+    )
+
+    reports = dict(
+        ( r["file"].rsplit("/", 1)[-1], r ) for r in
+        [ json.loads(l) for l in capsys.readouterr().out.splitlines() ]
+    )
+
+    assert status == 1
+    assert reports["image.png"]["skipped"] == "binary"
+    assert reports["data.py"]["skipped"] == "binary"
+    assert reports["generated.py"]["skipped"] == "generated"
+    assert reports["large.py"]["skipped"] == "oversized"
+    assert reports["source.py"]["changed"]
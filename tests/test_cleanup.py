@@ -0,0 +1,219 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of --cleanup, which expands tabs and removes trailing whitespace.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import sys
+import shutil
+import subprocess
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+BANNER = b'#' * 79
+"""
+The banner line used to mark the copyright headers of test files.
+
+"""
+
+CLEANUP_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "cleanup_source"
+)
+"""
+The script that cleans up whitespace in source trees.
+
+"""
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "lines, tab_size, expected",
+    [
+        ( [ "\tx = 1" ], 4, [ "    x = 1" ] ),
+        ( [ "\tx = 1" ], 8, [ "        x = 1" ] ),
+        ( [ "ab\tc" ], 4, [ "ab  c" ] ),
+        ( [ "x = 1 \t ", "", "  " ], 4, [ "x = 1", "", "" ] ),
+        ( [ "x = 1", "y = 2" ], 4, [ "x = 1", "y = 2" ] )
+    ]
+)
+def test_cleanup_whitespace(lines, tab_size, expected):
+    """
+    Test that tabs are expanded to the next tab stop and trailing whitespace
+    is removed.
+
+    """
+
+    assert modify_license.cleanup_whitespace(lines, tab_size)
+    assert lines == expected
+
+
+def test_cleanup_raw_whitespace():
+    """
+    Test that raw cleanup keeps line endings and the encoding of the file,
+    and only changes lines holding tabs or trailing whitespace.
+
+    """
+
+    raw_content = (
+        b'# -*- coding: latin-1 -*-\r\n'
+        b'\tname = "\xe9"  \r\n'
+        b'x = 1\n'
+        b'y = 2 \t'
+    )
+
+    new_raw_content = modify_license.cleanup_raw_whitespace(
+        raw_content,
+        4,
+        "latin-1"
+    )
+
+    assert new_raw_content == (
+        b'# -*- coding: latin-1 -*-\r\n'
+        b'    name = "\xe9"\r\n'
+        b'x = 1\n'
+        b'y = 2'
+    )
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ( (), b'    x = 1\n\ny = 2\n' ),
+        ( ( "--tab-size", "2" ), b'  x = 1\n\ny = 2\n' ),
+        ( ( "--preserve", ), b'    x = 1\r\n\r\ny = 2\r\n' ),
+        ( ( "--jobs", "2" ), b'    x = 1\n\ny = 2\n' )
+    ]
+)
+def test_cleanup_files(tmp_path, run_script, options, expected):
+    """
+    Test that files holding tabs or trailing whitespace are cleaned up and
+    that a second run leaves them unchanged.
+
+    """
+
+    filename = tmp_path / "module.py"
+    filename.write_bytes(b'\tx = 1  \r\n \r\ny = 2\r\n')
+
+    ( status, counters ) = run_script("--cleanup", *options, str(filename))
+
+    assert status == 0
+    assert counters["files_changed"] == 1
+    assert counters["lines_cleaned"] >= 1
+    assert filename.read_bytes() == expected
+
+    ( status, counters ) = run_script("--cleanup", *options, str(filename))
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert filename.read_bytes() == expected
+
+
+def test_cleanup_header_only(tmp_path, run_script):
+    """
+    Test that only the header is cleaned up with --header-only.
+
+    """
+
+    body = b'\tx = 1  \n'
+    filename = tmp_path / "module.py"
+    filename.write_bytes(
+          BANNER + b'\n'
+        + b'# Copyright 2020 Acme\t\n'
+        + b'#\n'
+        + BANNER + b'\n'
+        + body
+    )
+
+    ( status, counters ) = run_script(
+        "--cleanup",
+        "--header-only",
+        "--date",
+        str(filename)
+    )
+    content = filename.read_bytes()
+
+    assert status == 0
+    assert b'\t\n' not in content.split(body)[0]
+    assert content.endswith(BANNER + b'\n' + body)
+
+
+def test_cleanup_check(tmp_path, run_script, capsys):
+    """
+    Test that --check reports a file needing cleanup without changing it.
+
+    """
+
+    filename = tmp_path / "module.py"
+    filename.write_bytes(b'x = 1 \n')
+
+    ( status, counters ) = run_script("--cleanup", "--check", str(filename))
+
+    assert status == 1
+    assert "+x = 1\n" in capsys.readouterr().out
+    assert filename.read_bytes() == b'x = 1 \n'
+
+
+@pytest.mark.parametrize("tab_size", [ "0", "-1" ])
+def test_cleanup_rejects_tab_size(run_script, tab_size):
+    """
+    Test that a tab size below 1 is rejected.
+
+    """
+
+    with pytest.raises(SystemExit):
+        run_script("--cleanup", "--tab-size", tab_size, "module.py")
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason = "needs bash")
+def test_cleanup_source_script(tmp_path):
+    """
+    Test that the cleanup_source script cleans up a tree, keeping line
+    endings and skipping vendor directories.
+
+    """
+
+    ( tmp_path / "vendor" ).mkdir()
+    ( tmp_path / "vendor" / "lib.py" ).write_bytes(b'\tx = 1 \n')
+    ( tmp_path / "module.py" ).write_bytes(b'\tx = 1 \r\n')
+
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(sys.path)
+    subprocess.run(
+        [ "bash", CLEANUP_SCRIPT, str(tmp_path) ],
+        env = environment,
+        check = True,
+        capture_output = True
+    )
+
+    assert ( tmp_path / "module.py" ).read_bytes() == b'    x = 1\r\n'
+    assert ( tmp_path / "vendor" / "lib.py" ).read_bytes() == b'\tx = 1 \n'
@@ -0,0 +1,129 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of the copyright date expression and date updates.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ( "# Copyright 2020 Acme", "# Copyright 2020 - %d Acme" ),
+        ( "# Copyright 2020-2021, Acme", "# Copyright 2020 - %d, Acme" ),
+        ( "# Copyright 2020 - 2021 Acme", "# Copyright 2020 - %d Acme" ),
+        ( "s = \"Copyright 2020\"", "s = \"Copyright 2020\"" ),
+        ( "s = 'Copyright 2020 Acme'", "s = 'Copyright 2020 - %d Acme'" ),
+        ( "# Copyright 2020x", "# Copyright 2020x" ),
+        ( "# Copyright holders, 2020", "# Copyright holders, 2020" )
+    ]
+)
+def test_date_updates(line, expected, current_year):
+    """
+    Test that dates are only updated when followed by a comma, a space or the
+    end of the line.
+
+    """
+
+    file_content = [ line ]
+    assert modify_license.modify_copyright_dates(file_content, 79)
+    assert file_content == [ expected.replace("%d", str(current_year)) ]
+
+
+def test_every_date_on_a_line_is_updated(current_year):
+    """
+    Test that the single pass over the file updates every copyright string on
+    a line, not only the first.
+
+    """
+
+    file_content = [ "# Copyright 2019 A, Copyright 2020-2021 B" ]
+    assert modify_license.modify_copyright_dates(file_content, 79)
+    assert file_content == [
+        "# Copyright 2019 - %d A, Copyright 2020 - %d B"%(
+            current_year,
+            current_year
+        )
+    ]
+
+
+def test_current_dates_are_unchanged(current_year):
+    """
+    Test that dates that already end in the current year are left alone.
+
+    """
+
+    file_content = [
+        "# Copyright %d Acme"%current_year,
+        "# Copyright 2015 - %d Acme"%current_year
+    ]
+    expected = list(file_content)
+
+    assert modify_license.modify_copyright_dates(file_content, 79)
+    assert file_content == expected
+
+
+def test_dates_never_match_across_lines():
+    """
+    Test that the expression, applied to a whole file at once, never joins a
+    "Copyright" at the end of one line with a year on the next.
+
+    """
+
+    content = "# Copyright\n2020 Acme\n# Copyright 2019\n- 2020 Acme\n"
+    matches = [
+        m.group(0) for m in modify_license.COPYRIGHT_DATE_RE.finditer(content)
+    ]
+
+    assert matches == [ "Copyright 2019" ]
+
+
+def test_dates_updated_in_files(tmp_path, run_script, current_year):
+    """
+    Test that dates are updated throughout a file, not only in its header.
+
+    """
+
+    filename = tmp_path / "example.py"
+    filename.write_text(
+        "# Copyright 2020 Acme\n"
+        "\n"
+        "NOTICE = \"Copyright 2018, Acme\"\n"
+    )
+
+    ( status, counters ) = run_script("--date", str(filename))
+
+    assert status == 0
+    assert filename.read_text() == (
+        "# Copyright 2020 - %d Acme\n"
+        "\n"
+        "NOTICE = \"Copyright 2018 - %d, Acme\"\n"
+    )%(current_year, current_year)
+    assert counters["dates_updated"] == 2
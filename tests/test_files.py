@@ -0,0 +1,186 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of how files are found, replaced and shared out between workers.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import json
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def nested_tree(tmp_path):
+    """
+    Fixture providing a source directory holding a vendor directory.  Every
+    file holds a stale copyright date.
+
+    """
+
+    vendor_directory = tmp_path / "src" / "vendor"
+    vendor_directory.mkdir(parents = True)
+    for filename in (
+            tmp_path / "src" / "a.py",
+            tmp_path / "src" / "b.py",
+            vendor_directory / "c.py"
+        ):
+        filename.write_text("# Copyright 2020 Acme\nx = 1\n")
+
+    return tmp_path
+
+###############################################################################
+# Tests:
+#
+
+def test_symlink_kept(tmp_path, run_script, current_year):
+    """
+    Test that updating a file through a symbolic link updates the target and
+    keeps the link.
+
+    """
+
+    target_filename = tmp_path / "target.py"
+    target_filename.write_text("# Copyright 2020 Acme\n")
+    os.chmod(target_filename, 0o640)
+    link_filename = tmp_path / "link.py"
+    link_filename.symlink_to(target_filename)
+
+    ( status, counters ) = run_script("--date", str(link_filename))
+
+    assert status == 0
+    assert link_filename.is_symlink()
+    assert os.readlink(link_filename) == str(target_filename)
+    assert target_filename.read_text() == (
+        "# Copyright 2020 - %d Acme\n"%current_year
+    )
+    assert os.stat(target_filename).st_mode & 0o777 == 0o640
+    assert sorted(os.listdir(tmp_path)) == [ "link.py", "target.py" ]
+
+
+def test_replace_file_content_keeps_owner(tmp_path):
+    """
+    Test that replacing a file keeps its owner and group.
+
+    """
+
+    filename = tmp_path / "owned.txt"
+    filename.write_text("original\n")
+    if os.geteuid() == 0:
+        os.chown(filename, 65534, 65534)
+
+    original_stat = os.stat(filename)
+    modify_license.replace_file_content(str(filename), [ b'updated\n' ])
+    updated_stat = os.stat(filename)
+
+    assert filename.read_bytes() == b'updated\n'
+    assert updated_stat.st_uid == original_stat.st_uid
+    assert updated_stat.st_gid == original_stat.st_gid
+
+
+@pytest.mark.parametrize("vendor_first", [ True, False ])
+def test_manifest_overlap(nested_tree, run_script, current_year, vendor_first):
+    """
+    Test that a file held by the paths of several manifest repositories is
+    processed once, using the settings of the first repository listed.
+
+    """
+
+    vendor_repository = { "paths" : [ "src/vendor" ], "dates" : False }
+    source_repository = { "paths" : [ "src" ], "dates" : True }
+    if vendor_first:
+        repositories = [ vendor_repository, source_repository ]
+    else:
+        repositories = [ source_repository, vendor_repository ]
+
+    manifest_filename = nested_tree / "manifest.json"
+    manifest_filename.write_text(json.dumps({ "repositories" : repositories }))
+
+    ( status, counters ) = run_script("--manifest", str(manifest_filename))
+
+    updated_content = "# Copyright 2020 - %d Acme\nx = 1\n"%current_year
+    vendor_content = ( nested_tree / "src" / "vendor" / "c.py" ).read_text()
+
+    assert status == 0
+    assert counters["files_processed"] == 3
+    assert ( nested_tree / "src" / "a.py" ).read_text() == updated_content
+    if vendor_first:
+        assert counters["files_changed"] == 2
+        assert vendor_content == "# Copyright 2020 Acme\nx = 1\n"
+    else:
+        assert counters["files_changed"] == 3
+        assert vendor_content == updated_content
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        (),
+        ( "--jobs", "2" ),
+        ( "--io-readers", "2" )
+    ]
+)
+def test_processing_modes_agree(
+        nested_tree,
+        run_script,
+        capsys,
+        current_year,
+        arguments
+    ):
+    """
+    Test that sequential, worker pool and pipeline processing update the same
+    files and report them in file order.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--verbose",
+        *arguments,
+        str(nested_tree / "src")
+    )
+    reported = [
+        l for l in capsys.readouterr().out.splitlines()
+        if l.startswith("Processing ")
+    ]
+
+    assert status == 0
+    assert counters["files_changed"] == 3
+    assert reported == [
+        "Processing %s:"%( nested_tree / "src" / n )
+        for n in ( "a.py", "b.py", os.path.join("vendor", "c.py") )
+    ]
+    for filename in (
+            nested_tree / "src" / "a.py",
+            nested_tree / "src" / "b.py",
+            nested_tree / "src" / "vendor" / "c.py"
+        ):
+        assert filename.read_text() == (
+            "# Copyright 2020 - %d Acme\nx = 1\n"%current_year
+        )
@@ -0,0 +1,194 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of --since and --staged, which select the files changed in a git
+repository.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import shutil
+import subprocess
+
+import pytest
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of test files whose copyright date is out of date.
+
+"""
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("git") is None,
+    reason = "git is not installed"
+)
+"""
+Every test in this module needs the git command.
+
+"""
+
+###############################################################################
+# Functions:
+#
+
+def git(repository, *arguments):
+    """
+    Function that runs a git command in a test repository.
+
+    :param repository:
+        The top directory of the repository.
+
+    :param arguments:
+        The git command and its arguments.
+
+    :type repository: pathlib.Path
+    :type arguments:  str
+
+    """
+
+    subprocess.run(
+        [
+            "git",
+            "-c", "user.name=Test",
+            "-c", "user.email=test@example.com",
+            "-c", "commit.gpgsign=false"
+        ] + list(arguments),
+        cwd = repository,
+        check = True,
+        capture_output = True
+    )
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    """
+    Fixture providing a git repository with one commit holding the files
+    a.py, b.py and sub/c.py, used as the current directory.
+
+    """
+
+    ( tmp_path / "sub" ).mkdir()
+    for name in ( "a.py", "b.py", "sub/c.py" ):
+        ( tmp_path / name ).write_bytes(OLD_CONTENT)
+
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Initial commit")
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+###############################################################################
+# Tests:
+#
+
+def test_since_processes_changed_files(repository, run_script):
+    """
+    Test that --since only processes files changed since the reference,
+    including files committed after it, and skips deleted files.
+
+    """
+
+    git(repository, "tag", "base")
+    ( repository / "b.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+    git(repository, "commit", "-q", "-a", "-m", "Change b.py")
+    ( repository / "sub" / "c.py" ).write_bytes(OLD_CONTENT + b'z = 3\n')
+    git(repository, "rm", "-q", "a.py")
+
+    ( status, counters ) = run_script("--date", "--since", "base")
+
+    assert status == 0
+    assert counters["files_processed"] == 2
+    assert counters["files_changed"] == 2
+    assert not ( repository / "a.py" ).exists()
+    assert ( repository / "b.py" ).read_bytes() != OLD_CONTENT + b'y = 2\n'
+
+
+def test_staged_only_processes_index(repository, run_script):
+    """
+    Test that --staged processes staged changes but not unstaged ones.
+
+    """
+
+    ( repository / "a.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+    git(repository, "add", "a.py")
+    ( repository / "b.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+
+    ( status, counters ) = run_script("--date", "--staged")
+
+    assert status == 0
+    assert counters["files_processed"] == 1
+    assert ( repository / "a.py" ).read_bytes() != OLD_CONTENT + b'y = 2\n'
+    assert ( repository / "b.py" ).read_bytes() == OLD_CONTENT + b'y = 2\n'
+
+
+def test_since_limited_by_paths_and_globs(repository, run_script):
+    """
+    Test that the changed files are limited to the paths given and filtered
+    by --exclude.
+
+    """
+
+    for name in ( "a.py", "b.py", "sub/c.py" ):
+        ( repository / name ).write_bytes(OLD_CONTENT + b'y = 2\n')
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--since", "HEAD",
+        "--exclude", "sub/*",
+        "a.py",
+        "sub"
+    )
+
+    assert status == 0
+    assert counters["files_processed"] == 1
+    assert ( repository / "a.py" ).read_bytes() != OLD_CONTENT + b'y = 2\n'
+    assert ( repository / "b.py" ).read_bytes() == OLD_CONTENT + b'y = 2\n'
+
+
+def test_since_unknown_reference(repository, run_script, capsys):
+    """
+    Test that an unknown reference is reported as an error.
+
+    """
+
+    ( status, counters ) = run_script("--date", "--since", "no-such-ref")
+
+    assert status == 1
+    assert "Could not read changed files from git" in capsys.readouterr().err
+
+
+def test_since_rejects_options(run_script):
+    """
+    Test that a --since value that looks like an option is rejected, so it
+    can not be passed on to git.
+
+    """
+
+    with pytest.raises(SystemExit):
+        run_script("--date", "--since=--output=/tmp/x")
@@ -0,0 +1,84 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of --header-only, which rewrites the header and copies the body of a
+file unchanged.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+###############################################################################
+# Globals:
+#
+
+BANNER = b'#' * 79
+"""
+The banner line used to mark the copyright headers of test files.
+
+"""
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize("line_ending", [ b'\n', b'\r\n' ])
+def test_header_only_keeps_line_endings(tmp_path, run_script, line_ending):
+    """
+    Test that the header is written with the line ending of the file, that
+    the body is copied byte for byte and that a second run changes nothing.
+
+    """
+
+    body = line_ending.join([ b'x = 1  ', b'', b'y = 2\t', b'' ])
+    filename = tmp_path / "module.py"
+    filename.write_bytes(
+        line_ending.join(
+            [
+                BANNER,
+                b'# Copyright 2020 Acme',
+                b'#',
+                b'# Old license terms.',
+                BANNER,
+                b''
+            ]
+        )
+        + body
+    )
+
+    ( status, counters ) = run_script("--header-only", "--mit", str(filename))
+    content = filename.read_bytes()
+
+    assert status == 0
+    assert counters["files_changed"] == 1
+    assert content.startswith(BANNER + line_ending + b'# Copyright 2020 Acme')
+    assert content.endswith(BANNER + line_ending + body)
+    assert b'# MIT License:' + line_ending in content
+    assert b'Old license terms' not in content
+    if line_ending == b'\r\n':
+        assert content.count(b'\n') == content.count(b'\r\n')
+
+    ( status, counters ) = run_script("--header-only", "--mit", str(filename))
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert filename.read_bytes() == content
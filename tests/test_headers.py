@@ -0,0 +1,180 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of header insertion and updates for each supported comment syntax.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+SYNTAX_EXAMPLES = [
+    ( "example.c", "int x;\n", "/" + "*" * 78, " * ", "" ),
+    ( "example.py", "x = 1\n", "#" * 79, "# ", "" ),
+    ( "example.js", "let x;\n", "//" + "*" * 77, "// ", "" ),
+    ( "example.sql", "select 1;\n", "-" * 79, "-- ", "" ),
+    ( "example.el", "(x)\n", ";" * 79, ";; ", "" ),
+    ( "example.rst", "Title\n=====\n", ".. " + "#" * 76, "   ", "" ),
+    ( "example.md", "# Title\n", "<!--" + "#" * 75, "  ", "" ),
+    ( "run", "#!/bin/sh\necho\n", "#" * 79, "# ", "#!/bin/sh\n" )
+]
+"""
+Example files for each comment syntax.  Each example holds the file name, the
+original content, the expected start banner, the expected line start and the
+lines expected to be kept ahead of the header.
+
+"""
+
+###############################################################################
+# Tests:
+#
+
+def test_every_syntax_has_an_example():
+    """
+    Test that every comment syntax is covered by SYNTAX_EXAMPLES.
+
+    """
+
+    syntaxes = set(
+        [
+            modify_license.find_comment_syntax(e[0], e[1].split("\n")[0])
+            for e in SYNTAX_EXAMPLES
+        ]
+    )
+
+    assert syntaxes == set(modify_license.COMMENT_SYNTAXES)
+
+
+@pytest.mark.parametrize(
+    "name, content, banner, line_start, preamble",
+    SYNTAX_EXAMPLES
+)
+def test_header_insertion(
+        tmp_path,
+        run_script,
+        current_year,
+        name,
+        content,
+        banner,
+        line_start,
+        preamble
+    ):
+    """
+    Test that a header is inserted into a file that lacks one and that the
+    file is left unchanged when processed again.
+
+    """
+
+    filename = tmp_path / name
+    filename.write_text(content)
+
+    ( status, counters ) = run_script(
+        "--mit",
+        "--date",
+        "--copyright-holder",
+        "Acme, Inc.",
+        str(filename)
+    )
+    inserted_content = filename.read_text()
+
+    assert status == 0
+    assert counters["files_changed"] == 1
+    assert inserted_content.startswith(
+          preamble
+        + banner + "\n"
+        + line_start + "Copyright %d Acme, Inc.\n"%current_year
+        + line_start.rstrip() + "\n"
+        + line_start + "MIT License:\n"
+    )
+    assert inserted_content.endswith(content[len(preamble):])
+    assert all([ len(l) <= 79 for l in inserted_content.split("\n") ])
+
+    ( status, counters ) = run_script(
+        "--mit",
+        "--date",
+        "--copyright-holder",
+        "Acme, Inc.",
+        str(filename)
+    )
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert filename.read_text() == inserted_content
+
+
+@pytest.mark.parametrize(
+    "name, content, banner, line_start, preamble",
+    SYNTAX_EXAMPLES
+)
+def test_header_update(
+        tmp_path,
+        run_script,
+        name,
+        content,
+        banner,
+        line_start,
+        preamble
+    ):
+    """
+    Test that the licenses in an existing header are replaced while the
+    copyright line is kept.
+
+    """
+
+    filename = tmp_path / name
+    filename.write_text(content)
+    run_script("--mit", "--copyright-holder", "Acme, Inc.", str(filename))
+    copyright_line = filename.read_text().split("\n")[preamble.count("\n") + 1]
+
+    ( status, counters ) = run_script("--gplv3", str(filename))
+    updated_content = filename.read_text()
+
+    assert status == 0
+    assert counters["files_changed"] == 1
+    assert copyright_line + "\n" in updated_content
+    assert "MIT License:" not in updated_content
+    assert "GNU Public License, Version 3:" in updated_content
+    assert updated_content.endswith(content[len(preamble):])
+
+
+def test_file_without_header_is_unchanged(tmp_path, run_script, capsys):
+    """
+    Test that a file without a header is reported and left unchanged when no
+    copyright holder is given.
+
+    """
+
+    filename = tmp_path / "example.py"
+    filename.write_text("x = 1\n")
+
+    ( status, counters ) = run_script("--mit", str(filename))
+
+    assert status == 0
+    assert "No copyright header found" in capsys.readouterr().err
+    assert counters["files_changed"] == 0
+    assert filename.read_text() == "x = 1\n"
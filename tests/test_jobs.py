@@ -0,0 +1,141 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of processing files with a pool of worker processes.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+###############################################################################
+# Globals:
+#
+
+BANNER = "#" * 79
+"""
+The banner line used to mark the copyright headers of test files.
+
+"""
+
+STALE_FILE = "%s\n# Copyright 2020 Acme\n#\n%s\nx = 1\n"%(BANNER, BANNER)
+"""
+A file with a stale copyright date in its header.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def failing_tree(tmp_path):
+    """
+    Fixture providing a directory of files with stale dates in which the
+    sixth file can not be decoded.
+
+    """
+
+    for index in range(40):
+        ( tmp_path / ("f%02d.py"%index) ).write_text(STALE_FILE)
+
+    ( tmp_path / "f05.py" ).write_bytes(
+        STALE_FILE.replace("Acme", "Caf\xe9").encode("latin-1")
+    )
+
+    return tmp_path
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        (),
+        ( "--jobs", "4" ),
+        ( "--jobs", "4", "--header-only" )
+    ]
+)
+def test_processing_stops_at_first_failure(
+        failing_tree,
+        run_script,
+        capsys,
+        arguments
+    ):
+    """
+    Test that no file after the first failure is modified, however many
+    files were queued for the workers.
+
+    """
+
+    ( status, counters ) = run_script("--date", *arguments, str(failing_tree))
+    changed = sorted(
+        [
+            f.name for f in failing_tree.iterdir()
+            if f.read_bytes() != STALE_FILE.encode("utf-8")
+            and f.name != "f05.py"
+        ]
+    )
+
+    assert status == 1
+    assert changed == [ "f%02d.py"%i for i in range(5) ]
+    assert counters["files_changed"] == 5
+    assert counters["files_failed"] == 1
+    assert capsys.readouterr().err.count("***") == 1
+
+
+@pytest.mark.parametrize("header_only", [ False, True ])
+def test_workers_back_up_files(tmp_path, header_only, current_year):
+    """
+    Test that files updated by worker processes are backed up and can be
+    restored.
+
+    """
+
+    import modify_license
+
+    source_directory = tmp_path / "src"
+    source_directory.mkdir()
+    for index in range(10):
+        ( source_directory / ("f%d.py"%index) ).write_text(STALE_FILE)
+
+    backup_directory = str(tmp_path / "backups")
+    arguments = [ "--date", "--jobs", "3", "--backup-store", backup_directory ]
+    if header_only:
+        arguments.append("--header-only")
+
+    assert modify_license.main(arguments + [ str(source_directory) ]) == 0
+    assert all(
+        [
+            ( "2020 - %d"%current_year ) in f.read_text()
+            for f in source_directory.iterdir()
+        ]
+    )
+
+    store = modify_license.BackupStore(backup_directory)
+    runs = store.list_runs()
+    assert [ r[1] for r in runs ] == [ 10 ]
+    assert store.restore(runs[0][0], False)
+    assert all(
+        [ f.read_text() == STALE_FILE for f in source_directory.iterdir() ]
+    )
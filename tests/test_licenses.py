@@ -0,0 +1,246 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of license selection by SPDX identifier and of license templates.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+ACME_TEMPLATE = (
+    "Acme Internal License\n"
+    "\n"
+    "This file may only be used by Acme staff.\n"
+    "\n"
+    "Do not distribute.\n"
+)
+"""
+The content of a license template kept outside the shipped templates.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture(autouse = True)
+def registered_licenses(monkeypatch):
+    """
+    Fixture that gives each test its own registry of licenses loaded from
+    templates.
+
+    """
+
+    monkeypatch.setattr(modify_license, "REGISTERED_LICENSES", {})
+
+
+@pytest.fixture
+def template_directory(tmp_path):
+    """
+    Fixture providing a directory holding a "LicenseRef-Acme" template.
+
+    """
+
+    directory = tmp_path / "licenses"
+    directory.mkdir()
+    ( directory / "LicenseRef-Acme.txt" ).write_text(ACME_TEMPLATE)
+
+    return directory
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    """
+    Fixture providing a source file without a copyright header.
+
+    """
+
+    filename = tmp_path / "module.py"
+    filename.write_text("x = 1\n")
+
+    return filename
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "license, expected",
+    [
+        ( "mit", "mit" ),
+        ( "MIT", "mit" ),
+        ( "GPL-3.0-or-later", "gplv3" ),
+        ( "Apache-2.0", "Apache-2.0" ),
+        ( "BSD-3-Clause", "BSD-3-Clause" ),
+        ( "MPL-2.0", "MPL-2.0" )
+    ]
+)
+def test_resolve_license(license, expected):
+    """
+    Test that built in licenses are selected by name or SPDX identifier and
+    that shipped templates are loaded.
+
+    """
+
+    assert modify_license.resolve_license(license) == expected
+    assert expected in modify_license.LICENSE_TEXT \
+        or expected in modify_license.REGISTERED_LICENSES
+
+
+@pytest.mark.parametrize("license", [ "No-Such-License", "../Apache-2.0" ])
+def test_resolve_unknown_license(license):
+    """
+    Test that unknown licenses, and identifiers that are not valid SPDX
+    identifiers, are rejected.
+
+    """
+
+    with pytest.raises(ValueError):
+        modify_license.resolve_license(license)
+
+
+def test_template_directory_searched_first(template_directory):
+    """
+    Test that templates in the given directories are used before the shipped
+    templates.
+
+    """
+
+    ( template_directory / "Apache-2.0.txt" ).write_text(ACME_TEMPLATE)
+
+    modify_license.resolve_license("Apache-2.0", [ str(template_directory) ])
+
+    assert modify_license.REGISTERED_LICENSES["Apache-2.0"] == {
+        "header" : "Acme Internal License",
+        "text" : "This file may only be used by Acme staff.\n\n"
+                 "Do not distribute.\n"
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "Acme Internal License\n",
+        "Acme Internal License\nNot blank\nText\n",
+        "Acme Internal License\n\n\n"
+    ]
+)
+def test_invalid_template(template_directory, content):
+    """
+    Test that a template without a name, a blank second line and text is
+    rejected.
+
+    """
+
+    ( template_directory / "LicenseRef-Acme.txt" ).write_text(content)
+
+    with pytest.raises(ValueError):
+        modify_license.resolve_license(
+            "LicenseRef-Acme",
+            [ str(template_directory) ]
+        )
+
+
+def test_resolve_licenses_removes_duplicates():
+    """
+    Test that a license selected more than once is kept where it first
+    appears.
+
+    """
+
+    licenses = modify_license.resolve_licenses(
+        [ "Apache-2.0", "mit", "MIT", "Apache-2.0" ]
+    )
+
+    assert licenses == [ "Apache-2.0", "mit" ]
+
+
+def test_duplicate_license_inserted_once(source_file, run_script):
+    """
+    Test that selecting the MIT license with both --mit and --license MIT
+    inserts it once, ahead of licenses given with --license.
+
+    """
+
+    ( status, counters ) = run_script(
+        "--copyright-holder", "Acme",
+        "--license", "Apache-2.0",
+        "--mit",
+        "--license", "MIT",
+        str(source_file)
+    )
+    content = source_file.read_text()
+
+    assert status == 0
+    assert content.count("# MIT License:") == 1
+    assert content.count("# Apache License, Version 2.0:") == 1
+    assert content.index("# MIT License:") \
+        < content.index("# Apache License, Version 2.0:")
+
+
+@pytest.mark.parametrize("options", [ (), ( "--jobs", "2" ) ])
+def test_license_dir(template_directory, source_file, run_script, options):
+    """
+    Test that a template found with --license-dir is inserted, including by
+    worker processes, and that a second run leaves the file unchanged.
+
+    """
+
+    arguments = [
+        "--copyright-holder", "Acme",
+        "--license-dir", str(template_directory),
+        "--license", "LicenseRef-Acme"
+    ] + list(options) + [ str(source_file) ]
+
+    ( status, counters ) = run_script(*arguments)
+    content = source_file.read_text()
+
+    assert status == 0
+    assert counters["files_changed"] == 1
+    assert "# Acme Internal License:" in content
+    assert "Do not distribute." in content
+
+    ( status, counters ) = run_script(*arguments)
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert source_file.read_text() == content
+
+
+def test_unknown_license_rejected(source_file, run_script, capsys):
+    """
+    Test that an unknown license is reported as a usage error.
+
+    """
+
+    with pytest.raises(SystemExit) as exception_info:
+        run_script("--license", "No-Such-License", str(source_file))
+
+    assert exception_info.value.code == 2
+    assert "Unknown license No-Such-License" in capsys.readouterr().err
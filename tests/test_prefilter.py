@@ -0,0 +1,198 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Differential tests of the fast scan for stale copyright dates against the
+full update passes.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import random
+import datetime
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+FUZZ_CASES = 3000
+"""
+The number of random files generated for each differential test.
+
+"""
+
+FUZZ_TOKENS = (
+    "Copyright",
+    "Copyright ",
+    "2020",
+    "2021",
+    str(datetime.date.today().year),
+    " ",
+    "\t",
+    "\xa0",
+    "-",
+    " - ",
+    ",",
+    "x",
+    "'",
+    "\n"
+)
+"""
+The tokens random file content is built from.
+
+"""
+
+###############################################################################
+# Functions:
+#
+
+def random_content(rng, tokens):
+    """
+    Function that builds random file content likely to hold copyright dates.
+
+    :param rng:
+        The random number generator.
+
+    :param tokens:
+        The tokens to choose from.
+
+    :return:
+        Returns the content.
+
+    :type rng:    random.Random
+    :type tokens: tuple
+    :rtype:       str
+
+    """
+
+    return "".join([ rng.choice(tokens) for i in range(rng.randint(1, 12)) ])
+
+
+def update_dates(raw_content, preserve_content):
+    """
+    Function that runs the full copyright date update on raw content.
+
+    :param raw_content:
+        The raw file content.
+
+    :param preserve_content:
+        If True, then the byte-level update used by --preserve is run.
+
+    :return:
+        Returns the updated raw content.
+
+    :type raw_content:      bytes
+    :type preserve_content: bool
+    :rtype:                 bytes
+
+    """
+
+    return modify_license.update_raw_content(
+        raw_content,
+        False,
+        [],
+        True,
+        1000,
+        None,
+        None,
+        preserve_content,
+        0
+    )
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize(
+    "raw_content",
+    [
+        b'Copyright\t2020 - 2026-\n',
+        b'Copyright 2020\n - 2026\n',
+        b'# Copyright 2020 Acme\r\n',
+        "# Copyright\xa02020 Acme\n".encode("utf-8"),
+        b'# Copyright 2020 - 2026, Copyright 2019\n'
+    ]
+)
+def test_scan_finds_dates_the_update_changes(raw_content):
+    """
+    Test cases found by fuzzing where the scan once reported files as
+    current that the full update would change.
+
+    """
+
+    current_year = str(datetime.date.today().year)
+
+    assert update_dates(raw_content, True) != raw_content
+    assert not modify_license.copyright_dates_current(
+        raw_content,
+        current_year
+    )
+
+
+def test_scan_matches_update():
+    """
+    Test that, for content the full update leaves otherwise unchanged, the
+    scan reports stale dates exactly when the update changes the content,
+    and that the byte-level and decoded updates agree.
+
+    """
+
+    current_year = str(datetime.date.today().year)
+    rng = random.Random(3)
+    for i in range(FUZZ_CASES):
+        lines = random_content(rng, FUZZ_TOKENS).split("\n")
+        text = "\n".join([ l.rstrip() for l in lines ]) + "\n"
+        raw_content = text.encode("utf-8")
+
+        updated_content = update_dates(raw_content, False)
+
+        assert update_dates(raw_content, True) == updated_content, text
+        assert modify_license.copyright_dates_current(
+            raw_content,
+            current_year
+        ) == ( updated_content == raw_content ), text
+
+
+def test_scan_is_conservative():
+    """
+    Test that the scan never reports content as current when the update
+    used with --preserve, which keeps line endings and trailing whitespace,
+    would change it.
+
+    """
+
+    current_year = str(datetime.date.today().year)
+    rng = random.Random(5)
+    for i in range(FUZZ_CASES):
+        raw_content = random_content(
+            rng,
+            FUZZ_TOKENS + ( "\r\n", "\r", "  " )
+        ).encode("utf-8")
+
+        if update_dates(raw_content, True) != raw_content:
+            assert not modify_license.copyright_dates_current(
+                raw_content,
+                current_year
+            ), raw_content
@@ -0,0 +1,149 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of --preserve with files that are not UTF-8 or use CRLF line endings.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import pytest
+
+###############################################################################
+# Globals:
+#
+
+BANNER = b'#' * 79
+"""
+The banner line used to mark the copyright headers of test files.
+
+"""
+
+###############################################################################
+# Tests:
+#
+
+def test_preserve_latin1_dates(tmp_path, run_script, current_year):
+    """
+    Test that dates are updated in a Latin-1 file with CRLF line endings and
+    that every other byte is kept.
+
+    """
+
+    filename = tmp_path / "legacy.py"
+    filename.write_bytes(
+        b'# -*- coding: latin-1 -*-\r\n'
+        b'# Copyright 2020 Caf\xe9 Ltd  \r\n'
+        b'name = "\xe9t\xe9"\t\r\n'
+    )
+
+    ( status, counters ) = run_script("--preserve", "--date", str(filename))
+
+    assert status == 0
+    assert filename.read_bytes() == (
+        b'# -*- coding: latin-1 -*-\r\n'
+        b'# Copyright 2020 - %d Caf\xe9 Ltd  \r\n'
+        b'name = "\xe9t\xe9"\t\r\n'
+    )%current_year
+
+
+def test_preserve_latin1_header(tmp_path, run_script):
+    """
+    Test that a license header is rewritten in the file's encoding and line
+    endings while the body is copied unchanged.
+
+    """
+
+    body = b'x = "\xe9"  \r\n\r\ny = 1\t\r\n'
+    filename = tmp_path / "legacy.py"
+    filename.write_bytes(
+          b'# -*- coding: latin-1 -*-\r\n'
+        + BANNER + b'\r\n'
+        + b'# Copyright 2020 Caf\xe9 Ltd\r\n'
+        + b'#\r\n'
+        + b'# Old license terms.\r\n'
+        + BANNER + b'\r\n'
+        + body
+    )
+
+    ( status, counters ) = run_script("--preserve", "--mit", str(filename))
+    content = filename.read_bytes()
+
+    assert status == 0
+    assert content.startswith(
+          b'# -*- coding: latin-1 -*-\r\n'
+        + BANNER + b'\r\n'
+        + b'# Copyright 2020 Caf\xe9 Ltd\r\n'
+        + b'#\r\n'
+        + b'# MIT License:\r\n'
+    )
+    assert content.endswith(BANNER + b'\r\n' + body)
+    assert b'Old license terms' not in content
+    assert content.count(b'\n') == content.count(b'\r\n')
+
+
+def test_latin1_rejected_without_preserve(tmp_path, run_script, capsys):
+    """
+    Test that, without --preserve, a file that is not valid UTF-8 is reported
+    and left unchanged.
+
+    """
+
+    original_content = b'# Copyright 2020 Caf\xe9 Ltd\nx = 1\n'
+    filename = tmp_path / "legacy.py"
+    filename.write_bytes(original_content)
+
+    ( status, counters ) = run_script("--date", str(filename))
+
+    assert status == 1
+    assert counters["files_failed"] == 1
+    assert "Could not update file %s"%filename in capsys.readouterr().err
+    assert filename.read_bytes() == original_content
+
+
+@pytest.mark.parametrize("line_ending", [ b'\n', b'\r\n' ])
+def test_preserve_compliant_file_unchanged(
+        tmp_path,
+        run_script,
+        line_ending,
+        current_year
+    ):
+    """
+    Test that a compliant file is not rewritten, whatever its line endings.
+
+    """
+
+    original_content = line_ending.join(
+        [
+            b'# Copyright 2020 - %d Acme'%current_year,
+            b'x = 1   ',
+            b''
+        ]
+    )
+    filename = tmp_path / "current.py"
+    filename.write_bytes(original_content)
+
+    ( status, counters ) = run_script("--preserve", "--date", str(filename))
+
+    assert status == 0
+    assert counters["files_unchanged"] == 1
+    assert counters["bytes_written"] == 0
+    assert filename.read_bytes() == original_content
@@ -0,0 +1,247 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Startup regression tests.  Each test runs a fresh interpreter so that modules
+imported by other tests do not hide eager imports.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import sys
+import re
+import json
+import subprocess
+
+###############################################################################
+# Globals:
+#
+
+REPOSITORY_DIRECTORY = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+"""
+The directory holding modify_license.py.
+
+"""
+
+LAZY_MODULES = (
+    "argparse",
+    "asyncio",
+    "concurrent.futures",
+    "ctypes",
+    "datetime",
+    "difflib",
+    "glob",
+    "hashlib",
+    "multiprocessing",
+    "select",
+    "shutil",
+    "signal",
+    "socket",
+    "subprocess",
+    "tempfile",
+    "textwrap3",
+    "tomllib",
+    "zlib"
+)
+"""
+Modules that must only be imported by the code paths that need them.
+
+"""
+
+STARTUP_BUDGET = 0.1
+"""
+The longest time, in seconds, that importing modify_license may take.
+
+"""
+
+STARTUP_RUNS = 3
+"""
+The number of times the import is timed.  The fastest time is compared to
+the budget so that a busy machine does not cause a failure.
+
+"""
+
+IMPORT_TIME_RE = re.compile(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)')
+"""
+Regular expression used to read the cumulative time, in microseconds, of each
+module from "python -X importtime" output.
+
+"""
+
+###############################################################################
+# Functions:
+#
+
+def run_python(code, *options):
+    """
+    Function that runs code in a fresh interpreter able to import
+    modify_license.
+
+    :param code:
+        The code to be run.
+
+    :param options:
+        Interpreter options placed before the code.
+
+    :return:
+        Returns the completed process.
+
+    :type code:    str
+    :type options: str
+    :rtype:        subprocess.CompletedProcess
+
+    """
+
+    environment = dict(os.environ)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [ REPOSITORY_DIRECTORY ]
+        + [ p for p in [ environment.get("PYTHONPATH") ] if p ]
+    )
+
+    return subprocess.run(
+        [ sys.executable ] + list(options) + [ "-c", code ],
+        env = environment,
+        stdout = subprocess.PIPE,
+        stderr = subprocess.PIPE,
+        universal_newlines = True,
+        check = True
+    )
+
+###############################################################################
+# Tests:
+#
+
+def test_import_is_lazy():
+    """
+    Test that importing modify_license does not import modules that only
+    some code paths need.
+
+    """
+
+    process = run_python(
+        "import sys, json\n"
+        "before = set(sys.modules)\n"
+        "import modify_license\n"
+        "print(json.dumps(sorted(set(sys.modules) - before)))\n"
+    )
+    imported = set(json.loads(process.stdout))
+
+    assert sorted(imported.intersection(LAZY_MODULES)) == []
+
+
+def test_import_time_within_budget():
+    """
+    Test that importing modify_license, with its bytecode cached, stays
+    within the startup budget.
+
+    """
+
+    run_python("import modify_license")
+
+    import_times = []
+    for run in range(STARTUP_RUNS):
+        process = run_python("import modify_license", "-X", "importtime")
+        cumulative_times = dict(
+            [
+                ( m.group(2), int(m.group(1)) )
+                for m in IMPORT_TIME_RE.finditer(process.stderr)
+            ]
+        )
+        import_times.append(cumulative_times["modify_license"] / 1000000.0)
+
+    assert min(import_times) <= STARTUP_BUDGET
+
+
+def test_compliant_check_skips_license_rendering(tmp_path):
+    """
+    Test that checking an edited file whose header the cache shows complies
+    neither renders license text nor imports the modules needed to do so.
+
+    """
+
+    source_filename = tmp_path / "example.py"
+    source_filename.write_text("x = 1\n")
+    cache_filename = tmp_path / "cache.json"
+
+    run_python(
+        "import modify_license, sys\n"
+        "sys.exit(\n"
+        "    modify_license.main(\n"
+        "        [ '--mit', '--no-backup', '--copyright-holder', 'Acme',\n"
+        "          '--cache', %r, %r ]\n"
+        "    )\n"
+        ")\n"%(str(cache_filename), str(source_filename))
+    )
+
+    # The body of the file is edited so that its header is checked against
+    # the cached header digests.
+    with open(source_filename, "a") as file_handle:
+        file_handle.write("y = 2\n")
+
+    process = run_python(
+        "import modify_license, sys, json\n"
+        "status = modify_license.main(\n"
+        "    [ '--mit', '--check', '--copyright-holder', 'Acme',\n"
+        "      '--cache', %r, %r ]\n"
+        ")\n"
+        "print(json.dumps([ status, 'textwrap3' in sys.modules ]))\n"%(
+            str(cache_filename),
+            str(source_filename)
+        )
+    )
+
+    assert json.loads(process.stdout.splitlines()[-1]) == [ 0, False ]
+
+
+def test_simple_check_skips_argparse(tmp_path):
+    """
+    Test that checking a compliant file, without a cache, from a command line
+    holding only paths and switches without values imports neither argparse
+    nor the modules needed to report changes.
+
+    """
+
+    source_filename = tmp_path / "example.py"
+    source_filename.write_text("x = 1\n")
+
+    run_python(
+        "import modify_license\n"
+        "modify_license.main(\n"
+        "    [ '--mit', '--no-backup', '--date', %r ]\n"
+        ")\n"%str(source_filename)
+    )
+
+    process = run_python(
+        "import modify_license, sys, json\n"
+        "status = modify_license.main([ '--mit', '--date', '--check', %r ])\n"
+        "print(\n"
+        "    json.dumps(\n"
+        "        [ status ]\n"
+        "      + [ m in sys.modules for m in ( 'argparse', 'difflib' ) ]\n"
+        "    )\n"
+        ")\n"%str(source_filename)
+    )
+
+    assert json.loads(process.stdout.splitlines()[-1]) == [ 0, False, False ]
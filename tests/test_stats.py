@@ -0,0 +1,154 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of the statistics reported with --stats and --stats-file.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import json
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Fixture providing a directory holding three files whose copyright dates
+    are out of date.
+
+    """
+
+    directory = tmp_path / "tree"
+    directory.mkdir()
+    for i in range(3):
+        ( directory / ( "f%d.py"%i ) ).write_bytes(
+            b'# Copyright 2020 Acme\nx = %d\n'%i
+        )
+
+    return directory
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize("options", [ (), ( "--jobs", "2" ) ])
+def test_stats_json(tmp_path, tree, options):
+    """
+    Test that the JSON report holds the phase times and counters, including
+    those recorded by worker processes.
+
+    """
+
+    stats_filename = tmp_path / "stats.json"
+    status = modify_license.main(
+        [
+            "--no-backup",
+            "--date",
+            "--stats-file", str(stats_filename)
+        ]
+      + list(options)
+      + [ str(tree) ]
+    )
+
+    report = json.loads(stats_filename.read_text())
+
+    assert status == 0
+    assert report["version"] == modify_license.VERSION
+    assert set(report["wall_clock_seconds"]) == { "total" }
+    assert set(report["counters"]) == set(modify_license.STATISTICS_COUNTERS)
+    assert report["counters"]["files_processed"] == 3
+    assert report["counters"]["files_changed"] == 3
+    assert report["counters"]["dates_updated"] == 3
+    assert report["worker_seconds"]["read"] > 0
+
+
+def test_stats_prometheus(tmp_path, tree):
+    """
+    Test that the Prometheus report declares every metric and reports the
+    counters.
+
+    """
+
+    stats_filename = tmp_path / "stats.prom"
+    status = modify_license.main(
+        [
+            "--no-backup",
+            "--date",
+            "--stats-file", str(stats_filename),
+            "--stats-format", "prometheus",
+            str(tree)
+        ]
+    )
+
+    lines = stats_filename.read_text().splitlines()
+    samples = dict(
+        line.rsplit(" ", 1) for line in lines if not line.startswith("#")
+    )
+
+    assert status == 0
+    assert samples["modify_license_files_processed_total"] == "3"
+    assert samples["modify_license_dates_updated_total"] == "3"
+    assert 'modify_license_wall_clock_seconds{phase="total"}' in samples
+    for name in modify_license.STATISTICS_COUNTERS:
+        metric = "modify_license_%s_total"%name
+        assert "# TYPE %s counter"%metric in lines
+        assert metric in samples
+
+
+def test_stats_summary(tree, capsys):
+    """
+    Test that --stats writes a summary to standard error.
+
+    """
+
+    status = modify_license.main(
+        [ "--no-backup", "--date", "--stats", str(tree) ]
+    )
+    error = capsys.readouterr().err
+
+    assert status == 0
+    assert error.startswith("Statistics:\n")
+    assert "files_processed" in error
+
+
+@pytest.mark.parametrize("options", [ (), ( "--jobs", "2" ) ])
+def test_no_stats_records_nothing(tree, options):
+    """
+    Test that nothing is recorded when statistics are not requested.
+
+    """
+
+    status = modify_license.main(
+        [ "--no-backup", "--date" ] + list(options) + [ str(tree) ]
+    )
+
+    assert status == 0
+    assert isinstance(modify_license.STATISTICS, modify_license.NullStatistics)
+    assert modify_license.STATISTICS.snapshot() == {
+        "phases" : {},
+        "counters" : {}
+    }
@@ -0,0 +1,150 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of --stdin and --null, which update source files read from standard
+input.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import io
+import sys
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of a test file whose copyright date is out of date.
+
+"""
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def run_filter(monkeypatch):
+    """
+    Fixture providing a function that runs the script's main function with
+    the given bytes as standard input.  The function returns a tuple holding
+    the exit status and the bytes written to standard output.
+
+    """
+
+    def run(input_content, *arguments):
+        input_stream = io.TextIOWrapper(io.BytesIO(input_content))
+        output_stream = io.TextIOWrapper(io.BytesIO())
+        monkeypatch.setattr(sys, "stdin", input_stream)
+        monkeypatch.setattr(sys, "stdout", output_stream)
+
+        status = modify_license.main(list(arguments))
+
+        output_stream.flush()
+        return ( status, output_stream.buffer.getvalue() )
+
+    return run
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize("stdin_option", [ "--stdin", "-" ])
+def test_stdin_updates_document(run_filter, current_year, stdin_option):
+    """
+    Test that a document read from standard input is updated and written to
+    standard output.
+
+    """
+
+    ( status, output ) = run_filter(OLD_CONTENT, "--date", stdin_option)
+
+    assert status == 0
+    assert output == b'# Copyright 2020 - %d Acme\nx = 1\n'%current_year
+
+
+def test_null_delimited_documents(run_filter, current_year):
+    """
+    Test that NUL separated documents are each updated and written followed
+    by a NUL, and that a document that can not be updated is passed through
+    unchanged.
+
+    """
+
+    invalid_content = b'# Copyright 2020 Caf\xe9\n'
+    ( status, output ) = run_filter(
+        OLD_CONTENT + b'\0' + invalid_content + b'\0' + OLD_CONTENT + b'\0',
+        "--date",
+        "--stdin",
+        "--null"
+    )
+
+    updated_content = b'# Copyright 2020 - %d Acme\nx = 1\n'%current_year
+
+    assert status == 1
+    assert output.split(b'\0') == [
+        updated_content,
+        invalid_content,
+        updated_content,
+        b''
+    ]
+
+
+@pytest.mark.parametrize(
+    "arguments, option",
+    [
+        ( ( "--stdin", "--header-only" ), "--header-only" ),
+        ( ( "-", "-H" ), "--header-only" ),
+        ( ( "--stdin", "--jobs", "2" ), "--jobs" ),
+        ( ( "--stdin", "--io-readers", "2" ), "--io-readers" ),
+        ( ( "--stdin", "--include", "*.py" ), "--include" ),
+        ( ( "--stdin", "--no-gitignore" ), "--no-gitignore" ),
+        ( ( "--stdin", "--max-size", "10" ), "--max-size" ),
+        ( ( "--stdin", "--process-generated" ), "--process-generated" ),
+        (
+            ( "--stdin", "--backup-layout", "directory" ),
+            "--backup-layout"
+        ),
+        ( ( "--stdin", "--check" ), "--check" ),
+        ( ( "--stdin", "--since", "HEAD" ), "--since" ),
+        ( ( "-", "file.py" ), "other paths" )
+    ]
+)
+def test_stdin_rejects_file_options(run_filter, capsys, arguments, option):
+    """
+    Test that switches that only apply to files are rejected with --stdin
+    rather than ignored.
+
+    """
+
+    with pytest.raises(SystemExit) as exception_info:
+        run_filter(OLD_CONTENT, "--date", *arguments)
+
+    error = capsys.readouterr().err.splitlines()[-1]
+
+    assert exception_info.value.code == 2
+    assert "can not be combined" in error
+    assert option in error
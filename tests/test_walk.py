@@ -0,0 +1,244 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+
+"""
+Tests of the directory walk, its include and exclude globs and .gitignore
+support.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Functions:
+#
+
+def make_tree(root, paths):
+    """
+    Function that creates a file for each path in a list.
+
+    :param root:
+        The directory holding the tree.
+
+    :param paths:
+        The "/" separated paths, relative to the root, of the files.
+
+    :type root:  pathlib.Path
+    :type paths: list
+
+    """
+
+    for path in paths:
+        filename = root.joinpath(*path.split("/"))
+        filename.parent.mkdir(parents = True, exist_ok = True)
+        filename.write_text("x = 1\n")
+
+
+def walked(root, *arguments, **keyword_arguments):
+    """
+    Function that walks a directory.
+
+    :param root:
+        The directory to walk.
+
+    :return:
+        Returns the "/" separated paths, relative to the root, of the files
+        found, in the order found.
+
+    :type root: pathlib.Path
+    :rtype:     list
+
+    """
+
+    return [
+        os.path.relpath(p, str(root)).replace(os.sep, "/")
+        for p in modify_license.walk_source_files(
+            [ str(root) ],
+            *arguments,
+            **keyword_arguments
+        )
+    ]
+
+###############################################################################
+# Tests:
+#
+
+def test_walk_order_and_skipped_directories(tmp_path):
+    """
+    Test that the files in each directory are found in sorted order before
+    its subdirectories are walked, and that version control and backup
+    directories are skipped.
+
+    """
+
+    make_tree(
+        tmp_path,
+        [
+            "b.py",
+            "a/z.py",
+            "a/b/c.py",
+            "c.py",
+            ".git/config.py",
+            ".hg/x.py",
+            "backup_license/b.py",
+            "sub/backup_license/a.py"
+        ]
+    )
+
+    assert walked(tmp_path) == [ "b.py", "c.py", "a/z.py", "a/b/c.py" ]
+
+
+def test_include_and_exclude_globs(tmp_path):
+    """
+    Test that globs without a "/" match file names and globs with a "/"
+    match paths relative to the directory walked.
+
+    """
+
+    make_tree(
+        tmp_path,
+        [ "a.py", "a.c", "src/b.py", "src/gen/c.py", "docs/d.py" ]
+    )
+
+    assert walked(tmp_path, [ "*.py" ]) == [
+        "a.py",
+        "docs/d.py",
+        "src/b.py",
+        "src/gen/c.py"
+    ]
+    assert walked(tmp_path, [ "*.py" ], [ "docs", "src/gen" ]) == [
+        "a.py",
+        "src/b.py"
+    ]
+    assert walked(tmp_path, [ "src/gen/*" ]) == [ "src/gen/c.py" ]
+
+
+def test_gitignore_rules(tmp_path):
+    """
+    Test that .gitignore files, including nested ones, are honoured and that
+    the last matching rule wins.
+
+    """
+
+    make_tree(
+        tmp_path,
+        [
+            "keep.py",
+            "debug.log.py",
+            "important.log.py",
+            "build/out.py",
+            "src/build.py",
+            "src/build/out.py",
+            "src/local.py",
+            "src/lib/local.py",
+            "top.py",
+            "src/top.py"
+        ]
+    )
+    ( tmp_path / ".gitignore" ).write_text(
+        "# Comment\n"
+        "*.log.py\n"
+        "!important.log.py\n"
+        "build/\n"
+        "/top.py\n"
+    )
+    ( tmp_path / "src" / ".gitignore" ).write_text("/local.py\n")
+
+    assert walked(tmp_path) == [
+        ".gitignore",
+        "important.log.py",
+        "keep.py",
+        "src/.gitignore",
+        "src/build.py",
+        "src/top.py",
+        "src/lib/local.py"
+    ]
+
+
+def test_gitignore_can_be_disabled(tmp_path):
+    """
+    Test that ignored files are walked when .gitignore files are not
+    honoured.
+
+    """
+
+    make_tree(tmp_path, [ "a.py", "b.py" ])
+    ( tmp_path / ".gitignore" ).write_text("b.py\n")
+
+    assert walked(tmp_path, [ "*.py" ]) == [ "a.py" ]
+    assert walked(tmp_path, [ "*.py" ], honour_gitignore = False) == [
+        "a.py",
+        "b.py"
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ( "*.py", "a.py", True ),
+        ( "*.py", "a/b.py", False ),
+        ( "a/**/b.py", "a/b.py", True ),
+        ( "a/**/b.py", "a/x/y/b.py", True ),
+        ( "**/b.py", "x/b.py", True ),
+        ( "a/**", "a/x/y", True ),
+        ( "[!a]*.py", "a.py", False ),
+        ( "[!a]*.py", "b.py", True ),
+        ( "?.py", "ab.py", False ),
+        ( "\\*.py", "*.py", True ),
+        ( "\\*.py", "a.py", False )
+    ]
+)
+def test_gitignore_patterns(pattern, path, expected):
+    """
+    Test the conversion of .gitignore globs to regular expressions.
+
+    """
+
+    expression = modify_license.gitignore_pattern_re(pattern)
+    assert ( expression.fullmatch(path) is not None ) == expected
+
+
+def test_explicit_files_are_not_filtered(tmp_path, run_script):
+    """
+    Test that files named on the command line are processed even if the
+    globs or .gitignore files would skip them in a directory walk.
+
+    """
+
+    make_tree(tmp_path, [ "a.py" ])
+    ( tmp_path / ".gitignore" ).write_text("a.py\n")
+    filename = tmp_path / "a.py"
+    filename.write_text("# Copyright 2020 Acme\n")
+
+    ( status, counters ) = run_script(
+        "--date",
+        "--exclude",
+        "*.py",
+        str(filename)
+    )
+
+    assert status == 0
+    assert counters["files_changed"] == 1
@@ -0,0 +1,281 @@
+#-*-python-*-##################################################################
+# Copyright 2026 Inesonic, LLC
+#
+# GNU Public License, Version 3:
+#   This program is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU General Public License as published by the Free
+#   Software Foundation, either version 3 of the License, or (at your option)
+#   any later version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+#   ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#   FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#   more details.
+#
+#   You should have received a copy of the GNU General Public License along
+#   with this program.  If not, see <https://www.gnu.org/licenses/>.
+###############################################################################
+"""
+Tests of --watch, which processes files again as they change, and of the
+socket used by editors to update text before it is saved.
+
+"""
+
+###############################################################################
+# Import:
+#
+
+import os
+import time
+import json
+import socket
+import tempfile
+import threading
+
+import pytest
+
+import modify_license
+
+###############################################################################
+# Globals:
+#
+
+OLD_CONTENT = b'# Copyright 2020 Acme\nx = 1\n'
+"""
+The content of test files whose copyright date is out of date.
+
+"""
+
+POLL_INTERVAL = 0.05
+"""
+The time, in seconds, between scans by polling watchers.
+
+"""
+
+WAIT_TIMEOUT = 10.0
+"""
+The longest time, in seconds, that a test waits for a change to be seen.
+
+"""
+
+###############################################################################
+# Functions:
+#
+
+def wait_for_changes(watcher, expected):
+    """
+    Function that collects the changes reported by a watcher until every
+    expected file has been reported or the wait times out.
+
+    :param watcher:
+        The watcher.
+
+    :param expected:
+        The files expected to be reported.
+
+    :return:
+        Returns the set of files reported.
+
+    :type watcher:  modify_license.FileWatcher
+    :type expected: set
+    :rtype:         set
+
+    """
+
+    changed = set()
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not expected <= changed and time.monotonic() < deadline:
+        changed.update(watcher.changes(POLL_INTERVAL))
+
+    return changed
+
+
+def wait_for_content(filename, content):
+    """
+    Function that waits until a file holds different content.
+
+    :param filename:
+        The name of the file.
+
+    :param content:
+        The content the file is expected to stop holding.
+
+    :return:
+        Returns the new file content.
+
+    :type filename: pathlib.Path
+    :type content:  bytes
+    :rtype:         bytes
+
+    """
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    new_content = filename.read_bytes()
+    while new_content == content and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        new_content = filename.read_bytes()
+
+    return new_content
+
+###############################################################################
+# Fixtures:
+#
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Fixture providing a directory holding a source file and an excluded
+    build directory.
+
+    """
+
+    directory = tmp_path / "tree"
+    ( directory / "build" ).mkdir(parents = True)
+    ( directory / "a.py" ).write_bytes(OLD_CONTENT)
+    ( directory / "build" / "out.py" ).write_bytes(OLD_CONTENT)
+
+    return directory
+
+
+@pytest.fixture
+def socket_filename():
+    """
+    Fixture providing a socket file name short enough for any platform.
+
+    """
+
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix domain sockets are not available")
+
+    directory = tempfile.mkdtemp()
+    yield os.path.join(directory, "s")
+
+    if os.path.exists(os.path.join(directory, "s")):
+        os.unlink(os.path.join(directory, "s"))
+
+    os.rmdir(directory)
+
+###############################################################################
+# Tests:
+#
+
+@pytest.mark.parametrize("poll_interval", [ POLL_INTERVAL, None ])
+def test_watcher_reports_changes(tree, poll_interval):
+    """
+    Test that created and modified files are reported, by polling and by
+    inotify where it is available, and that excluded files are not.
+
+    """
+
+    watcher = modify_license.FileWatcher(
+        [ str(tree) ],
+        exclude_patterns = [ "build" ],
+        poll_interval = poll_interval
+    )
+
+    try:
+        if poll_interval is not None:
+            assert watcher.poll_interval == poll_interval
+
+        assert watcher.changes(0.0) == set()
+
+        ( tree / "a.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+        ( tree / "b.py" ).write_bytes(OLD_CONTENT)
+        ( tree / "build" / "out.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+        expected = { str(tree / "a.py"), str(tree / "b.py") }
+
+        assert wait_for_changes(watcher, expected) == expected
+    finally:
+        watcher.close()
+
+
+def test_watch_processes_changed_files(tree):
+    """
+    Test that the watch processes the paths, then processes files again as
+    they change, without processing the files it wrote itself.
+
+    """
+
+    processor = modify_license.LicenseProcessor(
+        modify_dates = True,
+        create_backups = False
+    )
+    stop_event = threading.Event()
+    results = []
+    watch_thread = threading.Thread(
+        target = lambda: results.append(
+            processor.watch(
+                [ str(tree) ],
+                debounce_delay = POLL_INTERVAL,
+                poll_interval = POLL_INTERVAL,
+                stop_event = stop_event
+            )
+        )
+    )
+
+    watch_thread.start()
+    try:
+        first_content = wait_for_content(tree / "a.py", OLD_CONTENT)
+        assert first_content != OLD_CONTENT
+
+        ( tree / "a.py" ).write_bytes(OLD_CONTENT + b'y = 2\n')
+        second_content = wait_for_content(
+            tree / "a.py",
+            OLD_CONTENT + b'y = 2\n'
+        )
+
+        assert second_content == first_content + b'y = 2\n'
+    finally:
+        stop_event.set()
+        watch_thread.join(WAIT_TIMEOUT)
+
+    assert results == [ True ]
+    assert processor.files_changed == 3
+    assert ( tree / "build" / "out.py" ).read_bytes() != OLD_CONTENT
+
+
+def test_text_server_round_trip(socket_filename, current_year):
+    """
+    Test that requests sent over the socket are answered in order on the same
+    connection, including invalid requests.
+
+    """
+
+    processor = modify_license.LicenseProcessor(
+        modify_dates = True,
+        create_backups = False
+    )
+    server = modify_license.TextServer(processor, socket_filename)
+    server.start()
+
+    try:
+        assert os.stat(socket_filename).st_mode & 0o077 == 0
+
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(WAIT_TIMEOUT)
+        client.connect(socket_filename)
+        with client, client.makefile("rwb") as stream:
+            for request in (
+                    { "text" : "# Copyright 2020 Acme\n" },
+                    { "text" : "x = 1\n", "filename" : "a.py" },
+                    { "text" : 1 }
+                ):
+                stream.write(json.dumps(request).encode("utf-8") + b'\n')
+
+            stream.write(b'not json\n')
+            stream.flush()
+
+            responses = [ json.loads(stream.readline()) for _ in range(4) ]
+    finally:
+        server.close()
+
+    assert responses == [
+        {
+            "text" : "# Copyright 2020 - %d Acme\n"%current_year,
+            "changed" : True
+        },
+        { "text" : "x = 1\n", "changed" : False },
+        { "error" : "Invalid request" },
+        { "error" : "Invalid request" }
+    ]
+    assert not os.path.exists(socket_filename)